@@ -0,0 +1,168 @@
+"""Admission control for outbound ASR and LLM calls
+
+Every transcription and evaluation call takes a slot from its backend's
+limiter first. When all slots are busy, callers wait up to the queue
+timeout for one to free up; when too many are already waiting, or the
+wait times out, the call is refused with Overloaded, which the API maps
+to a 503 with Retry-After. A slow upstream therefore costs a bounded
+number of threads instead of hanging every worker.
+
+Limits are per worker process:
+
+    ASR_MAX_CONCURRENCY=8     concurrent transcription calls (0 = unlimited)
+    ASR_MAX_WAITING=16        callers allowed to wait for a slot
+    ASR_QUEUE_TIMEOUT=5       seconds a caller waits before giving up
+    LLM_MAX_CONCURRENCY=8     same for evaluation calls
+    LLM_MAX_WAITING=16
+    LLM_QUEUE_TIMEOUT=5
+    ADMISSION_RETRY_AFTER=2   Retry-After seconds sent with the 503
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", 2))
+
+metrics.describe('admission_wait_seconds', 'histogram', 'Time outbound calls waited for a backend slot')
+metrics.describe('admission_rejections_total', 'counter', 'Outbound calls refused by backend and reason (full, timeout)')
+metrics.describe('admission_in_flight', 'gauge', 'Outbound calls holding a backend slot')
+metrics.describe('admission_waiting', 'gauge', 'Outbound calls waiting for a backend slot')
+
+
+class Overloaded(Exception):
+    """Raised when a backend has no slot for another call
+
+    Attributes:
+        backend: Name of the saturated limiter ('asr' or 'llm')
+        retry_after: Seconds the client should wait before retrying
+    """
+
+    def __init__(self, message, backend, retry_after=ADMISSION_RETRY_AFTER):
+        super().__init__(message)
+        self.backend = backend
+        self.retry_after = retry_after
+
+
+class Limiter:
+    """Bounded concurrency with a bounded, timed wait queue
+
+    Args:
+        name: Backend label used in metrics and errors
+        max_concurrency: Calls allowed at once; 0 disables the limit
+        max_waiting: Callers allowed to queue for a slot
+        queue_timeout: Seconds a caller waits for a slot
+        retry_after: Retry-After seconds reported with Overloaded
+    """
+
+    def __init__(self, name, max_concurrency, max_waiting, queue_timeout, retry_after=ADMISSION_RETRY_AFTER):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # Slots held in a parent process do not belong to a forked worker
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+
+    def _reject(self, reason, message):
+        metrics.inc('admission_rejections_total', {'backend': self.name, 'reason': reason})
+        raise Overloaded(message, self.name, self.retry_after)
+
+    def _saturated(self):
+        return 0 < self.max_concurrency <= self._active
+
+    def check(self):
+        """Refuse now, before any work is done, if a call would be shed anyway
+
+        Raises:
+            Overloaded: If every slot is busy and the wait queue is full
+        """
+        with self._cond:
+            full = self._saturated() and self._waiting >= self.max_waiting
+        if full:
+            self._reject('full', f"The {self.name.upper()} service is busy, please try again shortly")
+
+    def try_acquire(self):
+        """Take a slot only if one is free right now and nobody is waiting
+
+        Returns:
+            True if a slot was taken (give it back with release()), else False
+        """
+        with self._cond:
+            if self._saturated() or self._waiting:
+                return False
+            self._active += 1
+            metrics.set_gauge('admission_in_flight', self._active, {'backend': self.name})
+            return True
+
+    def release(self):
+        """Give back a slot taken by try_acquire()"""
+        with self._cond:
+            self._active -= 1
+            metrics.set_gauge('admission_in_flight', self._active, {'backend': self.name})
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for the duration of the block
+
+        Raises:
+            Overloaded: If the wait queue is full or no slot frees up within queue_timeout
+        """
+        start = time.perf_counter()
+        with self._cond:
+            if self._saturated():
+                if self._waiting >= self.max_waiting:
+                    self._reject('full', f"The {self.name.upper()} service is busy, please try again shortly")
+                self._waiting += 1
+                metrics.set_gauge('admission_waiting', self._waiting, {'backend': self.name})
+                try:
+                    deadline = start + self.queue_timeout
+                    while self._saturated():
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self._reject('timeout', f"Timed out waiting for the {self.name.upper()} service, "
+                                                    f"please try again shortly")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    metrics.set_gauge('admission_waiting', self._waiting, {'backend': self.name})
+            self._active += 1
+            metrics.set_gauge('admission_in_flight', self._active, {'backend': self.name})
+        metrics.observe('admission_wait_seconds', time.perf_counter() - start, {'backend': self.name})
+
+        try:
+            yield
+        finally:
+            self.release()
+
+
+limiters = {
+    'asr': Limiter('asr',
+                   max_concurrency=int(os.getenv("ASR_MAX_CONCURRENCY", 8)),
+                   max_waiting=int(os.getenv("ASR_MAX_WAITING", 16)),
+                   queue_timeout=float(os.getenv("ASR_QUEUE_TIMEOUT", 5))),
+    'llm': Limiter('llm',
+                   max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 8)),
+                   max_waiting=int(os.getenv("LLM_MAX_WAITING", 16)),
+                   queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", 5))),
+}
+
+
+def admit(backend):
+    """Context manager holding a slot of the named limiter ('asr' or 'llm')"""
+    return limiters[backend].slot()
+
+
+def check(*backends):
+    """Raise Overloaded if any of the named limiters would shed a new call"""
+    for backend in backends:
+        limiters[backend].check()
@@ -1,144 +1,357 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory, redirect, url_for, session, flash
+from flask import Flask, request, jsonify, render_template, send_from_directory, send_file, redirect, url_for, session, flash, Response, g
 import os
+import json
+import mimetypes
+import time
 import random
 import uuid
-from werkzeug.utils import secure_filename
-from werkzeug.security import generate_password_hash, check_password_hash
 import sqlite3
+import click
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
 # Import module functions
 from moduleA import run_moduleA, sentences as moduleA_sentences
-from moduleB import run_moduleB, sentences as moduleB_sentences
-from moduleC import run_moduleC, topics
-from moduleD import get_quiz, submit_answers
-
-app = Flask(__name__)
+from moduleB import run_moduleB, sentences as moduleB_sentences, tts_store, sentence_audio_key, warm_sentence_audio
+from moduleC import run_moduleC, run_moduleC_stages, topics, evaluation_cache
+from moduleD import get_quiz, submit_answers, miss_rates_from_stats
+from jobs import JobQueue, QueueFullError
+from db import Database
+from perf_writer import PerformanceWriter
+from audio_io import AudioBuffer, start_spool_janitor
+from transcription import transcription_cache
+from assets import AssetManifest, build_assets
+from catalog import catalog
+from passwords import PasswordHasher, PasswordPoolBusy
+from upload_stream import UploadRejected, read_recording
+import admission
+import metrics
+
+# Static files are served by static_files() below, which knows about the asset build
+app = Flask(__name__, static_folder=None)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'temp_audio'
+app.config['UPLOAD_FOLDER'] = 'temp_audio'  # spool dir for uploads too large to keep in memory
+app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 2 * 1024 * 1024))
+app.config['SPOOL_MAX_AGE'] = 3600  # janitor removes spool files older than this (seconds)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-change-me-in-production')
-app.config['USER_DB'] = os.path.join(os.path.dirname(__file__), 'users_temp.db')
+app.config['USER_DB'] = os.environ.get('USER_DB', os.path.join(os.path.dirname(__file__), 'users_temp.db'))
+app.config['DB_BUSY_TIMEOUT_MS'] = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+app.config['DB_SYNCHRONOUS'] = os.environ.get('DB_SYNCHRONOUS', 'NORMAL')
+# Write-behind buffering of performance rows (off by default)
+app.config['PERF_WRITE_BEHIND'] = os.environ.get('PERF_WRITE_BEHIND', '0') == '1'
+app.config['PERF_FLUSH_ROWS'] = int(os.environ.get('PERF_FLUSH_ROWS', 50))
+app.config['PERF_FLUSH_MS'] = int(os.environ.get('PERF_FLUSH_MS', 200))
+app.config['SCORING_WORKERS'] = int(os.environ.get('SCORING_WORKERS', 4))  # concurrent ASR/LLM jobs
+app.config['SCORING_QUEUE_SIZE'] = int(os.environ.get('SCORING_QUEUE_SIZE', 32))
+# Jobs not touched by their worker's heartbeat for this long lost that worker (killed,
+# recycled) and are failed. Keep it below JOB_EVENTS_TIMEOUT so an event stream sees the failure
+app.config['SCORING_STALE_SECONDS'] = int(os.environ.get('SCORING_STALE_SECONDS', 60))
+app.config['JOB_EVENTS_TIMEOUT'] = 120  # seconds an SSE stream stays open
+app.config['JOB_EVENTS_POLL_INTERVAL'] = 0.25
+# Each open SSE stream holds a request thread; past this many per worker, clients get a 503 and should poll
+app.config['JOB_EVENTS_MAX_STREAMS'] = int(os.environ.get('JOB_EVENTS_MAX_STREAMS', 2))
+app.config['BATCH_MAX_ITEMS'] = int(os.environ.get('BATCH_MAX_ITEMS', 20))  # recordings per batch request
+app.config['BATCH_CONCURRENCY'] = int(os.environ.get('BATCH_CONCURRENCY', 4))  # parallel transcriptions per batch
+app.config['TTS_WARM_ON_START'] = os.environ.get('TTS_WARM_ON_START', '0') == '1'  # pre-render Module B audio at server start
+app.config['TTS_WARM_ON_MISS'] = os.environ.get('TTS_WARM_ON_MISS', '1') == '1'  # render in the background on a cache miss
+app.config['TTS_WARM_WORKERS'] = int(os.environ.get('TTS_WARM_WORKERS', 4))
+app.config['TTS_MAX_AGE'] = 365 * 24 * 3600  # TTS files are content-addressed, so they never change
+app.config['ASSET_MAX_AGE'] = 365 * 24 * 3600  # fingerprinted static files never change either
+app.config['CATALOG_BATCH_MAX'] = 50  # items per /sentences or /topics batch
+# Per-recording caps for the single-upload endpoints, enforced while the body streams in
+app.config['UPLOAD_LIMITS'] = {
+    'moduleA': {'max_seconds': 60, 'max_bytes': 10 * 1024 * 1024},
+    'moduleB': {'max_seconds': 60, 'max_bytes': 10 * 1024 * 1024},
+    'moduleC': {'max_seconds': 300, 'max_bytes': 16 * 1024 * 1024},
+}
 
 # Create temp directory if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+start_spool_janitor(app.config['UPLOAD_FOLDER'], max_age_seconds=app.config['SPOOL_MAX_AGE'])
 
 
 # ===== DATABASE FUNCTIONS =====
 
+db = Database(app.config['USER_DB'],
+              busy_timeout_ms=app.config['DB_BUSY_TIMEOUT_MS'],
+              synchronous=app.config['DB_SYNCHRONOUS'])
+
+
 def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(app.config['USER_DB'])
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get this thread's pooled database connection (do not close it)"""
+    return db.connection()
 
 
 def init_user_db():
     """Initialize user authentication database"""
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            email TEXT UNIQUE NOT NULL,
-            username TEXT NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-    conn.commit()
-    conn.close()
+    with db.transaction() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT UNIQUE NOT NULL,
+                username TEXT NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
 
 
 def init_performance_db():
-    """Initialize performance tracking database"""
-    conn = get_db()
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS user_performance (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            session_id TEXT NOT NULL,
-            module TEXT NOT NULL,
-            question_number INTEGER,
-            score REAL,
-            max_score REAL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        );
+    """Initialize performance tracking database
+
+    A database created before performance_summary existed gets the rollup
+    backfilled from its user_performance rows when the table is added.
+    """
+    with db.transaction() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_performance (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                session_id TEXT NOT NULL,
+                module TEXT NOT NULL,
+                question_number INTEGER,
+                score REAL,
+                max_score REAL,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            );
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_user_performance_session
+            ON user_performance (user_id, session_id, module, score, max_score);
+        """)
+        # Per user/session/module rollup kept in step with user_performance,
+        # so reports read one row per module instead of scanning attempts
+        summary_missing = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'performance_summary'").fetchone() is None
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS performance_summary (
+                user_id INTEGER NOT NULL,
+                session_id TEXT NOT NULL,
+                module TEXT NOT NULL,
+                score_sum REAL NOT NULL DEFAULT 0,
+                max_score_sum REAL NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                best_score REAL,
+                PRIMARY KEY (user_id, session_id, module)
+            ) WITHOUT ROWID;
+        """)
+        if summary_missing:
+            _fill_performance_summary(conn)
+        # Per user/category Module D answer counts, used to weight quiz sampling
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS quiz_category_stats (
+                user_id INTEGER NOT NULL,
+                category TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, category)
+            ) WITHOUT ROWID;
+        """)
+
+
+def backfill_performance_summary():
+    """Rebuild performance_summary from all rows in user_performance
+
+    Returns:
+        Number of summary rows written
+    """
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM performance_summary")
+        return _fill_performance_summary(conn)
+
+
+def _fill_performance_summary(conn):
+    cur = conn.execute("""
+        INSERT INTO performance_summary
+            (user_id, session_id, module, score_sum, max_score_sum, attempts, best_score)
+        SELECT user_id, session_id, module,
+               COALESCE(SUM(score), 0), COALESCE(SUM(max_score), 0), COUNT(*), MAX(score)
+        FROM user_performance
+        GROUP BY user_id, session_id, module
     """)
-    conn.commit()
-    conn.close()
+    return cur.rowcount
 
 init_user_db()
 init_performance_db()
+
+scoring_jobs = JobQueue(db,
+                        max_workers=app.config['SCORING_WORKERS'],
+                        max_pending=app.config['SCORING_QUEUE_SIZE'],
+                        stale_seconds=app.config['SCORING_STALE_SECONDS'])
+scoring_jobs.init_db()
+job_event_streams = admission.Limiter('events', max_concurrency=app.config['JOB_EVENTS_MAX_STREAMS'],
+                                      max_waiting=0, queue_timeout=0)
+
 # ===== USER MANAGEMENT FUNCTIONS =====
 
+# KDF work runs on a small process pool (see passwords.py)
+password_hasher = PasswordHasher()
+
+
 def create_user(email, username, password):
-    """Create a new user account"""
-    conn = get_db()
-    cur = conn.cursor()
+    """Create a new user account
+
+    Raises:
+        PasswordPoolBusy: If the password pool is saturated
+    """
+    password_hash = password_hasher.hash(password)
     try:
-        cur.execute("INSERT INTO users (email, username, password_hash) VALUES (?, ?, ?)",
-                    (email.lower().strip(), username.strip(), generate_password_hash(password)))
-        conn.commit()
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO users (email, username, password_hash) VALUES (?, ?, ?)",
+                         (email.lower().strip(), username.strip(), password_hash))
         return True, None
     except sqlite3.IntegrityError:
         return False, "Email already registered"
     except Exception as e:
         return False, str(e)
-    finally:
-        conn.close()
 
 
 def verify_user(email, password):
-    """Verify user credentials"""
-    conn = get_db()
-    cur = conn.cursor()
-    try:
-        cur.execute("SELECT id, email, username, password_hash FROM users WHERE email = ?", 
-                   (email.lower().strip(),))
-        row = cur.fetchone()
-        if not row:
-            return False, "Invalid credentials"
-        if not check_password_hash(row["password_hash"], password):
-            return False, "Invalid credentials"
-        return True, {"id": row["id"], "email": row["email"], "username": row["username"]}
-    finally:
-        conn.close()
+    """Verify user credentials
+
+    Hashes made with older KDF settings are upgraded transparently on a
+    successful login, so PASSWORD_METHOD can be changed without lockouts.
+
+    Raises:
+        PasswordPoolBusy: If the password pool is saturated
+    """
+    row = get_db().execute("SELECT id, email, username, password_hash FROM users WHERE email = ?",
+                           (email.lower().strip(),)).fetchone()
+    if not row:
+        return False, "Invalid credentials"
+    if not password_hasher.verify(row["password_hash"], password):
+        return False, "Invalid credentials"
+    if password_hasher.needs_rehash(row["password_hash"]):
+        # Hash before taking the write lock: the KDF (and any wait for a
+        # pool slot) must not block every other writer
+        try:
+            new_hash = password_hasher.hash(password)
+        except PasswordPoolBusy:
+            new_hash = None  # upgrade on a later login
+        if new_hash is not None:
+            with db.transaction() as conn:
+                # Skip if a concurrent login already upgraded it
+                conn.execute("UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                             (new_hash, row["id"], row["password_hash"]))
+    return True, {"id": row["id"], "email": row["email"], "username": row["username"]}
+
+
+def auth_busy_response(endpoint):
+    """503 for JSON clients, or a flash message for form posts, when the password pool is full"""
+    msg = 'The server is busy signing other users in. Please try again in a moment.'
+    if request.is_json:
+        response = jsonify({'success': False, 'error': msg})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    flash(msg, 'error')
+    return redirect(url_for(endpoint))
 
 
 # ===== PERFORMANCE TRACKING FUNCTIONS =====
 
-def save_performance(user_id, session_id, module, question_number, score, max_score):
-    """Save performance data for a question"""
-    conn = get_db()
-    cur = conn.cursor()
-    try:
-        cur.execute("""
+def write_performance_rows(rows):
+    """Insert performance rows in a single transaction
+
+    Args:
+        rows: List of (user_id, session_id, module, question_number, score, max_score) tuples
+    """
+    with db.transaction() as conn:
+        conn.executemany("""
             INSERT INTO user_performance (user_id, session_id, module, question_number, score, max_score)
             VALUES (?, ?, ?, ?, ?, ?)
-        """, (user_id, session_id, module, question_number, score, max_score))
-        conn.commit()
-    finally:
-        conn.close()
+        """, rows)
+        conn.executemany("""
+            INSERT INTO performance_summary
+                (user_id, session_id, module, score_sum, max_score_sum, attempts, best_score)
+            VALUES (?, ?, ?, COALESCE(?, 0), COALESCE(?, 0), 1, ?)
+            ON CONFLICT (user_id, session_id, module) DO UPDATE SET
+                score_sum = score_sum + excluded.score_sum,
+                max_score_sum = max_score_sum + excluded.max_score_sum,
+                attempts = attempts + 1,
+                best_score = MAX(COALESCE(best_score, excluded.best_score),
+                                 COALESCE(excluded.best_score, best_score))
+        """, [(user_id, session_id, module, score, max_score, score)
+              for user_id, session_id, module, _, score, max_score in rows])
+
+
+def validate_performance_row(row):
+    """Raise ValueError for a performance row the tables would refuse
+
+    Args:
+        row: (user_id, session_id, module, question_number, score, max_score) tuple
+    """
+    if len(row) != 6:
+        raise ValueError(f"Performance row needs 6 fields, got {len(row)}")
+    user_id, session_id, module = row[:3]
+    if user_id is None or not session_id or not module:
+        raise ValueError("Performance row is missing its user, session or module")
+
+
+def save_performance_many(rows):
+    """Save several performance rows at once
+
+    Rows go through the write-behind buffer when it is enabled, otherwise
+    they are committed together in one transaction.
+    """
+    rows = list(rows)
+    if performance_writer is not None:
+        performance_writer.add_many(rows)
+    else:
+        write_performance_rows(rows)
+
+
+def record_quiz_categories(user_id, review):
+    """Add graded quiz answers to the user's per-category counts
+
+    Args:
+        user_id: User who took the quiz
+        review: The ``review`` list returned by submit_answers
+    """
+    counts = {}
+    for item in review:
+        attempts, misses = counts.get(item['category'], (0, 0))
+        counts[item['category']] = (attempts + 1, misses + (0 if item.get('correct') else 1))
+    with db.transaction() as conn:
+        conn.executemany("""
+            INSERT INTO quiz_category_stats (user_id, category, attempts, misses)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, category) DO UPDATE SET
+                attempts = attempts + excluded.attempts,
+                misses = misses + excluded.misses
+        """, [(user_id, category, attempts, misses) for category, (attempts, misses) in counts.items()])
+
+
+def get_quiz_category_stats(user_id):
+    """Category -> (attempts, misses) for a user (primary key range read)"""
+    rows = get_db().execute(
+        "SELECT category, attempts, misses FROM quiz_category_stats WHERE user_id = ?", (user_id,)
+    ).fetchall()
+    return {row['category']: (row['attempts'], row['misses']) for row in rows}
+
+
+def save_performance(user_id, session_id, module, question_number, score, max_score):
+    """Save performance data for a question"""
+    save_performance_many([(user_id, session_id, module, question_number, score, max_score)])
 
 
 def get_session_report(user_id, session_id):
     """Generate comprehensive performance report"""
-    conn = get_db()
-    cur = conn.cursor()
-    
-    # Get all performance data for this session grouped by module
-    cur.execute("""
-        SELECT module, AVG(score) as avg_score, AVG(max_score) as max_score, COUNT(*) as attempts
-        FROM user_performance
-        WHERE user_id = ? AND session_id = ?
-        GROUP BY module
+    # Make sure buffered rows from this worker are visible to the report
+    if performance_writer is not None:
+        try:
+            performance_writer.flush()
+        except Exception as e:
+            print(f"Error flushing performance rows before report: {str(e)}")
+
+    # Per-module totals for this session, maintained on every insert
+    results = get_db().execute("""
+        SELECT module, score_sum / attempts as avg_score, max_score_sum / attempts as max_score,
+               attempts, best_score
+        FROM performance_summary
+        WHERE user_id = ? AND session_id = ? AND attempts > 0
         ORDER BY module
-    """, (user_id, session_id))
-    
-    results = cur.fetchall()
-    conn.close()
+    """, (user_id, session_id)).fetchall()
     
     report = {
         'modules': [],
@@ -156,7 +369,8 @@ def get_session_report(user_id, session_id):
             'average_score': round(row['avg_score'], 2),
             'max_score': round(row['max_score'], 2),
             'percentage': percentage,
-            'questions_completed': row['attempts']
+            'questions_completed': row['attempts'],
+            'best_score': round(row['best_score'] or 0, 2)
         }
         report['modules'].append(module_data)
         total_percentage += percentage
@@ -168,6 +382,31 @@ def get_session_report(user_id, session_id):
     return report
 
 
+performance_writer = None
+if app.config['PERF_WRITE_BEHIND']:
+    performance_writer = PerformanceWriter(write_performance_rows,
+                                           max_rows=app.config['PERF_FLUSH_ROWS'],
+                                           max_delay_ms=app.config['PERF_FLUSH_MS'],
+                                           validate=validate_performance_row)
+
+
+# ===== REQUEST METRICS =====
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None and request.endpoint not in (None, 'static', 'static_files'):
+        labels = {'endpoint': request.endpoint, 'method': request.method}
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - start, labels)
+        metrics.inc('http_requests_total', dict(labels, status=str(response.status_code)))
+    return response
+
+
 # ===== AUTHENTICATION DECORATOR =====
 
 def login_required(view_func):
@@ -203,7 +442,10 @@ def signup():
         flash(msg, 'error')
         return redirect(url_for('signup'))
 
-    ok, err = create_user(email, username, password)
+    try:
+        ok, err = create_user(email, username, password)
+    except PasswordPoolBusy:
+        return auth_busy_response('signup')
     if not ok:
         if request.is_json:
             return jsonify({'success': False, 'error': err}), 400
@@ -233,7 +475,10 @@ def login():
         flash(msg, 'error')
         return redirect(url_for('login'))
 
-    ok, user = verify_user(email, password)
+    try:
+        ok, user = verify_user(email, password)
+    except PasswordPoolBusy:
+        return auth_busy_response('login')
     if not ok:
         if request.is_json:
             return jsonify({'success': False, 'error': user}), 401
@@ -304,14 +549,50 @@ def performance_report():
     return render_template('report.html', report=report)
 
 
+asset_manifest = AssetManifest()
+
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file, fingerprinted when `flask build-assets` has been run"""
+    return url_for('static_files', filename=asset_manifest.resolve(filename))
+
+
 @app.route('/static/<path:filename>')
 def static_files(filename):
-    """Serve static files"""
-    return send_from_directory('static', filename)
+    """Serve static files
+
+    Fingerprinted files from the asset build are served precompressed
+    (brotli or gzip, whichever the client accepts) with immutable caching;
+    anything else comes straight from static/.
+    """
+    if not asset_manifest.is_fingerprinted(filename):
+        return send_from_directory('static', filename)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, path in asset_manifest.variants(filename):
+        if encoding is None or request.accept_encodings[encoding]:
+            break
+    response = send_file(path, mimetype=mimetype, conditional=True, max_age=app.config['ASSET_MAX_AGE'])
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 # ===== API ENDPOINTS - GET CONTENT =====
 
+def warm_missing_audio():
+    """Start a background render of missing Module B audio, unless TTS_WARM_ON_MISS is off
+
+    Offline runs (tests, load tests) turn it off so no request reaches gTTS.
+    """
+    if app.config['TTS_WARM_ON_MISS']:
+        warm_sentence_audio(workers=app.config['TTS_WARM_WORKERS'], background=True)
+
+
 @app.route('/api/moduleA/sentence', methods=['GET'])
 @login_required
 def get_moduleA_sentence():
@@ -336,9 +617,14 @@ def get_moduleB_sentence():
     try:
         sentence_id = random.randint(0, len(moduleB_sentences) - 1)
         sentence = moduleB_sentences[sentence_id]
+        audio_key = sentence_audio_key(sentence_id)
+        if audio_key is None:
+            # Not rendered yet: the page falls back to browser speech this time
+            warm_missing_audio()
         return jsonify({
             'sentence_id': sentence_id,
             'sentence': sentence,
+            'audio_url': url_for('api_tts_audio', key=audio_key) if audio_key else None,
             'success': True
         })
     except Exception as e:
@@ -346,6 +632,78 @@ def get_moduleB_sentence():
         return jsonify({'error': str(e), 'success': False}), 500
 
 
+def _catalog_batch(collection, id_field, text_field, extra=None):
+    """Random batch of catalog items for the client to prefetch
+
+    Query parameters: ``count`` (default 20), ``exclude`` (comma-separated
+    ids the client has already used) and ``seed`` (makes the batch
+    repeatable, so a retried request can be answered with 304).
+    """
+    count = max(1, min(request.args.get('count', 20, type=int), app.config['CATALOG_BATCH_MAX']))
+    exclude = [int(part) for part in request.args.get('exclude', '').split(',') if part.strip().isdigit()]
+    seed = request.args.get('seed')
+    rng = random.Random(f"{seed}:{','.join(map(str, exclude))}") if seed else random
+
+    ids = collection.sample(count, exclude, rng)
+    items = []
+    for item_id in ids:
+        item = {id_field: item_id, text_field: collection[item_id]}
+        if extra is not None:
+            item.update(extra(item_id))
+        items.append(item)
+
+    response = jsonify({'success': True, 'version': collection.version, 'items': items})
+    response.add_etag()
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@app.route('/api/moduleA/sentences', methods=['GET'])
+@login_required
+def get_moduleA_sentences():
+    """Batch of Module A sentences (see _catalog_batch)"""
+    return _catalog_batch(catalog['moduleA'], 'sentence_id', 'sentence')
+
+
+@app.route('/api/moduleB/sentences', methods=['GET'])
+@login_required
+def get_moduleB_sentences():
+    """Batch of Module B sentences with their pre-rendered audio URLs"""
+    missing = []
+
+    def audio(sentence_id):
+        key = sentence_audio_key(sentence_id)
+        if key is None:
+            missing.append(sentence_id)
+        return {'audio_url': url_for('api_tts_audio', key=key) if key else None}
+
+    response = _catalog_batch(catalog['moduleB'], 'sentence_id', 'sentence', extra=audio)
+    if missing:
+        warm_missing_audio()
+    return response
+
+
+@app.route('/api/moduleC/topics', methods=['GET'])
+@login_required
+def get_moduleC_topics():
+    """Batch of Module C topics (see _catalog_batch)"""
+    return _catalog_batch(catalog['moduleC'], 'topic_id', 'topic')
+
+
+@app.route('/api/tts/<key>.mp3', methods=['GET'])
+def api_tts_audio(key):
+    """Serve rendered sentence audio (ETag, Range and immutable caching)"""
+    path = tts_store.lookup(key)
+    if path is None:
+        return jsonify({'error': 'Audio not found', 'success': False}), 404
+    response = send_file(path, mimetype='audio/mpeg', conditional=True, etag=key,
+                         max_age=app.config['TTS_MAX_AGE'])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
 @app.route('/api/moduleC/topic', methods=['GET'])
 @login_required
 def get_moduleC_topic():
@@ -366,9 +724,19 @@ def get_moduleC_topic():
 @app.route('/api/moduleD/quiz', methods=['GET'])
 @login_required
 def api_get_quiz():
-    """Get a new quiz for Module D"""
+    """Get a new quiz for Module D
+
+    Optional query parameters: ``difficulty`` (easy, medium, hard or
+    mixed) and ``count``. Categories the user has missed more often are
+    drawn more often.
+    """
     try:
-        quiz = get_quiz()
+        miss_rates = miss_rates_from_stats(get_quiz_category_stats(session['user_id']))
+        quiz = get_quiz(app.config['SECRET_KEY'],
+                        num_questions=max(1, min(request.args.get('count', 5, type=int), 50)),
+                        difficulty=request.args.get('difficulty', 'mixed'),
+                        user_id=session['user_id'],
+                        miss_rates=miss_rates)
         return jsonify(quiz)
     except Exception as e:
         print(f"Error in moduleD/quiz: {str(e)}")
@@ -377,164 +745,482 @@ def api_get_quiz():
 
 # ===== API ENDPOINTS - SUBMIT AUDIO/ANSWERS =====
 
-@app.route('/api/moduleA', methods=['POST'])
-@login_required
-def api_moduleA():
-    """Process audio for Module A - Read & Speak"""
-    try:
-        if 'audio' not in request.files:
-            return jsonify({'error': 'No audio file provided', 'success': False}), 400
+def _read_upload(file, module):
+    """Buffer an uploaded recording in memory (spooling large ones to disk)"""
+    with metrics.stage(module, 'upload'):
+        return AudioBuffer.from_upload(file,
+                                       spool_threshold=app.config['UPLOAD_SPOOL_THRESHOLD'],
+                                       spool_dir=app.config['UPLOAD_FOLDER'])
 
-        file = request.files['audio']
-        sentence_id = request.form.get('sentence_id', type=int)
 
-        if file.filename == '':
-            return jsonify({'error': 'No file selected', 'success': False}), 400
+def _receive_recording(module, id_field, items, label):
+    """Stream a module's recording upload, checking id_field before any audio is read
 
-        if sentence_id is None:
-            return jsonify({'error': 'Sentence ID is required', 'success': False}), 400
+    Returns:
+        (item_id, fields, audio); audio is an AudioBuffer the caller must close
 
-        filename = secure_filename(f"moduleA_{os.urandom(8).hex()}.wav")
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+    Raises:
+        UploadRejected: If the id is missing or invalid, or the recording is over the module's caps
+    """
+    def validate(fields):
+        item_id = fields.get(id_field, type=int)
+        if item_id is None:
+            return f'{label} ID is required'
+        if not 0 <= item_id < len(items):
+            return f'Invalid {id_field}'
+        return None
 
-        result = run_moduleA(filepath, sentence_id)
+    limits = app.config['UPLOAD_LIMITS'][module]
+    with metrics.stage(module, 'upload'):
+        fields, audio = read_recording(request, required=(id_field,), validate=validate,
+                                       max_bytes=limits['max_bytes'], max_seconds=limits['max_seconds'],
+                                       spool_threshold=app.config['UPLOAD_SPOOL_THRESHOLD'],
+                                       spool_dir=app.config['UPLOAD_FOLDER'])
+    return fields.get(id_field, type=int), fields, audio
 
-        # Save performance
-        save_performance(
-            user_id=session['user_id'],
-            session_id=session.get('current_session_id'),
-            module='Module A - Read & Speak',
-            question_number=sentence_id,
-            score=result.get('pronunciation_score', 0),
-            max_score=100
-        )
 
-        # Clean up the file
-        if os.path.exists(filepath):
-            os.remove(filepath)
+def overloaded_response(e):
+    """503 with Retry-After for a call shed by admission control (see admission.py)"""
+    response = jsonify({'error': str(e), 'success': False})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
 
-        # Map backend field names to frontend expectations
-        response = {
-            'success': True,
-            'score': result.get('pronunciation_score', 0),
-            'transcription': result.get('transcribed_text', ''),
-            'feedback': result.get('feedback', ''),
-            'sentence_id': result.get('sentence_id', sentence_id),
-            'expected': result.get('target_sentence', ''),
-            'pronunciation_score': result.get('pronunciation_score', 0),
-            'fluency_score': result.get('fluency_score', 0),
-            'duration_sec': result.get('duration_sec', 0),
-            'wps': result.get('wps', 0)
-        }
 
-        return jsonify(response)
+def upload_rejected_response(module, e):
+    """JSON error for an upload refused by read_recording"""
+    metrics.inc('upload_rejections_total', {'module': module, 'status': str(e.status)})
+    return jsonify({'error': str(e), 'success': False}), e.status
 
-    except Exception as e:
-        print(f"Error in moduleA: {str(e)}")
-        return jsonify({'error': str(e), 'success': False}), 500
 
+def _scoring_mode(fields=None):
+    """'async' (submit-then-poll), 'stream' (progressive NDJSON) or 'sync'
 
-@app.route('/api/moduleB', methods=['POST'])
-@login_required
-def api_moduleB():
-    """Process audio for Module B - Listen & Repeat"""
-    try:
-        if 'audio' not in request.files:
-            return jsonify({'error': 'No audio file provided', 'success': False}), 400
+    Args:
+        fields: Form fields already read from a streamed upload (default request.form)
+    """
+    mode = request.args.get('mode') or (request.form if fields is None else fields).get('mode')
+    return mode if mode in ('async', 'stream') else 'sync'
+
+
+def _wants_async(fields=None):
+    """True if the client asked for submit-then-poll scoring"""
+    return _scoring_mode(fields) == 'async'
 
-        file = request.files['audio']
-        sentence_id = request.form.get('sentence_id', type=int)
 
-        if file.filename == '':
-            return jsonify({'error': 'No file selected', 'success': False}), 400
+def _submit_scoring_job(kind, func, audio, *args):
+    """Queue a scoring job and return the 202 response, or 503 if the queue is full"""
+    try:
+        job_id = scoring_jobs.submit(session['user_id'], kind, func, audio, *args)
+    except QueueFullError as e:
+        audio.close()
+        response = jsonify({'error': str(e), 'success': False})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'queued',
+        'poll_url': url_for('api_get_job', job_id=job_id),
+        'events_url': url_for('api_job_events', job_id=job_id)
+    }), 202
+
+
+def score_moduleA(audio, sentence_id, user_id, session_id):
+    """Score a Module A recording, save performance and return the API response"""
+    try:
+        result = run_moduleA(audio, sentence_id)
+    finally:
+        with metrics.stage('moduleA', 'cleanup'):
+            audio.close()
+
+    # Save performance
+    with metrics.stage('moduleA', 'save_performance'):
+        save_performance(
+            user_id=user_id,
+            session_id=session_id,
+            module='Module A - Read & Speak',
+            question_number=sentence_id,
+            score=result.get('pronunciation_score', 0),
+            max_score=100
+        )
 
-        if sentence_id is None:
-            return jsonify({'error': 'Sentence ID is required', 'success': False}), 400
+    return moduleA_response(result, sentence_id)
+
+
+def moduleA_response(result, sentence_id):
+    """Map run_moduleA field names to frontend expectations"""
+    return {
+        'success': True,
+        'score': result.get('pronunciation_score', 0),
+        'transcription': result.get('transcribed_text', ''),
+        'feedback': result.get('feedback', ''),
+        'sentence_id': result.get('sentence_id', sentence_id),
+        'expected': result.get('target_sentence', ''),
+        'pronunciation_score': result.get('pronunciation_score', 0),
+        'fluency_score': result.get('fluency_score', 0),
+        'duration_sec': result.get('duration_sec', 0),
+        'wps': result.get('wps', 0),
+        'word_errors': result.get('word_errors', ''),
+        'alignment': result.get('alignment')
+    }
 
-        filename = secure_filename(f"moduleB_{os.urandom(8).hex()}.wav")
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
 
+def score_moduleB(audio, sentence_id, user_id, session_id):
+    """Score a Module B recording, save performance and return the API response"""
+    try:
         # Call moduleB
         try:
-            result = run_moduleB(filepath, sentence_id)
+            result = run_moduleB(audio, sentence_id)
         except TypeError:
-            result = run_moduleB(filepath)
+            result = run_moduleB(audio)
             result['sentence_id'] = sentence_id
+    finally:
+        with metrics.stage('moduleB', 'cleanup'):
+            audio.close()
 
-        # Save performance
+    # Save performance
+    with metrics.stage('moduleB', 'save_performance'):
         save_performance(
-            user_id=session['user_id'],
-            session_id=session.get('current_session_id'),
+            user_id=user_id,
+            session_id=session_id,
             module='Module B - Listen & Repeat',
             question_number=sentence_id,
             score=result.get('pronunciation_score', result.get('score', 0)),
             max_score=100
         )
 
-        # Clean up the file
-        if os.path.exists(filepath):
-            os.remove(filepath)
-
-        if 'success' not in result:
-            result['success'] = True
-
-        return jsonify(result)
+    if 'success' not in result:
+        result['success'] = True
 
-    except Exception as e:
-        print(f"Error in moduleB: {str(e)}")
-        return jsonify({'error': str(e), 'success': False}), 500
+    return result
 
 
-@app.route('/api/moduleC', methods=['POST'])
-@login_required
-def api_moduleC():
-    """Process audio for Module C - Topic Speaking"""
+def score_moduleC(audio, topic_id, user_id, session_id):
+    """Score a Module C recording, save performance and return the API response"""
     try:
-        if 'audio' not in request.files:
-            return jsonify({'error': 'No audio file provided', 'success': False}), 400
+        result = run_moduleC(audio, topic_id)
+    finally:
+        with metrics.stage('moduleC', 'cleanup'):
+            audio.close()
+    return finish_moduleC(result, topic_id, user_id, session_id)
 
-        file = request.files['audio']
-        topic_id = request.form.get('topic_id', type=int)
 
-        if file.filename == '':
-            return jsonify({'error': 'No file selected', 'success': False}), 400
+def stream_moduleC(audio, topic_id, user_id, session_id):
+    """Score a Module C recording, yielding NDJSON lines as stages finish
 
-        if topic_id is None:
-            return jsonify({'error': 'Topic ID is required', 'success': False}), 400
+    The transcript line is sent as soon as ASR is done, so the page can
+    show it while the evaluation is still running; the final line is the
+    same response score_moduleC returns. Each line carries a ``stage``
+    field ('transcript' or 'result'). If a backend is overloaded once the
+    response has started, the result line is an unsaved error with a
+    ``retry_after`` field instead.
+    """
+    try:
+        for stage, payload in run_moduleC_stages(audio, topic_id):
+            if stage == 'result':
+                with metrics.stage('moduleC', 'cleanup'):
+                    audio.close()
+                payload = finish_moduleC(payload, topic_id, user_id, session_id)
+            else:
+                payload['topic_id'] = topic_id
+            yield json.dumps(dict(payload, stage=stage)) + '\n'
+    except admission.Overloaded as e:
+        yield json.dumps({'stage': 'result', 'success': False, 'error': str(e),
+                          'retry_after': e.retry_after, 'topic_id': topic_id}) + '\n'
+    finally:
+        audio.close()
 
-        filename = secure_filename(f"moduleC_{os.urandom(8).hex()}.wav")
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
 
-        result = run_moduleC(filepath)
-        result['topic_id'] = topic_id
+def finish_moduleC(result, topic_id, user_id, session_id):
+    """Save a Module C result and complete the API response"""
+    result['topic_id'] = topic_id
 
-        # Save performance
+    # Save performance
+    with metrics.stage('moduleC', 'save_performance'):
         save_performance(
-            user_id=session['user_id'],
-            session_id=session.get('current_session_id'),
+            user_id=user_id,
+            session_id=session_id,
             module='Module C - Topic Speaking',
             question_number=topic_id,
             score=result.get('score', 0),
             max_score=100
         )
 
-        # Clean up the file
-        if os.path.exists(filepath):
-            os.remove(filepath)
+    if 'success' not in result:
+        result['success'] = True
 
-        if 'success' not in result:
-            result['success'] = True
+    return result
 
-        return jsonify(result)
 
+@app.route('/api/moduleA', methods=['POST'])
+@login_required
+def api_moduleA():
+    """Process audio for Module A - Read & Speak
+
+    Pass ``mode=async`` (query or form) to get a job id back immediately
+    and fetch the result from ``/api/jobs/<job_id>``. The upload is read
+    as a stream: send ``sentence_id`` before ``audio`` so a bad id is
+    refused before the recording is transferred.
+    """
+    try:
+        # Shed load before reading the upload if ASR is already saturated
+        admission.check('asr')
+        try:
+            sentence_id, fields, audio = _receive_recording('moduleA', 'sentence_id', moduleA_sentences, 'Sentence')
+        except UploadRejected as e:
+            return upload_rejected_response('moduleA', e)
+        args = (sentence_id, session['user_id'], session.get('current_session_id'))
+
+        if _wants_async(fields):
+            return _submit_scoring_job('moduleA', score_moduleA, audio, *args)
+
+        return jsonify(score_moduleA(audio, *args))
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        print(f"Error in moduleA: {str(e)}")
+        return jsonify({'error': str(e), 'success': False}), 500
+
+
+@app.route('/api/moduleB', methods=['POST'])
+@login_required
+def api_moduleB():
+    """Process audio for Module B - Listen & Repeat (supports ``mode=async``, streamed like Module A)"""
+    try:
+        admission.check('asr')
+        try:
+            sentence_id, fields, audio = _receive_recording('moduleB', 'sentence_id', moduleB_sentences, 'Sentence')
+        except UploadRejected as e:
+            return upload_rejected_response('moduleB', e)
+        args = (sentence_id, session['user_id'], session.get('current_session_id'))
+
+        if _wants_async(fields):
+            return _submit_scoring_job('moduleB', score_moduleB, audio, *args)
+
+        return jsonify(score_moduleB(audio, *args))
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        print(f"Error in moduleB: {str(e)}")
+        return jsonify({'error': str(e), 'success': False}), 500
+
+
+@app.route('/api/moduleC', methods=['POST'])
+@login_required
+def api_moduleC():
+    """Process audio for Module C - Topic Speaking
+
+    Supports ``mode=async`` like Module A and ``mode=stream``, which
+    returns newline-delimited JSON: the transcript as soon as it is ready,
+    then the full result once the evaluation finishes. The upload is
+    streamed like Module A's (send ``topic_id`` before ``audio``).
+    """
+    try:
+        admission.check('asr', 'llm')
+        try:
+            topic_id, fields, audio = _receive_recording('moduleC', 'topic_id', topics, 'Topic')
+        except UploadRejected as e:
+            return upload_rejected_response('moduleC', e)
+        args = (topic_id, session['user_id'], session.get('current_session_id'))
+
+        mode = _scoring_mode(fields)
+        if mode == 'async':
+            return _submit_scoring_job('moduleC', score_moduleC, audio, *args)
+        if mode == 'stream':
+            return Response(stream_moduleC(audio, *args), mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        return jsonify(score_moduleC(audio, *args))
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         print(f"Error in moduleC: {str(e)}")
         return jsonify({'error': str(e), 'success': False}), 500
 
 
+# ===== API ENDPOINTS - BATCH SCORING =====
+
+BATCH_MODULES = {
+    'moduleA': ('Module A - Read & Speak', moduleA_sentences),
+    'moduleB': ('Module B - Listen & Repeat', moduleB_sentences),
+}
+
+
+def score_batch_item(module, audio, sentence_id):
+    """Score one recording of a batch without saving it; never raises"""
+    try:
+        if module == 'moduleA':
+            result = run_moduleA(audio, sentence_id)
+            response = moduleA_response(result, sentence_id)
+            response['success'] = 'error' not in result
+            if 'error' in result:
+                response['error'] = result['error']
+            return response
+        result = run_moduleB(audio, sentence_id)
+        result.setdefault('success', 'error' not in result)
+        return result
+    except admission.Overloaded as e:
+        return {'error': str(e), 'success': False, 'sentence_id': sentence_id, 'retry_after': e.retry_after}
+    except Exception as e:
+        print(f"Error scoring batch item: {str(e)}")
+        return {'error': str(e), 'success': False, 'sentence_id': sentence_id}
+    finally:
+        with metrics.stage(module, 'cleanup'):
+            audio.close()
+
+
+@app.route('/api/<module>/batch', methods=['POST'])
+@login_required
+def api_score_batch(module):
+    """Score several Module A or B recordings in one request
+
+    Send ``sentence_id`` and ``audio`` fields repeated once per recording,
+    paired by order. Recordings are transcribed concurrently (at most
+    BATCH_CONCURRENCY at a time) and the performance rows of all scored
+    items are written together. Each item gets its own result, so one bad
+    recording does not fail the rest of the set.
+    """
+    if module not in BATCH_MODULES:
+        return jsonify({'error': 'Batch scoring is only available for moduleA and moduleB',
+                        'success': False}), 404
+    module_name, module_sentences = BATCH_MODULES[module]
+
+    try:
+        admission.check('asr')
+        files = request.files.getlist('audio')
+        raw_ids = request.form.getlist('sentence_id')
+
+        if not files:
+            return jsonify({'error': 'No audio files provided', 'success': False}), 400
+        if len(files) != len(raw_ids):
+            return jsonify({'error': 'Send one sentence_id per audio file', 'success': False}), 400
+        if len(files) > app.config['BATCH_MAX_ITEMS']:
+            return jsonify({'error': f"At most {app.config['BATCH_MAX_ITEMS']} recordings per batch",
+                            'success': False}), 400
+
+        user_id, session_id = session['user_id'], session.get('current_session_id')
+        results = [None] * len(files)
+        pending = []
+        for index, (file, raw_id) in enumerate(zip(files, raw_ids)):
+            try:
+                sentence_id = int(raw_id)
+            except ValueError:
+                sentence_id = None
+            if sentence_id is None or not 0 <= sentence_id < len(module_sentences):
+                results[index] = {'error': 'Invalid sentence_id', 'success': False, 'sentence_id': raw_id}
+            elif file.filename == '':
+                results[index] = {'error': 'No file selected', 'success': False, 'sentence_id': sentence_id}
+            else:
+                try:
+                    pending.append((index, sentence_id, _read_upload(file, module)))
+                except Exception as e:
+                    results[index] = {'error': str(e), 'success': False, 'sentence_id': sentence_id}
+
+        if pending:
+            workers = min(app.config['BATCH_CONCURRENCY'], len(pending))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+                futures = [(index, sentence_id, executor.submit(score_batch_item, module, audio, sentence_id))
+                           for index, sentence_id, audio in pending]
+                for index, sentence_id, future in futures:
+                    results[index] = future.result()
+
+        # Failed items are reported but not recorded as attempts
+        rows = [(user_id, session_id, module_name, item['sentence_id'], item.get('score', 0), 100)
+                for item in results if item.get('success')]
+        if rows:
+            with metrics.stage(module, 'save_performance'):
+                save_performance_many(rows)
+
+        for index, item in enumerate(results):
+            item['index'] = index
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'failed': sum(1 for item in results if not item.get('success')),
+            'results': results
+        })
+
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        print(f"Error in {module}/batch: {str(e)}")
+        return jsonify({'error': str(e), 'success': False}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus scrape endpoint, merged across all gunicorn workers"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/stats/cache', methods=['GET'])
+@login_required
+def api_cache_stats():
+    """Hit/miss counters for the ASR and evaluation caches in this worker"""
+    return jsonify({
+        'success': True,
+        'transcription': transcription_cache.stats(),
+        'evaluation': evaluation_cache.stats()
+    })
+
+
+# ===== API ENDPOINTS - SCORING JOBS =====
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@login_required
+def api_get_job(job_id):
+    """Poll the status of an async scoring job"""
+    job = scoring_jobs.get(job_id, user_id=session['user_id'])
+    if job is None:
+        return jsonify({'error': 'Job not found', 'success': False}), 404
+    job['success'] = True
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+@login_required
+def api_job_events(job_id):
+    """Stream status changes of an async scoring job as Server-Sent Events
+
+    The stream always ends with a terminal event: ``done``, ``failed``, or
+    ``timeout`` (with the job as last seen) once JOB_EVENTS_TIMEOUT passes,
+    after which the client should poll /api/jobs/<job_id>. Only
+    JOB_EVENTS_MAX_STREAMS streams are open per worker; beyond that the
+    request gets a 503 with Retry-After.
+    """
+    user_id = session['user_id']
+    if scoring_jobs.get(job_id, user_id=user_id) is None:
+        return jsonify({'error': 'Job not found', 'success': False}), 404
+    if not job_event_streams.try_acquire():
+        metrics.inc('admission_rejections_total', {'backend': 'events', 'reason': 'full'})
+        return overloaded_response(admission.Overloaded(
+            f"Too many open event streams, poll /api/jobs/{job_id} instead", 'events'))
+
+    def generate():
+        job, last_status = None, None
+        deadline = time.time() + app.config['JOB_EVENTS_TIMEOUT']
+        while time.time() < deadline:
+            job = scoring_jobs.get(job_id, user_id=user_id)
+            if job is None:
+                break
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield f"event: {last_status}\ndata: {json.dumps(job)}\n\n"
+            if last_status in ('done', 'failed'):
+                return
+            time.sleep(app.config['JOB_EVENTS_POLL_INTERVAL'])
+        yield f"event: timeout\ndata: {json.dumps(job or {})}\n\n"
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(job_event_streams.release)
+    return response
+
+
 @app.route('/api/moduleD/submit', methods=['POST'])
 @login_required
 def api_submit_quiz():
@@ -544,19 +1230,17 @@ def api_submit_quiz():
         if not data or 'answers' not in data:
             return jsonify({'error': 'Invalid request data', 'success': False}), 400
 
-        result = submit_answers(data['answers'])
+        result = submit_answers(data['answers'], data.get('quiz_token'), app.config['SECRET_KEY'],
+                                user_id=session['user_id'])
 
-        # Save performance for each question
+        # Save performance for all questions in one batch
         if result.get('review'):
-            for item in result['review']:
-                save_performance(
-                    user_id=session['user_id'],
-                    session_id=session.get('current_session_id'),
-                    module='Module D - Grammar Quiz',
-                    question_number=item.get('question_number', 0),
-                    score=100 if item.get('correct') else 0,
-                    max_score=100
-                )
+            save_performance_many(
+                (session['user_id'], session.get('current_session_id'), 'Module D - Grammar Quiz',
+                 item.get('question_number', 0), 100 if item.get('correct') else 0, 100)
+                for item in result['review']
+            )
+            record_quiz_categories(session['user_id'], result['review'])
 
         if 'success' not in result:
             result['success'] = True
@@ -570,5 +1254,62 @@ def api_submit_quiz():
 
 # ===== APPLICATION INITIALIZATION =====
 
+def warm_up():
+    """Import heavy read-only dependencies ahead of the first request
+
+    gunicorn.conf.py calls this in the master when preloading, so every
+    worker inherits the loaded modules copy-on-write instead of paying for
+    them on its first request. Network clients are deliberately not
+    created here; backends build them lazily inside each worker.
+
+    TTS rendering is not done here: a slow or unreachable TTS service
+    would hold up the master before any worker is forked. With
+    TTS_WARM_ON_START each worker renders missing audio on a background
+    thread after the fork instead (see start_background_warm).
+    """
+    import numpy  # noqa: F401
+    import soundfile  # noqa: F401
+    import librosa.core.audio  # noqa: F401
+    import gtts  # noqa: F401
+    if os.getenv('ASR_BACKEND', 'groq') == 'groq':
+        import groq  # noqa: F401
+    if os.getenv('LLM_BACKEND', 'gemini') == 'gemini':
+        from google import genai  # noqa: F401
+
+
+def start_background_warm():
+    """Render missing Module B audio on a background thread if TTS_WARM_ON_START is set
+
+    Called once per worker process, after the fork.
+    """
+    if app.config['TTS_WARM_ON_START']:
+        warm_sentence_audio(workers=app.config['TTS_WARM_WORKERS'], background=True)
+
+
+@app.cli.command('tts-warm')
+@click.option('--workers', default=4, show_default=True, help='Parallel renders')
+def tts_warm_command(workers):
+    """Pre-render the Module B sentence audio"""
+    counts = warm_sentence_audio(workers=workers)
+    print(f"TTS warm-up: {counts['rendered']} rendered, {counts['cached']} already cached, "
+          f"{counts['failed']} failed")
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress static files for production serving"""
+    manifest = build_assets('static')
+    asset_manifest.reload()
+    print(f"Built {len(manifest)} assets into {asset_manifest.build_dir}")
+
+
+@app.cli.command('backfill-summary')
+def backfill_summary_command():
+    """Rebuild the per-session report rollup from existing performance rows"""
+    count = backfill_performance_summary()
+    print(f"Backfilled {count} performance summary rows")
+
+
 if __name__ == '__main__':
+    start_background_warm()
     app.run(debug=True, host='0.0.0.0', port=5000)
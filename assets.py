@@ -0,0 +1,154 @@
+"""Fingerprinted, precompressed static assets
+
+``build_assets`` copies every file under static/ to the build directory
+as ``name.<hash>.ext``, rewrites ``url()`` references in CSS (relative
+ones and absolute ``/static/...`` ones) to the fingerprinted names, writes ``.gz`` (and ``.br`` when the optional
+brotli package is installed) next to compressible files, and records the
+mapping in ``manifest.json``. Because a fingerprinted name changes
+whenever the content does, those files can be cached by browsers
+forever. URLs built in JavaScript and ``@import "file.css"`` without
+``url()`` are not rewritten; reference assets through ``asset_url`` or
+``url()`` instead.
+
+    flask build-assets        (run on deploy, after changing static files)
+"""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always produced
+    brotli = None
+
+ASSET_BUILD_DIR = os.getenv("ASSET_BUILD_DIR", "static_build")
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+HASH_LENGTH = 12
+
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def _fingerprint(name, data):
+    root, ext = posixpath.splitext(name)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+
+def _rewrite_css(name, data, manifest, url_prefix):
+    """Point url() references at fingerprinted files"""
+    css_dir = posixpath.dirname(name)
+
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(url_prefix + '/'):
+            target = url[len(url_prefix) + 1:]
+            if target in manifest:
+                return f"url({quote}{url_prefix}/{manifest[target]}{quote})"
+        elif '://' not in url and not url.startswith(('data:', '/', '#')):
+            target = posixpath.normpath(posixpath.join(css_dir, url))
+            if target in manifest:
+                return f"url({quote}{posixpath.relpath(manifest[target], css_dir or '.')}{quote})"
+        return match.group(0)
+
+    return _CSS_URL_RE.sub(replace, data.decode('utf-8')).encode('utf-8')
+
+
+def _write_compressed(path, data):
+    """Write .gz/.br siblings when they are smaller than the original"""
+    written = []
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gz)
+        written.append('gzip')
+    if brotli is not None:
+        br = brotli.compress(data, quality=11)
+        if len(br) < len(data):
+            with open(path + '.br', 'wb') as f:
+                f.write(br)
+            written.append('br')
+    return written
+
+
+def build_assets(source_dir='static', build_dir=ASSET_BUILD_DIR, url_prefix='/static'):
+    """Fingerprint and precompress every file in source_dir
+
+    Args:
+        source_dir: Directory with the original assets
+        build_dir: Output directory (recreated on every build)
+        url_prefix: URL the assets are served under (used to rewrite CSS)
+
+    Returns:
+        The manifest: original relative path -> fingerprinted relative path
+    """
+    names = []
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if not filename.startswith('.'):
+                names.append(os.path.relpath(os.path.join(dirpath, filename), source_dir).replace(os.sep, '/'))
+
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+
+    # CSS last, so the files it references already have fingerprinted names
+    manifest = {}
+    for name in sorted(names, key=lambda n: (n.endswith('.css'), n)):
+        with open(os.path.join(source_dir, name), 'rb') as f:
+            data = f.read()
+        if name.endswith('.css'):
+            data = _rewrite_css(name, data, manifest, url_prefix)
+        hashed = _fingerprint(name, data)
+        out_path = os.path.join(build_dir, hashed)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'wb') as f:
+            f.write(data)
+        if posixpath.splitext(name)[1].lower() in COMPRESSIBLE:
+            _write_compressed(out_path, data)
+        manifest[name] = hashed
+
+    with open(os.path.join(build_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Lookup of fingerprinted asset names from the last build
+
+    Without a build (e.g. in development) every name maps to itself and
+    assets are served straight from static/.
+    """
+
+    def __init__(self, build_dir=ASSET_BUILD_DIR):
+        self.build_dir = build_dir
+        self.reload()
+
+    def reload(self):
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST_NAME)) as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            self.files = {}
+        self.fingerprinted = set(self.files.values())
+        self._variants = {}
+
+    def resolve(self, name):
+        """Fingerprinted name of an asset, or the name itself if it was not built"""
+        return self.files.get(name, name)
+
+    def is_fingerprinted(self, name):
+        return name in self.fingerprinted
+
+    def variants(self, name):
+        """Available encodings of a built asset, best first, with their paths"""
+        found = self._variants.get(name)
+        if found is None:
+            path = os.path.join(self.build_dir, name)
+            found = [(encoding, path + suffix) for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+                     if os.path.exists(path + suffix)]
+            found = self._variants[name] = found + [(None, path)]
+        return found
@@ -0,0 +1,155 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Uploads up to this size stay in memory; larger ones roll over to an
+# anonymous temp file that the OS removes as soon as it is closed.
+DEFAULT_SPOOL_THRESHOLD = 2 * 1024 * 1024
+
+SPOOL_PREFIX = 'spool_'
+
+
+class AudioBuffer:
+    """A recording held in memory (or a spooled temp file) for one request
+
+    The same buffer is handed to the transcription call and the duration
+    analysis, so the upload is never written to and re-read from disk on
+    the normal path. Use it as a context manager, or call ``close()``.
+
+    Args:
+        fileobj: Seekable binary file object holding the audio
+        filename: Name reported to the ASR backend (its extension is a format hint)
+        spool_dir: Directory for temp files created by ``as_path()``
+    """
+
+    def __init__(self, fileobj, filename='recording.wav', spool_dir=None):
+        self.fileobj = fileobj
+        self.filename = filename
+        self.spool_dir = spool_dir
+        self._path = None
+
+    @classmethod
+    def from_upload(cls, file, spool_threshold=DEFAULT_SPOOL_THRESHOLD, spool_dir=None):
+        """Copy a werkzeug FileStorage into a new buffer"""
+        buf = tempfile.SpooledTemporaryFile(max_size=spool_threshold, dir=spool_dir, prefix=SPOOL_PREFIX)
+        shutil.copyfileobj(file.stream, buf, 64 * 1024)
+        buf.seek(0)
+        return cls(buf, os.path.basename(file.filename or '') or 'recording.wav', spool_dir)
+
+    @classmethod
+    def from_path(cls, path):
+        """Wrap an audio file that already exists on disk"""
+        buffer = cls(open(path, 'rb'), os.path.basename(path), os.path.dirname(path))
+        buffer._path = path
+        return buffer
+
+    @property
+    def size(self):
+        self.fileobj.seek(0, os.SEEK_END)
+        size = self.fileobj.tell()
+        self.fileobj.seek(0)
+        return size
+
+    def stream(self):
+        """Return the underlying file object rewound to the start"""
+        self.fileobj.seek(0)
+        return self.fileobj
+
+    def read(self):
+        """Return the whole recording as bytes"""
+        return self.stream().read()
+
+    def as_upload(self):
+        """(filename, file) tuple accepted by the Groq/OpenAI transcription APIs"""
+        return (self.filename, self.stream())
+
+    @contextmanager
+    def as_path(self):
+        """Yield a filesystem path for tools that cannot read file objects
+
+        Buffers created with ``from_path`` yield their own path. Otherwise
+        the audio is written to a temp file in ``spool_dir`` that is removed
+        when the block exits.
+        """
+        if self._path is not None:
+            yield self._path
+            return
+
+        suffix = os.path.splitext(self.filename)[1]
+        fd, path = tempfile.mkstemp(prefix=SPOOL_PREFIX, suffix=suffix, dir=self.spool_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                shutil.copyfileobj(self.stream(), out, 64 * 1024)
+            yield path
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        self.fileobj.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@contextmanager
+def open_audio(audio):
+    """Yield an AudioBuffer for either a path or an existing buffer
+
+    Buffers passed in are left open for the caller to close; paths are
+    opened and closed here.
+    """
+    if isinstance(audio, AudioBuffer):
+        yield audio
+        return
+
+    with AudioBuffer.from_path(audio) as buffer:
+        yield buffer
+
+
+def clean_spool_dir(spool_dir, max_age_seconds=3600):
+    """Remove leftover spool files older than max_age_seconds
+
+    Only files this module created (named with SPOOL_PREFIX) are touched,
+    so pointing the spool at a shared directory cannot delete other files.
+
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    try:
+        entries = list(os.scandir(spool_dir))
+    except FileNotFoundError:
+        return 0
+
+    for entry in entries:
+        try:
+            if (entry.name.startswith(SPOOL_PREFIX) and entry.is_file()
+                    and entry.stat().st_mtime < cutoff):
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            # Already removed by its owner or another worker
+            continue
+    return removed
+
+
+def start_spool_janitor(spool_dir, max_age_seconds=3600, interval_seconds=600):
+    """Clean the spool directory now and then every interval_seconds in a daemon thread"""
+    def loop():
+        while True:
+            removed = clean_spool_dir(spool_dir, max_age_seconds)
+            if removed:
+                print(f"Removed {removed} stale audio files from {spool_dir}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=loop, name='spool-janitor', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,72 @@
+import io
+import os
+
+# off | flac | opus. FLAC is lossless; Opus is much smaller and still
+# transparent for speech recognition at 16 kHz mono.
+ASR_PREPROCESS = os.getenv("ASR_PREPROCESS", "off").lower()
+ASR_SAMPLE_RATE = int(os.getenv("ASR_SAMPLE_RATE", 16000))
+
+_FORMATS = {
+    'flac': ('FLAC', 'PCM_16', 'recording.flac'),
+    'opus': ('OGG', 'OPUS', 'recording.ogg'),
+}
+
+
+def _decode(audio):
+    """Decode to a mono float32 array, returns (samples, sample_rate)"""
+    import numpy as np
+    import soundfile as sf
+    try:
+        samples, sample_rate = sf.read(audio.stream(), dtype='float32', always_2d=True)
+        return samples.mean(axis=1), sample_rate
+    except Exception:
+        # WebM and other containers libsndfile cannot read go through ffmpeg
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(audio.stream()).set_channels(1)
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        return samples / float(1 << (8 * segment.sample_width - 1)), segment.frame_rate
+
+
+def normalize_audio(audio, codec='flac', sample_rate=ASR_SAMPLE_RATE):
+    """Downmix to mono, resample and re-encode a recording
+
+    Args:
+        audio: AudioBuffer holding the original upload
+        codec: 'flac' or 'opus'
+        sample_rate: Target sample rate in Hz
+
+    Returns:
+        Tuple of (encoded bytes, filename with the matching extension)
+    """
+    import soundfile as sf
+    fmt, subtype, filename = _FORMATS[codec]
+    samples, source_rate = _decode(audio)
+    if source_rate != sample_rate:
+        import librosa
+        samples = librosa.resample(samples, orig_sr=source_rate, target_sr=sample_rate, res_type='soxr_hq')
+
+    out = io.BytesIO()
+    sf.write(out, samples, sample_rate, format=fmt, subtype=subtype)
+    return out.getvalue(), filename
+
+
+def asr_upload(audio):
+    """(filename, file) tuple to send to the ASR backend
+
+    When ASR_PREPROCESS is enabled the recording is normalized first. The
+    original is sent instead if normalization fails or would not shrink it.
+    """
+    if ASR_PREPROCESS not in _FORMATS:
+        return audio.as_upload()
+
+    bytes_before = audio.size
+    try:
+        data, filename = normalize_audio(audio, ASR_PREPROCESS)
+    except Exception as e:
+        print(f"ASR preprocessing failed, sending original audio: {str(e)}")
+        return audio.as_upload()
+
+    print(f"ASR preprocessing ({ASR_PREPROCESS}): {bytes_before} -> {len(data)} bytes")
+    if len(data) >= bytes_before:
+        return audio.as_upload()
+    return (filename, io.BytesIO(data))
@@ -0,0 +1,284 @@
+"""Lightweight audio container probe
+
+Reads duration, sample rate and channel count straight from WAV, FLAC,
+WebM/Matroska and Ogg (Opus/Vorbis) headers without decoding any audio.
+The browser recorder sends WebM or Ogg blobs named ``recording.wav``, so
+the container is detected from its magic bytes, never from the filename.
+"""
+import os
+import struct
+
+# Matroska element ids
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+CODEC_ID = 0x86
+AUDIO = 0xE1
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+SIMPLE_BLOCK = 0xA3
+
+# Master elements whose children we walk; everything else is skipped by size.
+# Walking rather than recursing copes with the unknown-size Segment and
+# Cluster elements that MediaRecorder writes while streaming.
+_EBML_CONTAINERS = {SEGMENT, INFO, TRACKS, TRACK_ENTRY, AUDIO, CLUSTER, BLOCK_GROUP}
+
+OGG_TAIL_WINDOW = 64 * 1024
+
+
+def probe(fileobj):
+    """Inspect an audio file object without decoding it
+
+    Args:
+        fileobj: Seekable binary file object (left rewound to the start)
+
+    Returns:
+        Dict with ``container``, ``codec``, ``duration`` (seconds),
+        ``sample_rate`` and ``channels``. Unknown values are None, e.g.
+        ``duration`` when the container does not record it.
+        ``declared_duration`` is the length written in the header (WAV,
+        FLAC, WebM when present); for a partly received file it can be
+        longer than ``duration``, which only counts the audio present.
+    """
+    info = {'container': None, 'codec': None, 'duration': None, 'declared_duration': None,
+            'sample_rate': None, 'channels': None}
+    try:
+        fileobj.seek(0)
+        magic = fileobj.read(12)
+        if magic[:4] == b'RIFF' and magic[8:12] == b'WAVE':
+            info['container'] = 'wav'
+            _probe_wav(fileobj, info)
+        elif magic[:4] == b'\x1a\x45\xdf\xa3':
+            info['container'] = 'webm'
+            _probe_matroska(fileobj, info)
+        elif magic[:4] == b'OggS':
+            info['container'] = 'ogg'
+            _probe_ogg(fileobj, info)
+        elif magic[:4] == b'fLaC':
+            info['container'] = 'flac'
+            _probe_flac(fileobj, info)
+    except (struct.error, ValueError, IndexError, EOFError, OSError):
+        # Truncated or malformed header: report what we have so far
+        pass
+    finally:
+        fileobj.seek(0)
+    return info
+
+
+def probe_duration(fileobj):
+    """Return the duration in seconds from the container header, or None"""
+    duration = probe(fileobj)['duration']
+    if duration is None or duration <= 0:
+        return None
+    return duration
+
+
+def _file_size(fileobj):
+    position = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(position)
+    return size
+
+
+# ===== WAV =====
+
+def _probe_wav(fileobj, info):
+    size = _file_size(fileobj)
+    fileobj.seek(12)
+    byte_rate = None
+    info['codec'] = 'pcm'
+
+    while True:
+        header = fileobj.read(8)
+        if len(header) < 8:
+            return
+        chunk_id, chunk_size = struct.unpack('<4sI', header)
+        start = fileobj.tell()
+
+        if chunk_id == b'fmt ':
+            fmt = fileobj.read(16)
+            audio_format, channels, sample_rate, byte_rate = struct.unpack('<HHII', fmt[:12])
+            info['channels'] = channels
+            info['sample_rate'] = sample_rate
+            if audio_format not in (1, 0xFFFE):
+                info['codec'] = f'wav_format_{audio_format}'
+        elif chunk_id == b'data':
+            # Streaming writers leave the size as 0 or 0xFFFFFFFF
+            if chunk_size in (0, 0xFFFFFFFF):
+                chunk_size = size - start
+            elif byte_rate:
+                info['declared_duration'] = chunk_size / byte_rate
+            if start + chunk_size > size:
+                chunk_size = size - start
+            if byte_rate:
+                info['duration'] = chunk_size / byte_rate
+            return
+
+        fileobj.seek(start + chunk_size + (chunk_size & 1))
+
+
+# ===== FLAC =====
+
+def _probe_flac(fileobj, info):
+    # STREAMINFO is always the first metadata block, right after the magic
+    fileobj.seek(8)
+    streaminfo = fileobj.read(18)
+    packed = int.from_bytes(streaminfo[10:18], 'big')
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    info['codec'] = 'flac'
+    info['sample_rate'] = sample_rate
+    info['channels'] = ((packed >> 41) & 0x7) + 1
+    if sample_rate and total_samples:
+        info['duration'] = info['declared_duration'] = total_samples / sample_rate
+
+
+# ===== WebM / Matroska =====
+
+def _read_vint(fileobj, keep_marker):
+    first = fileobj.read(1)
+    if not first:
+        raise EOFError
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+
+    value = first if keep_marker else first & (mask - 1)
+    rest = fileobj.read(length - 1)
+    if len(rest) < length - 1:
+        raise EOFError
+    all_ones = value == mask - 1
+    for byte in rest:
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    if not keep_marker and all_ones:
+        return None  # unknown size
+    return value
+
+
+def _read_uint(fileobj, size):
+    return int.from_bytes(fileobj.read(size), 'big')
+
+
+def _read_float(fileobj, size):
+    data = fileobj.read(size)
+    if size == 4:
+        return struct.unpack('>f', data)[0]
+    if size == 8:
+        return struct.unpack('>d', data)[0]
+    return None
+
+
+def _probe_matroska(fileobj, info):
+    fileobj.seek(0)
+    timecode_scale = 1000000  # nanoseconds per timecode tick
+    header_duration = None
+    cluster_timecode = 0
+    last_timecode = None
+
+    while True:
+        try:
+            element_id = _read_vint(fileobj, keep_marker=True)
+            size = _read_vint(fileobj, keep_marker=False)
+        except EOFError:
+            break
+        start = fileobj.tell()
+
+        if element_id in _EBML_CONTAINERS:
+            continue  # descend into the children
+        if size is None:
+            break  # unknown-size leaf: cannot skip it
+
+        if element_id == TIMECODE_SCALE:
+            timecode_scale = _read_uint(fileobj, size)
+        elif element_id == DURATION:
+            header_duration = _read_float(fileobj, size)
+        elif element_id == CODEC_ID:
+            info['codec'] = fileobj.read(size).decode('ascii', 'replace').strip('\x00')
+        elif element_id == SAMPLING_FREQUENCY:
+            info['sample_rate'] = int(_read_float(fileobj, size) or 0) or None
+        elif element_id == CHANNELS:
+            info['channels'] = _read_uint(fileobj, size)
+        elif element_id == CLUSTER_TIMECODE:
+            cluster_timecode = _read_uint(fileobj, size)
+        elif element_id in (SIMPLE_BLOCK, BLOCK):
+            _read_vint(fileobj, keep_marker=False)  # track number
+            relative = struct.unpack('>h', fileobj.read(2))[0]
+            timecode = cluster_timecode + relative
+            if last_timecode is None or timecode > last_timecode:
+                last_timecode = timecode
+
+        fileobj.seek(start + size)
+
+    if header_duration:
+        info['duration'] = info['declared_duration'] = header_duration * timecode_scale / 1e9
+    elif last_timecode is not None:
+        # MediaRecorder omits Duration; the last block start is within one
+        # frame (~20 ms for Opus) of the true length
+        info['duration'] = last_timecode * timecode_scale / 1e9
+
+
+# ===== Ogg =====
+
+def _probe_ogg(fileobj, info):
+    fileobj.seek(0)
+    header = fileobj.read(27)
+    segment_count = header[26]
+    segments = fileobj.read(segment_count)
+    packet = fileobj.read(sum(segments))
+
+    granule_rate = None
+    pre_skip = 0
+    if packet.startswith(b'OpusHead'):
+        info['codec'] = 'opus'
+        info['channels'] = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        info['sample_rate'] = struct.unpack('<I', packet[12:16])[0] or 48000
+        granule_rate = 48000  # Opus granule positions always count 48 kHz samples
+    elif packet.startswith(b'\x01vorbis'):
+        info['codec'] = 'vorbis'
+        info['channels'] = packet[11]
+        info['sample_rate'] = struct.unpack('<I', packet[12:16])[0]
+        granule_rate = info['sample_rate']
+
+    if not granule_rate:
+        return
+
+    granule = _last_ogg_granule(fileobj)
+    if granule is not None:
+        info['duration'] = max(0, granule - pre_skip) / granule_rate
+
+
+def _last_ogg_granule(fileobj):
+    """Granule position of the last page that has one, scanning backwards"""
+    end = _file_size(fileobj)
+    while end > 0:
+        start = max(0, end - OGG_TAIL_WINDOW)
+        fileobj.seek(start)
+        window = fileobj.read(end - start + 27)
+        index = window.rfind(b'OggS', 0, end - start)
+        while index != -1:
+            page = window[index:index + 14]
+            if len(page) == 14:
+                granule = struct.unpack('<q', page[6:14])[0]
+                if granule != -1:
+                    return granule
+            index = window.rfind(b'OggS', 0, index)
+        if start == 0:
+            break
+        end = start
+    return None
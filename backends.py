@@ -0,0 +1,278 @@
+"""Transcription (ASR) and evaluation (LLM) backends
+
+The backend is chosen by configuration:
+
+    ASR_BACKEND=groq|fake     (default groq)
+    LLM_BACKEND=gemini|fake   (default gemini)
+
+The fake backends need no network. They return deterministic output
+derived from the request, with configurable latency and failure rates, so
+the rest of the pipeline can be load-tested and profiled offline:
+
+    FAKE_ASR_LATENCY=lognormal:800:0.4   fixed:<ms> | uniform:<lo_ms>:<hi_ms> | lognormal:<median_ms>:<sigma>
+    FAKE_ASR_FAILURE_RATE=0.01
+    FAKE_ASR_WORD_ERROR_RATE=0.1         fraction of words dropped or replaced
+    FAKE_LLM_LATENCY=lognormal:1500:0.5
+    FAKE_LLM_FAILURE_RATE=0.01
+
+GROQ_BASE_URL points the Groq client at another OpenAI-compatible server,
+such as benchmarks/fake_asr_server.py.
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class BackendError(Exception):
+    """Raised when a transcription or evaluation backend call fails"""
+
+
+class BackendTimeout(BackendError):
+    """Raised when a backend call runs past its timeout"""
+
+
+class Transcriber:
+    """Speech-to-text backend interface"""
+
+    name = 'base'
+
+    def transcribe(self, upload, model, hint=None, timeout=None):
+        """Transcribe a recording
+
+        Args:
+            upload: (filename, file object) tuple
+            model: ASR model name
+            hint: Text the speaker was expected to say, if known (only
+                used by the fake backend to produce realistic output)
+            timeout: Seconds allowed for this call (None = backend default)
+
+        Returns:
+            Transcribed text
+        """
+        raise NotImplementedError
+
+    def is_retryable(self, error):
+        """True if a failed call may succeed when repeated (timeouts, throttling, server errors)"""
+        return isinstance(error, BackendError)
+
+
+class Evaluator:
+    """LLM text-generation backend interface"""
+
+    name = 'base'
+
+    def generate(self, prompt, model):
+        """Return the model's raw text response to prompt"""
+        raise NotImplementedError
+
+
+# ===== LIVE BACKENDS =====
+
+class GroqTranscriber(Transcriber):
+    """Groq Whisper; the client is created lazily, once per process"""
+
+    name = 'groq'
+
+    def __init__(self):
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    from groq import Groq
+                    # Retries are handled by resilience.py, with jitter and a deadline
+                    self._client = Groq(api_key=os.getenv("GROQ_API_KEY"),
+                                        base_url=os.getenv("GROQ_BASE_URL") or None,
+                                        max_retries=0)
+                    self._pid = os.getpid()
+        return self._client
+
+    def transcribe(self, upload, model, hint=None, timeout=None):
+        options = {'timeout': timeout} if timeout is not None else {}
+        response = self.client.audio.transcriptions.create(
+            file=upload,
+            model=model,
+            response_format="text",
+            **options
+        )
+        return response or ""
+
+    def is_retryable(self, error):
+        import groq
+        if isinstance(error, (BackendError, groq.APITimeoutError, groq.APIConnectionError)):
+            return True
+        if isinstance(error, groq.APIStatusError):
+            return error.status_code in (408, 409, 429) or error.status_code >= 500
+        return False
+
+
+class GeminiEvaluator(Evaluator):
+    """Google Gemini; the client is created lazily, once per process"""
+
+    name = 'gemini'
+
+    def __init__(self):
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    from google import genai
+                    self._client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+                    self._pid = os.getpid()
+        return self._client
+
+    def generate(self, prompt, model):
+        response = self.client.models.generate_content(model=model, contents=prompt)
+        return response.text
+
+
+# ===== OFFLINE FAKE BACKENDS =====
+
+def parse_latency(spec):
+    """Parse a latency distribution spec into a sampler returning seconds
+
+    Supports ``fixed:<ms>``, ``uniform:<lo_ms>:<hi_ms>`` and
+    ``lognormal:<median_ms>:<sigma>``.
+    """
+    kind, *params = (spec or 'fixed:0').split(':')
+    params = [float(p) for p in params]
+    if kind == 'fixed':
+        return lambda rng: params[0] / 1000
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(params[0], params[1]) / 1000
+    if kind == 'lognormal':
+        import math
+        mu = math.log(max(params[0], 1e-3))
+        return lambda rng: rng.lognormvariate(mu, params[1]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+FILLER_WORDS = ['um', 'uh', 'so', 'like', 'actually', 'basically', 'well']
+
+
+class FakeTranscriber(Transcriber):
+    """Deterministic offline ASR stand-in
+
+    The transcript is the hint with a seeded fraction of words dropped or
+    replaced by fillers; identical audio always yields the same text. The
+    latency and failure draws are not seeded, so repeated calls still see
+    a realistic spread.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=None, failure_rate=None, word_error_rate=None):
+        self.sample_latency = parse_latency(latency or os.getenv("FAKE_ASR_LATENCY", "lognormal:800:0.4"))
+        self.failure_rate = float(failure_rate if failure_rate is not None
+                                  else os.getenv("FAKE_ASR_FAILURE_RATE", 0))
+        self.word_error_rate = float(word_error_rate if word_error_rate is not None
+                                     else os.getenv("FAKE_ASR_WORD_ERROR_RATE", 0.1))
+        self._rng = random.Random()
+
+    def transcribe(self, upload, model, hint=None, timeout=None):
+        filename, fileobj = upload
+        data = fileobj.read() if hasattr(fileobj, 'read') else fileobj
+        latency = self.sample_latency(self._rng)
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise BackendTimeout("Fake ASR backend: timed out")
+        time.sleep(latency)
+        if self._rng.random() < self.failure_rate:
+            raise BackendError("Fake ASR backend: injected failure")
+
+        seed = hashlib.sha256(data).digest()
+        rng = random.Random(seed)
+        words = (hint or "this is a sample answer about the topic").split()
+        output = []
+        for word in words:
+            roll = rng.random()
+            if roll < self.word_error_rate / 2:
+                continue
+            if roll < self.word_error_rate:
+                output.append(rng.choice(FILLER_WORDS))
+            else:
+                output.append(word)
+        return ' '.join(output)
+
+
+class FakeEvaluator(Evaluator):
+    """Deterministic offline LLM stand-in that returns evaluation JSON"""
+
+    name = 'fake'
+
+    def __init__(self, latency=None, failure_rate=None):
+        self.sample_latency = parse_latency(latency or os.getenv("FAKE_LLM_LATENCY", "lognormal:1500:0.5"))
+        self.failure_rate = float(failure_rate if failure_rate is not None
+                                  else os.getenv("FAKE_LLM_FAILURE_RATE", 0))
+        self._rng = random.Random()
+
+    def generate(self, prompt, model):
+        time.sleep(self.sample_latency(self._rng))
+        if self._rng.random() < self.failure_rate:
+            raise BackendError("Fake LLM backend: injected failure")
+
+        rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).digest())
+        scores = {name: rng.randint(10, 25) for name in
+                  ('relevance_score', 'grammar_score', 'vocabulary_score', 'coherence_score')}
+        return json.dumps(dict(
+            scores,
+            total_score=sum(scores.values()),
+            feedback="Offline evaluation: a clear answer with room to add more detail.",
+            strengths=["Stays on topic", "Clear sentences"],
+            improvements=["Use more varied vocabulary", "Add a concluding point"]
+        ))
+
+
+# ===== SELECTION =====
+
+TRANSCRIBERS = {'groq': GroqTranscriber, 'fake': FakeTranscriber}
+EVALUATORS = {'gemini': GeminiEvaluator, 'fake': FakeEvaluator}
+
+_transcriber = None
+_evaluator = None
+_selection_lock = threading.Lock()
+
+
+def get_transcriber():
+    """Return the configured ASR backend (created on first use)"""
+    global _transcriber
+    if _transcriber is None:
+        with _selection_lock:
+            if _transcriber is None:
+                _transcriber = TRANSCRIBERS[os.getenv("ASR_BACKEND", "groq").lower()]()
+    return _transcriber
+
+
+def get_evaluator():
+    """Return the configured LLM backend (created on first use)"""
+    global _evaluator
+    if _evaluator is None:
+        with _selection_lock:
+            if _evaluator is None:
+                _evaluator = EVALUATORS[os.getenv("LLM_BACKEND", "gemini").lower()]()
+    return _evaluator
+
+
+def set_backends(transcriber=None, evaluator=None):
+    """Override the configured backends (benchmarks and load tests)"""
+    global _transcriber, _evaluator
+    if transcriber is not None:
+        _transcriber = transcriber
+    if evaluator is not None:
+        _evaluator = evaluator
@@ -0,0 +1,140 @@
+"""Module A goodput when the ASR upstream is saturated
+
+Runs the app in-process with a throwaway database. The ASR backend is a
+stand-in for an upstream that serves at most --capacity calls at a time,
+--service-ms each, so calls beyond that queue up there and every caller
+gets slower. --clients threads upload recordings for --seconds, once
+with admission control off and once per --limits setting, and report
+how many answers arrived within --deadline seconds (goodput), how many
+were shed with a 503, and the latency of each.
+
+Usage:
+    python benchmarks/bench_admission.py --clients 32 --capacity 4 --service-ms 500 --limits 4:4:1,8:8:2
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest import make_recording, percentile  # noqa: E402
+
+
+def load_app(tmpdir):
+    os.environ.setdefault('USER_DB', os.path.join(tmpdir, 'bench_admission.db'))
+    os.environ.setdefault('ASR_BACKEND', 'fake')
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('TTS_WARM_ON_START', '0')
+    os.environ.setdefault('TTS_WARM_ON_MISS', '0')
+    os.environ.setdefault('PASSWORD_WORKERS', '0')
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app
+    return app
+
+
+def capacity_transcriber(capacity, service_seconds):
+    """Fake ASR that, like a saturated upstream, serves only `capacity` calls at once"""
+    from backends import FakeTranscriber
+
+    class CapacityTranscriber(FakeTranscriber):
+        name = 'capacity'
+
+        def __init__(self):
+            super().__init__(latency='fixed:0', failure_rate=0)
+            self._upstream = threading.Semaphore(capacity)
+
+        def transcribe(self, upload, model, hint=None, timeout=None):
+            with self._upstream:
+                time.sleep(service_seconds)
+                return super().transcribe(upload, model, hint)
+
+    return CapacityTranscriber()
+
+
+def run(app_module, args, run_index):
+    clients = []
+    for _ in range(args.clients):
+        client = app_module.app.test_client()
+        client.post('/login', json={'email': 'bench@example.com', 'password': 'bench-password'})
+        client.get('/')  # starts the report session
+        clients.append(client)
+    stop = time.perf_counter() + args.seconds
+    good, late, shed = [], [], []
+    lock = threading.Lock()
+
+    def client_loop(index):
+        client = clients[index]
+        seed = (run_index * 1000 + index) * 100000
+        while time.perf_counter() < stop:
+            seed += 1  # distinct audio, so the transcription cache misses
+            data = {'sentence_id': '1', 'audio': (io.BytesIO(make_recording(1, seed)), 'r.wav')}
+            start = time.perf_counter()
+            response = client.post('/api/moduleA', data=data)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 503:
+                    shed.append(elapsed)
+                elif elapsed <= args.deadline:
+                    good.append(elapsed)
+                else:
+                    late.append(elapsed)
+            if response.status_code == 503:
+                time.sleep(float(response.headers.get('Retry-After', 1)) * args.backoff)
+
+    threads = [threading.Thread(target=client_loop, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start  # includes draining the calls in flight at the stop
+    good.sort()
+    shed.sort()
+    return {
+        'goodput': len(good) / wall,
+        'late': len(late),
+        'shed': len(shed),
+        'good_p95_ms': percentile(good, 95) * 1000,
+        'shed_p95_ms': percentile(shed, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--capacity', type=int, default=4, help='concurrent calls the fake upstream can serve')
+    parser.add_argument('--service-ms', type=float, default=500)
+    parser.add_argument('--deadline', type=float, default=5, help='answers slower than this count as failures')
+    parser.add_argument('--backoff', type=float, default=1.0, help='fraction of Retry-After a shed client waits')
+    parser.add_argument('--limits', default='4:4:1',
+                        help='comma-separated max_concurrency:max_waiting:queue_timeout settings to compare')
+    args = parser.parse_args()
+
+    app_module = load_app(tempfile.mkdtemp(prefix='bench_admission_'))
+    import admission
+    from backends import set_backends
+
+    set_backends(transcriber=capacity_transcriber(args.capacity, args.service_ms / 1000))
+    app_module.app.test_client().post('/signup', json={
+        'email': 'bench@example.com', 'username': 'bench', 'password': 'bench-password'})
+
+    configs = [('off', (0, 0, 0))]
+    for spec in args.limits.split(','):
+        concurrency, waiting, timeout = spec.split(':')
+        configs.append((spec, (int(concurrency), int(waiting), float(timeout))))
+
+    print(f"{'limits':<10} {'goodput/s':>10} {'good p95':>10} {'late':>6} {'503s':>6} {'503 p95':>9}")
+    for run_index, (name, (concurrency, waiting, timeout)) in enumerate(configs):
+        admission.limiters['asr'] = admission.Limiter('asr', concurrency, waiting, timeout)
+        result = run(app_module, args, run_index)
+        print(f"{name:<10} {result['goodput']:>10.1f} {result['good_p95_ms']:>8.0f}ms {result['late']:>6} "
+              f"{result['shed']:>6} {result['shed_p95_ms']:>7.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark insert and report throughput of the SQLite access layer
+
+Compares the old open-per-call rollback-journal pattern with the pooled
+WAL ``Database`` at 1, 8 and 32 concurrent workers.
+
+Usage:
+    python benchmarks/bench_db.py [--ops 2000] [--workers 1 8 32]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db import Database  # noqa: E402
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_performance (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        session_id TEXT NOT NULL,
+        module TEXT NOT NULL,
+        question_number INTEGER,
+        score REAL,
+        max_score REAL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+INSERT_SQL = """
+    INSERT INTO user_performance (user_id, session_id, module, question_number, score, max_score)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+REPORT_SQL = """
+    SELECT module, AVG(score) as avg_score, AVG(max_score) as max_score, COUNT(*) as attempts
+    FROM user_performance
+    WHERE user_id = ? AND session_id = ?
+    GROUP BY module
+    ORDER BY module
+"""
+MODULES = ['Module A - Read & Speak', 'Module B - Listen & Repeat',
+           'Module C - Topic Speaking', 'Module D - Grammar Quiz']
+
+
+def random_row():
+    user_id = random.randint(1, 50)
+    return (user_id, f"session-{user_id}", random.choice(MODULES),
+            random.randint(0, 14), random.uniform(0, 100), 100)
+
+
+class LegacyStore:
+    """The original pattern: connect, execute, commit, close on every call"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def insert(self, row):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute(INSERT_SQL, row)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def report(self, user_id):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            return conn.execute(REPORT_SQL, (user_id, f"session-{user_id}")).fetchall()
+        finally:
+            conn.close()
+
+
+class PooledStore:
+    def __init__(self, path):
+        self.db = Database(path, busy_timeout_ms=30000)
+
+    def insert(self, row):
+        with self.db.transaction() as conn:
+            conn.execute(INSERT_SQL, row)
+
+    def report(self, user_id):
+        return self.db.connection().execute(REPORT_SQL, (user_id, f"session-{user_id}")).fetchall()
+
+
+def run(store, op, workers, total_ops):
+    per_worker = max(1, total_ops // workers)
+    errors = []
+    barrier = threading.Barrier(workers + 1)
+
+    def worker():
+        barrier.wait()
+        try:
+            for _ in range(per_worker):
+                if op == 'insert':
+                    store.insert(random_row())
+                else:
+                    store.report(random.randint(1, 50))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return per_worker * workers / elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=2000, help='operations per run')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print(f"{'store':<8} {'op':<7} {'workers':>7} {'ops/s':>10} {'errors':>7}")
+    for name, factory in (('legacy', LegacyStore), ('pooled', PooledStore)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            conn = sqlite3.connect(path)
+            conn.executescript(SCHEMA)
+            conn.close()
+
+            store = factory(path)
+            for op in ('insert', 'report'):
+                for workers in args.workers:
+                    ops_per_sec, errors = run(store, op, workers, args.ops)
+                    print(f"{name:<8} {op:<7} {workers:>7} {ops_per_sec:>10.0f} {errors:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Compare the container-header duration probe with the librosa path
+
+Generates WAV, FLAC, Ogg/Vorbis, Ogg/Opus and WebM test clips (any extra
+files given on the command line, e.g. real browser recordings, are added
+too) and times ``audio_probe.probe_duration`` against the old code:
+
+- path: ``librosa.get_duration(path=...)`` on a file on disk, the call
+  run_moduleA made before the probe (baseline)
+- librosa: the same call on the upload stream with its ``librosa.load``
+  fallback, which is what the probe falls back to
+
+The WebM clip is encoded with ffmpeg (Opus) when it is installed.
+Otherwise a MediaRecorder-style WebM is built by hand: Opus track header
+and one 20 ms block per frame but no Duration element and no decodable
+audio, so only the probe can read it. Calls that fail print "failed".
+
+Usage:
+    python benchmarks/bench_duration.py [--seconds 30] [--repeat 20] [files ...]
+"""
+import argparse
+import io
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import librosa  # noqa: E402
+from audio_io import AudioBuffer  # noqa: E402
+from audio_probe import probe_duration  # noqa: E402
+
+
+def make_clip(fmt, subtype, seconds, sample_rate):
+    buf = io.BytesIO()
+    samples = (np.random.randn(int(seconds * sample_rate)) * 0.1).astype('float32')
+    sf.write(buf, samples, sample_rate, format=fmt, subtype=subtype)
+    return buf.getvalue()
+
+
+def make_webm(seconds):
+    """Opus WebM from ffmpeg if available, else a hand-built header-only clip"""
+    if shutil.which('ffmpeg'):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            wav, webm = os.path.join(tmpdir, 'in.wav'), os.path.join(tmpdir, 'out.webm')
+            with open(wav, 'wb') as f:
+                f.write(make_clip('WAV', 'PCM_16', seconds, 48000))
+            subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', wav, '-c:a', 'libopus', webm], check=True)
+            with open(webm, 'rb') as f:
+                return 'webm/opus', f.read()
+    return 'webm/handmade', make_media_recorder_webm(seconds)
+
+
+def ebml_element(element_id, payload, unknown_size=False):
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else b'\x01' + len(payload).to_bytes(7, 'big')
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big') + size + payload
+
+
+def make_media_recorder_webm(seconds, frame_ms=20, frame_bytes=80):
+    """WebM laid out like a MediaRecorder upload: clusters of Opus blocks and no Duration"""
+    info = ebml_element(0x2AD7B1, (1000000).to_bytes(3, 'big'))
+    audio = ebml_element(0xB5, struct.pack('>d', 48000.0)) + ebml_element(0x9F, b'\x01')
+    track = ebml_element(0xAE, ebml_element(0x86, b'A_OPUS') + ebml_element(0xE1, audio))
+    body = ebml_element(0x1549A966, info) + ebml_element(0x1654AE6B, track)
+    frames = int(seconds * 1000 / frame_ms)
+    for cluster_start in range(0, frames, 250):  # 5 s clusters, timecodes fit the int16 offset
+        blocks = ebml_element(0xE7, (cluster_start * frame_ms).to_bytes(4, 'big'))
+        for frame in range(cluster_start, min(frames, cluster_start + 250)):
+            offset = (frame - cluster_start) * frame_ms
+            blocks += ebml_element(0xA3, b'\x81' + struct.pack('>h', offset) + b'\x80' + b'\x00' * frame_bytes)
+        body += ebml_element(0x1F43B675, blocks, unknown_size=True)
+    header = ebml_element(0x1A45DFA3, ebml_element(0x4282, b'webm'))
+    return header + ebml_element(0x18538067, body, unknown_size=True)
+
+
+def librosa_path_duration(path):
+    """The original call: librosa reads the duration from a file on disk"""
+    return librosa.get_duration(path=path)
+
+
+def librosa_duration(audio):
+    """The pre-probe code path from run_moduleA"""
+    try:
+        return librosa.get_duration(path=audio.stream())
+    except Exception:
+        with audio.as_path() as path:
+            y, sr = librosa.load(path, sr=None, mono=True)
+        return librosa.get_duration(y=y, sr=sr)
+
+
+def probe_with_fallback(audio):
+    duration = probe_duration(audio.stream())
+    if duration is None:
+        return librosa_duration(audio)
+    return duration
+
+
+def timed(func, audio, repeat):
+    """Mean milliseconds per call and the result, or (None, None) if the call fails"""
+    try:
+        func(audio)  # warm up imports and caches
+    except Exception:
+        return None, None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(audio)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def fmt(value, spec, width):
+    return f"{'failed':>{width}}" if value is None else f"{value:>{width}{spec}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('files', nargs='*', help='extra recordings to include')
+    args = parser.parse_args()
+
+    clips = [
+        ('wav/pcm16', make_clip('WAV', 'PCM_16', args.seconds, 44100)),
+        ('flac', make_clip('FLAC', 'PCM_16', args.seconds, 44100)),
+        ('ogg/vorbis', make_clip('OGG', 'VORBIS', args.seconds, 44100)),
+        ('ogg/opus', make_clip('OGG', 'OPUS', args.seconds, 48000)),
+        make_webm(args.seconds),
+    ]
+    for path in args.files:
+        with open(path, 'rb') as f:
+            clips.append((os.path.basename(path), f.read()))
+
+    print(f"{'clip':<16} {'bytes':>10} {'path ms':>9} {'librosa ms':>11} {'probe ms':>9} {'speedup':>8} "
+          f"{'librosa s':>10} {'probe s':>8}")
+    for name, data in clips:
+        audio = AudioBuffer(io.BytesIO(data), name)
+        with audio.as_path() as path:
+            path_ms, _ = timed(librosa_path_duration, path, args.repeat)
+        old_ms, old_duration = timed(librosa_duration, audio, args.repeat)
+        new_ms, new_duration = timed(probe_with_fallback, audio, args.repeat)
+        baseline = path_ms if path_ms is not None else old_ms
+        speedup = f"{baseline / new_ms:.0f}x" if baseline is not None and new_ms else '-'
+        print(f"{name:<16} {len(data):>10} {fmt(path_ms, '.3f', 9)} {fmt(old_ms, '.3f', 11)} "
+              f"{fmt(new_ms, '.3f', 9)} {speedup:>8} "
+              f"{fmt(old_duration, '.3f', 10)} {fmt(new_duration, '.3f', 8)}")
+
+
+if __name__ == '__main__':
+    main()
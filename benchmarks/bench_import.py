@@ -0,0 +1,64 @@
+"""Measure how long `import app` takes and which modules dominate it
+
+Runs ``python -X importtime -c "import app"`` in a fresh interpreter
+(several times, keeping the fastest run) and reports the total plus the
+modules with the largest cumulative import time. With gunicorn preload
+this cost is paid once in the master; without it, by every worker.
+
+Usage:
+    python benchmarks/bench_import.py --runs 5 --top 15 --output import.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module, env):
+    """One cold import; returns {module: (self_us, cumulative_us)}"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    env = dict(os.environ, ASR_BACKEND=os.getenv('ASR_BACKEND', 'fake'),
+               LLM_BACKEND=os.getenv('LLM_BACKEND', 'fake'))
+    runs = [measure(args.module, env) for _ in range(args.runs)]
+    best = min(runs, key=lambda t: t[args.module][1])
+    total_ms = best[args.module][1] / 1000
+
+    top = sorted(((name, cum / 1000, own / 1000) for name, (own, cum) in best.items() if name != args.module),
+                 key=lambda item: item[1], reverse=True)[:args.top]
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {args.runs})\n")
+    print(f"{'module':<40} {'cumulative ms':>14} {'self ms':>9}")
+    for name, cum, own in top:
+        print(f"{name:<40} {cum:>14.1f} {own:>9.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'module': args.module, 'runs': args.runs, 'total_ms': total_ms,
+                       'top': [{'module': n, 'cumulative_ms': c, 'self_ms': o} for n, c, o in top]}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Login throughput and audio latency during a login storm
+
+Runs the app in-process with the fake backends and a throwaway database,
+creates a pool of users, then for --seconds keeps --login-threads
+threads logging in while --audio-threads threads upload Module A
+recordings. This is done once with the KDF inline on request threads
+(PASSWORD_WORKERS=0, the old behaviour) and once per pool size given in
+--workers, reporting login throughput, 503 rejections and audio latency.
+
+Usage:
+    python benchmarks/bench_login.py --seconds 10 --login-threads 16 --audio-threads 4 --workers 2,4
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from loadtest import make_recording, percentile  # noqa: E402
+
+
+def load_app(tmpdir):
+    os.environ.setdefault('USER_DB', os.path.join(tmpdir, 'bench_login.db'))
+    os.environ.setdefault('ASR_BACKEND', 'fake')
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('FAKE_ASR_LATENCY', 'fixed:50')
+    os.environ.setdefault('TTS_WARM_ON_START', '0')
+    os.environ.setdefault('TTS_WARM_ON_MISS', '0')
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app
+    return app
+
+
+def run(app_module, hasher, users, args):
+    app_module.password_hasher = hasher
+    hasher.start()
+    logins, rejected, audio = [], [0], []
+    lock = threading.Lock()
+
+    # Audio users are signed in before the storm starts; their sessions stay valid
+    audio_clients = []
+    for _ in range(args.audio_threads):
+        client = app_module.app.test_client()
+        client.post('/login', json={'email': users[0], 'password': 'bench-password'})
+        client.get('/')  # starts the report session
+        audio_clients.append(client)
+    stop = time.perf_counter() + args.seconds
+
+    def login_loop(index):
+        client = app_module.app.test_client()
+        email = users[index % len(users)]
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            response = client.post('/login', json={'email': email, 'password': 'bench-password'})
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 503:
+                    rejected[0] += 1
+                else:
+                    logins.append(elapsed)
+
+    def audio_loop(index):
+        client = audio_clients[index]
+        seed = index * 100000
+        while time.perf_counter() < stop:
+            seed += 1
+            data = {'sentence_id': '1', 'audio': (io.BytesIO(make_recording(2, seed)), 'r.wav')}
+            start = time.perf_counter()
+            response = client.post('/api/moduleA', data=data)
+            if response.status_code == 200:
+                with lock:
+                    audio.append(time.perf_counter() - start)
+
+    threads = ([threading.Thread(target=login_loop, args=(i,)) for i in range(args.login_threads)] +
+               [threading.Thread(target=audio_loop, args=(i,)) for i in range(args.audio_threads)])
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    logins.sort()
+    audio.sort()
+    return {
+        'logins_per_s': len(logins) / args.seconds,
+        'login_p95_ms': percentile(logins, 95) * 1000,
+        'rejected': rejected[0],
+        'audio_per_s': len(audio) / args.seconds,
+        'audio_p50_ms': percentile(audio, 50) * 1000,
+        'audio_p95_ms': percentile(audio, 95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--login-threads', type=int, default=16)
+    parser.add_argument('--audio-threads', type=int, default=4)
+    parser.add_argument('--workers', default='2', help='comma-separated pool sizes to compare with inline hashing')
+    parser.add_argument('--queue-size', type=int, default=16)
+    args = parser.parse_args()
+
+    app_module = load_app(tempfile.mkdtemp(prefix='bench_login_'))
+    from passwords import PasswordHasher
+
+    client = app_module.app.test_client()
+    users = [f'bench-{i}@example.com' for i in range(args.users)]
+    for email in users:
+        client.post('/signup', json={'email': email, 'username': 'bench', 'password': 'bench-password'})
+
+    configs = [('inline', 0)] + [(f'pool x{w}', int(w)) for w in args.workers.split(',')]
+    print(f"{'KDF':<10} {'logins/s':>9} {'login p95':>10} {'503s':>6} {'audio/s':>8} {'audio p50':>10} {'audio p95':>10}")
+    for name, workers in configs:
+        result = run(app_module, PasswordHasher(workers=workers, max_pending=args.queue_size), users, args)
+        print(f"{name:<10} {result['logins_per_s']:>9.1f} {result['login_p95_ms']:>8.0f}ms {result['rejected']:>6} "
+              f"{result['audio_per_s']:>8.1f} {result['audio_p50_ms']:>8.0f}ms {result['audio_p95_ms']:>8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Time Module D quiz sampling against question bank size
+
+Builds synthetic banks (default 25 to 50,000 questions over 40
+categories) and compares the old per-call ``questions_bank.copy()`` +
+``random.sample`` with ``QuestionIndex.sample`` weighted by miss rates.
+Also checks that sampling actually favours the categories with the
+highest miss rate.
+
+Usage:
+    python benchmarks/bench_quiz.py [--sizes 25,1000,50000] [--quizzes 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from moduleD import DIFFICULTIES, QuestionIndex  # noqa: E402
+
+
+def make_bank(size, categories, rng):
+    return [{"sentence": f"Question {i} ___.", "answer": "x",
+             "category": f"cat{rng.randrange(categories)}",
+             "difficulty": rng.choice(DIFFICULTIES)} for i in range(size)]
+
+
+def old_sample(bank, num_questions):
+    """The pre-index get_quiz sampling"""
+    available = bank.copy()
+    return random.sample(available, min(num_questions, len(available)))
+
+
+def per_quiz_us(func, quizzes):
+    start = time.perf_counter()
+    for _ in range(quizzes):
+        func()
+    return (time.perf_counter() - start) / quizzes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='25,1000,10000,50000')
+    parser.add_argument('--categories', type=int, default=40)
+    parser.add_argument('--questions', type=int, default=5, help='questions per quiz')
+    parser.add_argument('--quizzes', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    print(f"{'bank size':>10} {'index build ms':>15} {'old us/quiz':>12} {'index us/quiz':>14}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        bank = make_bank(size, args.categories, rng)
+        start = time.perf_counter()
+        index = QuestionIndex(bank)
+        build_ms = (time.perf_counter() - start) * 1000
+        miss_rates = {f"cat{c}": rng.random() for c in range(args.categories)}
+        old = per_quiz_us(lambda: old_sample(bank, args.questions), args.quizzes)
+        new = per_quiz_us(lambda: index.sample(args.questions, 'mixed', miss_rates), args.quizzes)
+        print(f"{size:>10} {build_ms:>15.1f} {old:>12.1f} {new:>14.1f}")
+
+    # Weighting check on the last bank: draws per category should track miss rate
+    draws = Counter(bank[i]['category'] for _ in range(args.quizzes)
+                    for i in index.sample(args.questions, 'mixed', miss_rates))
+    ranked = sorted(miss_rates, key=miss_rates.get)
+    low, high = ranked[:5], ranked[-5:]
+    print(f"\nDraws for the 5 least-missed categories: {sum(draws[c] for c in low)}, "
+          f"5 most-missed: {sum(draws[c] for c in high)}")
+
+
+if __name__ == '__main__':
+    main()
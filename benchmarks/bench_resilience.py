@@ -0,0 +1,124 @@
+"""ASR tail latency with and without the resilience policies
+
+Starts benchmarks/fake_asr_server.py in-process and drives the real Groq
+client against it through resilience.ResilientCaller, the same path
+transcription.transcribe takes. Two scenarios are run:
+
+- tail: lognormal latency with a slow tail and a few 500s, comparing a
+  single attempt with no deadline against retries and against retries
+  plus hedging (p50/p95/p99, errors, upstream requests per call)
+- outage: every request fails, comparing retries alone with retries
+  behind the circuit breaker (time to fail and upstream requests sent)
+
+Usage:
+    python benchmarks/bench_resilience.py --calls 400 --concurrency 8 \\
+        --latency lognormal:300:0.3 --tail-rate 0.05 --tail-ms 5000 --failure-rate 0.02
+"""
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_asr_server import FakeASRServer  # noqa: E402
+from loadtest import percentile  # noqa: E402
+
+
+def drive(caller, transcriber, calls, concurrency):
+    """Make `calls` transcriptions from `concurrency` threads; returns (latencies, errors)"""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    remaining = [calls]
+
+    def worker():
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            start = time.perf_counter()
+            try:
+                caller.call(lambda timeout: transcriber.transcribe(
+                    ('r.wav', io.BytesIO(b'RIFF')), 'whisper-large-v3', timeout=timeout),
+                    retryable=transcriber.is_retryable)
+                ok = True
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                (latencies if ok else errors).append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sorted(latencies), sorted(errors)
+
+
+def report(name, server, calls, latencies, errors):
+    requests = server.requests
+    server.requests = 0
+    print(f"{name:<14} {percentile(latencies, 50) * 1000:>7.0f}ms {percentile(latencies, 95) * 1000:>7.0f}ms "
+          f"{percentile(latencies, 99) * 1000:>7.0f}ms {len(errors):>7} "
+          f"{percentile(errors, 50) * 1000:>9.0f}ms {requests / calls:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', default='lognormal:300:0.3')
+    parser.add_argument('--tail-rate', type=float, default=0.05)
+    parser.add_argument('--tail-ms', type=float, default=5000)
+    parser.add_argument('--failure-rate', type=float, default=0.02)
+    parser.add_argument('--attempt-timeout', type=float, default=2.0)
+    args = parser.parse_args()
+
+    server = FakeASRServer(latency=args.latency, tail_rate=args.tail_rate, tail_ms=args.tail_ms,
+                           failure_rate=args.failure_rate).start_background()
+    os.environ.setdefault('GROQ_API_KEY', 'test')
+    os.environ['GROQ_BASE_URL'] = server.base_url
+    from backends import GroqTranscriber
+    from resilience import CircuitBreaker, ResilientCaller
+
+    transcriber = GroqTranscriber()
+    policies = [
+        ('single', ResilientCaller('asr', deadline=60, attempt_timeout=60, max_attempts=1)),
+        ('retry', ResilientCaller('asr', deadline=10, attempt_timeout=args.attempt_timeout, max_attempts=3)),
+        ('retry+hedge', ResilientCaller('asr', deadline=10, attempt_timeout=args.attempt_timeout, max_attempts=3,
+                                        hedge=True, hedge_min_delay=0.1)),
+    ]
+
+    header = (f"{'policy':<14} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7} {'fail p50':>11} {'req/call':>9}")
+    print(f"tail: {args.latency}, {args.tail_rate:.0%} at {args.tail_ms:g} ms, {args.failure_rate:.0%} errors")
+    print(header)
+    for name, caller in policies:
+        if caller.hedge:
+            drive(caller, transcriber, 50, args.concurrency)  # fill the latency window for the p95
+            server.requests = 0
+        latencies, errors = drive(caller, transcriber, args.calls, args.concurrency)
+        report(name, server, args.calls, latencies, errors)
+
+    server.failure_rate = 1.0
+    server.tail_rate = 0.0
+    outage = [
+        ('retry', ResilientCaller('asr', deadline=10, attempt_timeout=args.attempt_timeout, max_attempts=3)),
+        ('retry+breaker', ResilientCaller('asr', deadline=10, attempt_timeout=args.attempt_timeout, max_attempts=3,
+                                          breaker=CircuitBreaker('asr', cooldown=30))),
+    ]
+    calls = min(args.calls, 100)
+    print("\noutage: every request fails")
+    print(header)
+    for name, caller in outage:
+        latencies, errors = drive(caller, transcriber, calls, args.concurrency)
+        report(name, server, calls, latencies, errors)
+
+
+if __name__ == '__main__':
+    main()
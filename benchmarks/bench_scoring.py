@@ -0,0 +1,85 @@
+"""Compare scoring.align with jiwer.wer on Module A/B style transcripts
+
+Builds noisy transcripts of the Module A and B sentences (dropped,
+replaced and inserted words, random casing and punctuation), then times
+per-call ``jiwer.wer`` (the old scoring path), ``scoring.align`` and
+``scoring.align_batch``. Also reports how often the two WERs differ,
+which happens when jiwer counts punctuation or casing as errors.
+
+Usage:
+    python benchmarks/bench_scoring.py [--transcripts 5000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jiwer  # noqa: E402
+import moduleA  # noqa: E402
+import moduleB  # noqa: E402
+from scoring import align, align_batch  # noqa: E402
+
+NOISE_WORDS = ['um', 'uh', 'the', 'a', 'so', 'like']
+
+
+def noisy_transcript(sentence, rng, error_rate):
+    words = []
+    for word in sentence.split():
+        roll = rng.random()
+        if roll < error_rate / 3:
+            continue
+        if roll < 2 * error_rate / 3:
+            word = rng.choice(NOISE_WORDS)
+        elif roll < error_rate:
+            words.append(rng.choice(NOISE_WORDS))
+        if rng.random() < 0.3:
+            word = word.strip('.,!?')
+        words.append(word.capitalize() if rng.random() < 0.1 else word)
+    return ' '.join(words)
+
+
+def timed(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--transcripts', type=int, default=5000)
+    parser.add_argument('--error-rate', type=float, default=0.2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sentences = moduleA.sentences + moduleB.sentences
+    targets = [rng.choice(sentences) for _ in range(args.transcripts)]
+    transcripts = [noisy_transcript(t, rng, args.error_rate) for t in targets]
+
+    jiwer_time, jiwer_wers = timed(
+        lambda: [jiwer.wer(t.lower(), h.lower()) for t, h in zip(targets, transcripts)], args.repeat)
+    align_time, alignments = timed(
+        lambda: [align(t, h) for t, h in zip(targets, transcripts)], args.repeat)
+    batch_time, _ = timed(lambda: align_batch(targets, transcripts), args.repeat)
+
+    n = args.transcripts
+    print(f"{n} transcripts, best of {args.repeat}")
+    print(f"{'jiwer.wer (lowercased)':<28} {jiwer_time * 1000:>9.1f} ms  {jiwer_time / n * 1e6:>7.1f} us/call")
+    print(f"{'scoring.align':<28} {align_time * 1000:>9.1f} ms  {align_time / n * 1e6:>7.1f} us/call")
+    print(f"{'scoring.align_batch':<28} {batch_time * 1000:>9.1f} ms  {batch_time / n * 1e6:>7.1f} us/call")
+
+    differ = sum(1 for w, a in zip(jiwer_wers, alignments) if abs(w - a['wer']) > 1e-9)
+    lower = sum(1 for w, a in zip(jiwer_wers, alignments) if a['wer'] < w - 1e-9)
+    print(f"\nWER differs from jiwer on {differ}/{n} transcripts "
+          f"({lower} lower, i.e. punctuation/casing no longer counted as errors)")
+
+
+if __name__ == '__main__':
+    main()
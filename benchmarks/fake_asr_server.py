@@ -0,0 +1,127 @@
+"""OpenAI-compatible stand-in for the Groq Whisper endpoint
+
+Answers POST .../audio/transcriptions after an injected delay, with an
+optional slow tail and failure rate, so the real Groq client and
+resilience.py can be exercised offline. Point the app at it with:
+
+    ASR_BACKEND=groq GROQ_API_KEY=test GROQ_BASE_URL=http://127.0.0.1:8089
+
+Usage:
+    python benchmarks/fake_asr_server.py --port 8089 --latency lognormal:300:0.3 \\
+        --tail-rate 0.05 --tail-ms 5000 --failure-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backends import parse_latency  # noqa: E402
+
+TRANSCRIPT = "this is a sample answer about the topic"
+
+
+class FakeASRServer(ThreadingHTTPServer):
+    """Threaded HTTP server whose fault settings can be changed while it runs
+
+    Args:
+        address: (host, port) to bind; port 0 picks a free one
+        latency: Latency spec, as for FAKE_ASR_LATENCY (see backends.parse_latency)
+        tail_rate: Share of requests that take tail_ms instead
+        tail_ms: Latency of the slow tail
+        failure_rate: Share of requests answered with a 500
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency='lognormal:300:0.3', tail_rate=0.0, tail_ms=5000,
+                 failure_rate=0.0):
+        super().__init__(address, TranscriptionHandler)
+        self.sample_latency = parse_latency(latency)
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self):
+        """(delay seconds, fail?) for the next request"""
+        with self._lock:
+            self.requests += 1
+            if self._rng.random() < self.tail_rate:
+                delay = self.tail_ms / 1000
+            else:
+                delay = self.sample_latency(self._rng)
+            return delay, self._rng.random() < self.failure_rate
+
+    def start_background(self):
+        """Serve from a daemon thread and return self"""
+        threading.Thread(target=self.serve_forever, name='fake-asr-server', daemon=True).start()
+        return self
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the benchmark output
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if not self.path.endswith('/audio/transcriptions'):
+            self._send(404, 'application/json', json.dumps({'error': {'message': 'Not found'}}))
+            return
+
+        delay, fail = self.server.draw()
+        threading.Event().wait(delay)
+        if fail:
+            self._send(500, 'application/json',
+                       json.dumps({'error': {'message': 'Injected failure', 'type': 'server_error'}}))
+        elif b'name="response_format"\r\n\r\ntext' in body:
+            self._send(200, 'text/plain', TRANSCRIPT)
+        else:
+            self._send(200, 'application/json', json.dumps({'text': TRANSCRIPT}))
+
+    def _send(self, status, content_type, text):
+        payload = text.encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (timeout or a hedge won)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default='lognormal:300:0.3')
+    parser.add_argument('--tail-rate', type=float, default=0.0)
+    parser.add_argument('--tail-ms', type=float, default=5000)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeASRServer((args.host, args.port), args.latency, args.tail_rate, args.tail_ms, args.failure_rate)
+    print(f"Fake ASR server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""End-to-end load test for all four modules
+
+Each virtual user signs up, logs in via /login, then repeatedly drives
+Module A, B and C (fetch a sentence/topic, upload a recording), Module D
+(fetch a quiz, submit answers) and /report. Per-endpoint throughput and
+p50/p95/p99 latency, plus SQLite write-lock waits, are printed and saved
+as JSON so runs can be compared between releases.
+
+By default the app runs in-process against a throwaway database with the
+fake ASR/LLM backends (see backends.py), so no network is needed. Use
+--url to drive a running server instead (configure its backends there).
+
+Usage:
+    python benchmarks/loadtest.py --users 16 --iterations 5 \\
+        --asr-latency lognormal:800:0.4 --llm-latency lognormal:1500:0.5 \\
+        --output loadtest.json
+    python benchmarks/loadtest.py --url http://localhost:5000 --users 8
+"""
+import argparse
+import http.cookiejar
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# ===== CLIENTS =====
+
+class InProcessClient:
+    """Drives the Flask app through its test client"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json_body=None, form=None, audio=None):
+        data = None
+        if form is not None:
+            data = dict(form)
+            if audio is not None:
+                data['audio'] = (io.BytesIO(audio), 'recording.wav')
+        response = self.client.open(path, method=method, json=json_body, data=data)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpClient:
+    """Drives a running server over HTTP, keeping the session cookie"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+
+    def request(self, method, path, json_body=None, form=None, audio=None):
+        headers = {'Accept': 'application/json'}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for name, value in form.items():
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+            if audio is not None:
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="recording.wav"\r\n'
+                             f'Content-Type: audio/wav\r\n\r\n'.encode() + audio + b'\r\n')
+            parts.append(f'--{boundary}--\r\n'.encode())
+            body = b''.join(parts)
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=300) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+
+# ===== RECORDING =====
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def timed(self, name, func, ok_statuses=(200,)):
+        start = time.perf_counter()
+        try:
+            status, payload = func()
+            ok = status in ok_statuses and (payload is None or payload.get('success', True) is not False)
+        except Exception:
+            status, payload, ok = None, None, False
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            self.samples.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+        return status, payload
+
+    def add(self, name, elapsed, ok=True):
+        with self.lock:
+            self.samples.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, wall_seconds):
+        result = {}
+        for name, values in sorted(self.samples.items()):
+            values = sorted(values)
+            result[name] = {
+                'count': len(values),
+                'errors': self.errors.get(name, 0),
+                'throughput_rps': round(len(values) / wall_seconds, 2),
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        return result
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def make_recording(seconds, seed):
+    """Noise WAV; a distinct seed gives distinct bytes so ASR caches miss"""
+    rng = np.random.default_rng(seed)
+    buf = io.BytesIO()
+    sf.write(buf, (rng.standard_normal(int(16000 * seconds)) * 0.05).astype('float32'), 16000,
+             format='WAV', subtype='PCM_16')
+    return buf.getvalue()
+
+
+# ===== USER FLOW =====
+
+def wait_for_job(client, recorder, name, payload, timeout=300):
+    """Poll an async scoring job; records the submit-to-result time"""
+    start = time.perf_counter()
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        status, job = client.request('GET', payload['poll_url'])
+        if status != 200 or job is None:
+            break
+        if job['status'] in ('done', 'failed'):
+            ok = job['status'] == 'done' and (job.get('result') or {}).get('success', True) is not False
+            recorder.add(f'{name} (async result)', time.perf_counter() - start, ok)
+            return
+        time.sleep(0.1)
+    recorder.add(f'{name} (async result)', time.perf_counter() - start, False)
+
+
+def run_user(client, recorder, user_index, args):
+    rng = random.Random(user_index)
+    email = f'loadtest-{user_index}-{uuid.uuid4().hex[:8]}@example.com'
+    password = 'loadtest-password'
+    recorder.timed('POST /signup', lambda: client.request(
+        'POST', '/signup', json_body={'email': email, 'username': f'loadtest{user_index}', 'password': password}))
+    recorder.timed('POST /login', lambda: client.request(
+        'POST', '/login', json_body={'email': email, 'password': password}))
+    client.request('GET', '/')  # starts the report session
+
+    suffix = '?mode=async' if args.async_mode else ''
+    ok_statuses = (200, 202)
+
+    def audio_module(module, item_path, id_field):
+        _, item = recorder.timed(f'GET {item_path}', lambda: client.request('GET', item_path))
+        item_id = (item or {}).get(id_field, 0)
+        seed = rng.randrange(1 << 30) if args.unique_audio else 0
+        audio = make_recording(args.audio_seconds, seed)
+        name = f'POST /api/{module}'
+        status, payload = recorder.timed(name, lambda: client.request(
+            'POST', f'/api/{module}{suffix}', form={id_field: item_id}, audio=audio), ok_statuses)
+        if status == 202 and payload and payload.get('job_id'):
+            wait_for_job(client, recorder, name, payload)
+
+    for _ in range(args.iterations):
+        audio_module('moduleA', '/api/moduleA/sentence', 'sentence_id')
+        audio_module('moduleB', '/api/moduleB/sentence', 'sentence_id')
+        audio_module('moduleC', '/api/moduleC/topic', 'topic_id')
+
+        _, quiz = recorder.timed('GET /api/moduleD/quiz', lambda: client.request('GET', '/api/moduleD/quiz'))
+        questions = (quiz or {}).get('questions', [])
+        answers = {str(q['id']): rng.choice(['is', 'since', 'than', 'for', 'to']) for q in questions}
+        body = {'answers': answers}
+        for key in ('quiz_id', 'quiz_token'):
+            if quiz and key in quiz:
+                body[key] = quiz[key]
+        recorder.timed('POST /api/moduleD/submit', lambda: client.request('POST', '/api/moduleD/submit', json_body=body))
+
+        recorder.timed('GET /report', lambda: client.request('GET', '/report'), ok_statuses=(200,))
+
+
+# ===== MAIN =====
+
+def load_app(args, tmpdir):
+    """Import the app in-process with a throwaway DB and fake backends"""
+    os.environ.setdefault('USER_DB', os.path.join(tmpdir, 'loadtest.db'))
+    os.environ.setdefault('ASR_BACKEND', 'fake')
+    os.environ.setdefault('LLM_BACKEND', 'fake')
+    os.environ.setdefault('TTS_WARM_ON_START', '0')  # gTTS needs the network
+    os.environ.setdefault('TTS_WARM_ON_MISS', '0')
+    os.environ['FAKE_ASR_LATENCY'] = args.asr_latency
+    os.environ['FAKE_LLM_LATENCY'] = args.llm_latency
+    os.environ['FAKE_ASR_FAILURE_RATE'] = str(args.failure_rate)
+    os.environ['FAKE_LLM_FAILURE_RATE'] = str(args.failure_rate)
+    os.chdir(ROOT)
+    import app
+    return app
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter, epilog=__doc__)
+    parser.add_argument('--url', help='drive a running server instead of the in-process app')
+    parser.add_argument('--users', type=int, default=8, help='concurrent virtual users')
+    parser.add_argument('--iterations', type=int, default=3, help='passes through all modules per user')
+    parser.add_argument('--audio-seconds', type=float, default=4.0)
+    parser.add_argument('--unique-audio', action=argparse.BooleanOptionalAction, default=True,
+                        help='send distinct audio on every upload (defeats the transcription cache)')
+    parser.add_argument('--async', dest='async_mode', action='store_true', help='use submit-then-poll scoring')
+    parser.add_argument('--asr-latency', default='lognormal:800:0.4', help='fake ASR latency (in-process only)')
+    parser.add_argument('--llm-latency', default='lognormal:1500:0.5', help='fake LLM latency (in-process only)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fake backend failure rate (in-process only)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    tmpdir = tempfile.mkdtemp(prefix='loadtest_')
+    app_module = None
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        app_module = load_app(args, tmpdir)
+        make_client = lambda: InProcessClient(app_module.app)
+
+    recorder = Recorder()
+    threads = [threading.Thread(target=run_user, args=(make_client(), recorder, i, args))
+               for i in range(args.users)]
+    started_at = time.time()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    endpoints = recorder.summary(wall)
+    results = {
+        'started_at': started_at,
+        'revision': git_revision(),
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'wall_seconds': round(wall, 3),
+        'total_requests': sum(e['count'] for e in endpoints.values()),
+        'endpoints': endpoints,
+        'db_lock_waits': app_module.db.lock_wait_stats() if app_module else None,
+    }
+
+    print(f"\n{'endpoint':<40} {'count':>6} {'err':>4} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, e in endpoints.items():
+        print(f"{name:<40} {e['count']:>6} {e['errors']:>4} {e['throughput_rps']:>7.2f} "
+              f"{e['p50_ms']:>8.1f} {e['p95_ms']:>8.1f} {e['p99_ms']:>8.1f}")
+    print(f"\n{results['total_requests']} requests in {wall:.1f}s")
+    if results['db_lock_waits']:
+        print(f"DB lock waits: {results['db_lock_waits']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
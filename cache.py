@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from db import Database
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an optional TTL
+
+    Args:
+        max_entries: Least recently used entries are evicted past this size
+        ttl_seconds: Entries older than this are treated as missing (None = never expire)
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, stored_at = item
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Persistent cache tier stored in a SQLite table
+
+    Values must be JSON-serialisable. Expired rows are ignored on read and
+    the least recently read rows are evicted once the table grows past
+    ``max_entries`` (checked every ``evict_every`` writes).
+
+    Args:
+        path: SQLite file (can be shared between gunicorn workers)
+        table: Table name, so several caches can share one file
+        max_entries: Size bound for the table
+        ttl_seconds: Entries older than this are treated as missing (None = never expire)
+    """
+
+    def __init__(self, path, table, max_entries=100000, ttl_seconds=None, evict_every=100):
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self._writes = 0
+        self._db = Database(path)
+        with self._db.transaction() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                );
+            """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table} (accessed_at)")
+
+    def get(self, key):
+        conn = self._db.connection()
+        row = conn.execute(f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if self.ttl_seconds is not None and now - row['created_at'] > self.ttl_seconds:
+            with self._db.transaction() as conn:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            return None
+        with self._db.transaction() as conn:
+            conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row['value'])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._db.transaction() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now))
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self):
+        """Drop expired rows and trim the table to max_entries"""
+        with self._db.transaction() as conn:
+            if self.ttl_seconds is not None:
+                conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            conn.execute(f"""
+                DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+
+class TieredCache:
+    """Memory tier in front of an optional persistent tier, with hit/miss counters
+
+    Args:
+        memory: LRUCache
+        disk: SQLiteCache or None
+        name: Label used for the cache_requests_total metric
+    """
+
+    def __init__(self, memory, disk=None, name='cache'):
+        self.name = name
+        self.memory = memory
+        self.disk = disk
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+        metrics.inc('cache_requests_total', {'cache': self.name, 'result': name})
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except Exception as e:
+                print(f"Cache read error: {str(e)}")
+                self._count('errors')
+                value = None
+            if value is not None:
+                self._count('disk_hits')
+                self.memory.set(key, value)
+                return value
+
+        self._count('misses')
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except Exception as e:
+                print(f"Cache write error: {str(e)}")
+                self._count('errors')
+
+    def stats(self):
+        """Snapshot of hit/miss counters plus the hit ratio"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        return stats
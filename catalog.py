@@ -0,0 +1,81 @@
+"""Practice content (sentences and topics) loaded from a versioned data file
+
+The catalog file (content/catalog.json, or CONTENT_CATALOG) is read once at
+import into immutable tuples, so lookups by id are O(1) and each item
+costs one str. Item ids are positions in their collection: append new
+items and never reorder or delete existing ones, because stored
+performance rows refer to them by id. Bump ``version`` when the file
+changes; it is combined with a hash of the file contents so clients
+can tell when the content they prefetched is out of date.
+"""
+import hashlib
+import json
+import os
+import random
+
+CONTENT_CATALOG = os.getenv("CONTENT_CATALOG",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'catalog.json'))
+
+
+class Collection:
+    """One list of catalog items (e.g. Module A sentences), indexed by id"""
+
+    __slots__ = ('name', 'items', 'version')
+
+    def __init__(self, name, items, version):
+        self.name = name
+        self.items = tuple(items)
+        self.version = version
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, item_id):
+        return self.items[item_id]
+
+    def sample(self, count, exclude=(), rng=random):
+        """Pick up to count distinct random ids, skipping the excluded ones
+
+        Costs O(count) while most of the collection is still available and
+        only falls back to a full pass when the caller has excluded most
+        of it.
+        """
+        size = len(self.items)
+        exclude = {i for i in exclude if 0 <= i < size}
+        available = size - len(exclude)
+        count = max(0, min(count, available))
+        if count * 2 <= available:
+            chosen = []
+            seen = set(exclude)
+            while len(chosen) < count:
+                item_id = rng.randrange(size)
+                if item_id not in seen:
+                    seen.add(item_id)
+                    chosen.append(item_id)
+            return chosen
+        return rng.sample([i for i in range(size) if i not in exclude], count)
+
+
+class Catalog:
+    """All collections of a catalog file
+
+    Args:
+        path: JSON file with ``version`` and ``collections`` (name -> list of strings)
+    """
+
+    def __init__(self, path=CONTENT_CATALOG):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+        self.path = path
+        # The declared version plus a content hash, so an edit without a
+        # version bump is still visible to clients
+        self.version = f"{data['version']}-{hashlib.sha256(raw).hexdigest()[:12]}"
+        self.collections = {name: Collection(name, items, self.version)
+                            for name, items in data['collections'].items()}
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+catalog = Catalog()
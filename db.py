@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Database:
+    """Thread-local SQLite connection manager
+
+    Each thread (request thread, scoring worker, ...) gets one long-lived
+    connection, so the per-connection statement cache keeps prepared
+    statements warm across calls. Connections run in WAL mode with a busy
+    timeout, which lets readers proceed while a writer holds the lock.
+
+    Connections are never shared across a fork: a child process that
+    inherits this object opens fresh connections on first use.
+
+    Args:
+        path: Path to the SQLite database file
+        busy_timeout_ms: How long a writer waits for the lock before failing
+        synchronous: PRAGMA synchronous level; NORMAL is durable in WAL mode
+            except for the last transactions before a power loss
+        cached_statements: Size of the per-connection prepared statement cache
+    """
+
+    def __init__(self, path, busy_timeout_ms=5000, synchronous='NORMAL', cached_statements=256):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._stats_lock = threading.Lock()
+        self._lock_waits = {'transactions': 0, 'contended': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,  # we issue BEGIN/COMMIT ourselves
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use"""
+        if self._pid != os.getpid():
+            # Forked child: drop inherited connections without closing them
+            self._local = threading.local()
+            self._pid = os.getpid()
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a write transaction on this thread's connection
+
+        ``BEGIN IMMEDIATE`` takes the write lock up front so concurrent
+        writers queue on the busy timeout instead of failing mid-transaction.
+        """
+        conn = self.connection()
+        start = time.perf_counter()
+        conn.execute("BEGIN IMMEDIATE")
+        self._record_lock_wait(time.perf_counter() - start)
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _record_lock_wait(self, waited):
+        with self._stats_lock:
+            stats = self._lock_waits
+            stats['transactions'] += 1
+            stats['wait_seconds'] += waited
+            if waited > 0.001:
+                stats['contended'] += 1
+            if waited > stats['max_wait_seconds']:
+                stats['max_wait_seconds'] = waited
+
+    def lock_wait_stats(self):
+        """Write-lock acquisition counters for this process
+
+        ``contended`` counts transactions that waited more than 1 ms for
+        the write lock; ``wait_seconds`` is the total time spent waiting.
+        """
+        with self._stats_lock:
+            return dict(self._lock_waits)
+
+    def close(self):
+        """Close this thread's connection (it is reopened on next use)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
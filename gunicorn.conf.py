@@ -0,0 +1,58 @@
+"""Gunicorn settings
+
+    gunicorn app:app
+
+The app is imported once in the master (preload) and warmed up before
+workers are forked, so each worker starts with the heavy dependencies
+already loaded and shares their memory copy-on-write. Set
+GUNICORN_PRELOAD=0 to import the app in every worker instead (needed for
+code reloading).
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+import time
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('WEB_CONCURRENCY', min(4, multiprocessing.cpu_count())))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+# /metrics must merge every worker's registry (see metrics.py); this has to
+# be set before the app is imported
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'com-test-metrics'))
+
+
+def on_starting(server):
+    # Snapshots left over from a previous run would be counted again
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], '*.json')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def when_ready(server):
+    if preload_app:
+        import app
+        start = time.perf_counter()
+        app.warm_up()
+        server.log.info("Warmed up in %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+def post_worker_init(worker):
+    # Spawn the password hashing processes before the first login arrives
+    import app
+    app.password_hasher.start()
+    # TTS renders run on a thread in the worker, never in the master
+    app.start_background_warm()
+
+
+def worker_exit(server, worker):
+    import app
+    if app.performance_writer is not None:
+        app.performance_writer.close()
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+
+class QueueFullError(Exception):
+    """Raised when the scoring queue cannot accept another job"""
+
+
+class JobQueue:
+    """Bounded background pool for audio scoring jobs
+
+    Jobs run in a thread pool inside the worker process that accepted them,
+    but their status and result are written to the ``scoring_jobs`` table so
+    that a poll hitting any gunicorn worker can answer it.
+
+    Args:
+        db: The app's ``Database`` connection manager
+        max_workers: Number of jobs scored concurrently
+        max_pending: Maximum number of queued plus running jobs
+        retention_seconds: How long finished jobs are kept before pruning
+        stale_seconds: Queued or running jobs not updated for this long are
+            marked failed; their worker was most likely killed or recycled.
+            The owning process touches its jobs every third of this, so a
+            job waiting in a deep queue or on a slow backend never looks stale
+    """
+
+    STALE_ERROR = "Scoring was interrupted, please submit the recording again"
+
+    def __init__(self, db, max_workers=4, max_pending=32, retention_seconds=3600, stale_seconds=60):
+        self._db = db
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scoring')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = set()
+        self._heartbeat_pid = None
+        self._retention_seconds = retention_seconds
+        self._stale_seconds = stale_seconds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        # Each worker process gets its own pool; jobs queued in the parent stay there
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scoring')
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._active = set()
+        self._heartbeat_pid = None
+
+    def init_db(self):
+        """Create the job table if it does not exist and fail jobs left behind by dead workers"""
+        with self._db.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS scoring_jobs (
+                    id TEXT PRIMARY KEY,
+                    user_id INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+            """)
+        self._fail_stale()
+
+    def submit(self, user_id, kind, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` and return the new job id
+
+        Raises:
+            QueueFullError: If ``max_pending`` jobs are already in flight
+        """
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                raise QueueFullError("Scoring queue is full, please retry shortly")
+            self._in_flight += 1
+            metrics.set_gauge('scoring_queue_depth', self._in_flight)
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        try:
+            with self._db.transaction() as conn:
+                conn.execute(
+                    "INSERT INTO scoring_jobs (id, user_id, kind, status, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', ?, ?)",
+                    (job_id, user_id, kind, now, now))
+            with self._lock:
+                self._active.add(job_id)
+            self._ensure_heartbeat()
+            self._executor.submit(self._run, job_id, func, args, kwargs)
+        except Exception:
+            self._release(job_id)
+            raise
+        return job_id
+
+    def get(self, job_id, user_id=None):
+        """Return the job as a dict, or None if it does not exist (or is not owned by user_id)"""
+        row = self._db.connection().execute(
+            "SELECT id, user_id, kind, status, result, error, created_at, updated_at "
+            "FROM scoring_jobs WHERE id = ?", (job_id,)).fetchone()
+
+        if row is None or (user_id is not None and row[1] != user_id):
+            return None
+
+        if row[3] in ('queued', 'running') and row[7] < time.time() - self._stale_seconds:
+            # Its worker is gone; answer the poll instead of letting it spin forever
+            self._fail_stale()
+            row = row[:3] + ('failed', None, self.STALE_ERROR) + row[6:]
+
+        return {
+            'job_id': row[0],
+            'kind': row[2],
+            'status': row[3],
+            'result': json.loads(row[4]) if row[4] else None,
+            'error': row[5],
+            'created_at': row[6],
+            'updated_at': row[7]
+        }
+
+    def pending(self):
+        """Approximate number of queued plus running jobs in this process"""
+        return self._in_flight
+
+    def _release(self, job_id):
+        with self._lock:
+            self._in_flight -= 1
+            self._active.discard(job_id)
+            metrics.set_gauge('scoring_queue_depth', self._in_flight)
+
+    def _ensure_heartbeat(self):
+        """Start the thread that keeps this process's jobs from looking stale"""
+        with self._lock:
+            if self._heartbeat_pid == os.getpid():
+                return
+            self._heartbeat_pid = os.getpid()
+        threading.Thread(target=self._heartbeat_loop, name='scoring-heartbeat', daemon=True).start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self._stale_seconds / 3)
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"Error touching scoring jobs: {str(e)}")
+
+    def heartbeat(self):
+        """Mark the queued and running jobs of this process as still alive"""
+        with self._lock:
+            job_ids = list(self._active)
+        if not job_ids:
+            return
+        with self._db.transaction() as conn:
+            conn.executemany(
+                "UPDATE scoring_jobs SET updated_at = ? WHERE id = ? AND status IN ('queued', 'running')",
+                [(time.time(), job_id) for job_id in job_ids])
+
+    def _run(self, job_id, func, args, kwargs):
+        try:
+            self._set_status(job_id, 'running')
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                print(f"Error in scoring job {job_id}: {str(e)}")
+                self._set_status(job_id, 'failed', error=str(e))
+            else:
+                self._set_status(job_id, 'done', result=result)
+            self._prune()
+        finally:
+            self._release(job_id)
+
+    def _set_status(self, job_id, status, result=None, error=None):
+        with self._db.transaction() as conn:
+            conn.execute(
+                "UPDATE scoring_jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+
+    def _fail_stale(self):
+        """Mark queued or running jobs that stopped making progress as failed"""
+        now = time.time()
+        with self._db.transaction() as conn:
+            cur = conn.execute(
+                "UPDATE scoring_jobs SET status = 'failed', error = ?, updated_at = ? "
+                "WHERE status IN ('queued', 'running') AND updated_at < ?",
+                (self.STALE_ERROR, now, now - self._stale_seconds))
+        if cur.rowcount:
+            print(f"Marked {cur.rowcount} stale scoring jobs as failed")
+
+    def _prune(self):
+        self._fail_stale()
+        cutoff = time.time() - self._retention_seconds
+        with self._db.transaction() as conn:
+            conn.execute(
+                "DELETE FROM scoring_jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (cutoff,))
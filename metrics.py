@@ -0,0 +1,289 @@
+"""In-process latency histograms and counters, exported in Prometheus text format
+
+Every worker keeps its own registry in memory. When METRICS_DIR is set
+(required under gunicorn with more than one worker), a background thread
+writes a snapshot of the registry to ``METRICS_DIR/<pid>-<instance>.json``
+every METRICS_FLUSH_INTERVAL seconds, and ``render()`` merges the
+snapshots of all workers. The instance id is new in every process, so a
+worker that reuses the pid of a dead one never overwrites its file.
+
+Counters and histograms from exited workers are kept, so totals never go
+backwards after a respawn. Gauges only count live workers: the newest
+snapshot of a running pid, written less than METRICS_STALE_SECONDS ago.
+They are summed across workers unless ``describe()`` gives another merge
+(``max``/``min``, for state gauges such as a circuit breaker's).
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1.0))
+METRICS_STALE_SECONDS = float(os.getenv("METRICS_STALE_SECONDS", 30))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_DESCRIPTIONS = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint'),
+    'stage_duration_seconds': ('histogram', 'Latency of individual scoring pipeline stages'),
+    'stage_errors_total': ('counter', 'Scoring pipeline stages that raised an exception'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (memory_hits, disk_hits, misses, errors)'),
+    'scoring_queue_depth': ('gauge', 'Queued plus running async scoring jobs'),
+}
+
+_GAUGE_MERGE = {}
+_MERGE_FUNCTIONS = {'sum': sum, 'max': max, 'min': min}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+_flusher_pid = None
+_instance = uuid.uuid4().hex[:12]
+_started = time.time()
+
+
+def describe(name, metric_type, help_text, merge='sum'):
+    """Register the type and HELP text of a metric
+
+    Args:
+        merge: How a gauge's values from several workers combine: sum, max or min
+    """
+    if merge not in _MERGE_FUNCTIONS:
+        raise ValueError(f"Unknown gauge merge: {merge}")
+    _DESCRIPTIONS[name] = (metric_type, help_text)
+    _GAUGE_MERGE[name] = merge
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((labels or {}).items())))
+
+
+def inc(name, labels=None, amount=1):
+    """Increment a counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+    _ensure_flusher()
+
+
+def set_gauge(name, value, labels=None):
+    """Set a gauge to value"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+    _ensure_flusher()
+
+
+def observe(name, value, labels=None, buckets=DEFAULT_BUCKETS):
+    """Record a value (usually seconds) in a histogram"""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {'buckets': list(buckets), 'counts': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(hist['buckets']):
+            if value <= bound:
+                hist['counts'][i] += 1
+                break
+        hist['sum'] += value
+        hist['count'] += 1
+    _ensure_flusher()
+
+
+@contextmanager
+def stage(module, name):
+    """Time a pipeline stage into stage_duration_seconds{module, stage}
+
+    Exceptions are counted in stage_errors_total and re-raised.
+    """
+    labels = {'module': module, 'stage': name}
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        inc('stage_errors_total', labels)
+        raise
+    finally:
+        observe('stage_duration_seconds', time.perf_counter() - start, labels)
+
+
+# ===== MULTI-PROCESS SNAPSHOTS =====
+
+def _snapshot():
+    with _lock:
+        return {
+            'pid': os.getpid(),
+            'instance': _instance,
+            'started': _started,
+            'time': time.time(),
+            'counters': [[name, list(labels), value] for (name, labels), value in _counters.items()],
+            'gauges': [[name, list(labels), value] for (name, labels), value in _gauges.items()],
+            'histograms': [[name, list(labels), dict(hist, counts=list(hist['counts']))]
+                           for (name, labels), hist in _histograms.items()],
+        }
+
+
+def flush():
+    """Write this worker's snapshot to METRICS_DIR (no-op when unset)"""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}-{_instance}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def _ensure_flusher():
+    global _flusher_pid, _counters, _histograms, _gauges
+    if not METRICS_DIR or _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        if _flusher_pid is not None:
+            # Forked from a process that already recorded metrics: start clean
+            # so the parent's values are not counted twice
+            _counters, _histograms, _gauges = {}, {}, {}
+        _flusher_pid = os.getpid()
+
+    def loop():
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                flush()
+            except Exception as e:
+                print(f"Error writing metrics snapshot: {str(e)}")
+
+    threading.Thread(target=loop, name='metrics-flush', daemon=True).start()
+
+
+def _reset_lock_after_fork():
+    # The flush thread may have held the lock at fork time. The child is a
+    # new instance and must not write over its parent's snapshot
+    global _lock, _instance, _started
+    _lock = threading.Lock()
+    _instance = uuid.uuid4().hex[:12]
+    _started = time.time()
+
+
+os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect():
+    """Snapshots of every worker, with this process's live registry
+
+    Returns:
+        List of (snapshot, live) pairs; gauges are only read from live ones
+    """
+    own = _snapshot()
+    snapshots = {own['instance']: own}
+    if METRICS_DIR and os.path.isdir(METRICS_DIR):
+        for filename in os.listdir(METRICS_DIR):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(METRICS_DIR, filename)) as f:
+                    snap = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.setdefault(snap.get('instance', filename), snap)
+
+    # Only the newest instance of a pid can still be running it
+    newest = {}
+    for key, snap in snapshots.items():
+        current = newest.get(snap['pid'])
+        if current is None or snap.get('started', 0) > snapshots[current].get('started', 0):
+            newest[snap['pid']] = key
+    now = time.time()
+    collected = []
+    for key, snap in snapshots.items():
+        if key == own['instance']:
+            live = True
+        else:
+            live = (newest[snap['pid']] == key and snap['pid'] != own['pid'] and _pid_alive(snap['pid'])
+                    and now - snap.get('time', 0) < METRICS_STALE_SECONDS)
+        collected.append((snap, live))
+    return collected
+
+
+# ===== PROMETHEUS TEXT FORMAT =====
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Merge all worker snapshots and render them in Prometheus text format"""
+    _ensure_flusher()
+    counters, gauges, histograms = {}, {}, {}
+    for snap, live in _collect():
+        for name, labels, value in snap['counters']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        if live:
+            for name, labels, value in snap['gauges']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                gauges.setdefault(key, []).append(value)
+        for name, labels, hist in snap['histograms']:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = dict(hist, counts=list(hist['counts']))
+            else:
+                merged['counts'] = [a + b for a, b in zip(merged['counts'], hist['counts'])]
+                merged['sum'] += hist['sum']
+                merged['count'] += hist['count']
+
+    gauges = {key: _MERGE_FUNCTIONS[_GAUGE_MERGE.get(key[0], 'sum')](values) for key, values in gauges.items()}
+
+    by_name = {}
+    for kind, series in (('counter', counters), ('gauge', gauges), ('histogram', histograms)):
+        for (name, labels), value in series.items():
+            by_name.setdefault(name, (kind, []))[1].append((labels, value))
+
+    lines = []
+    for name in sorted(by_name):
+        kind, series = by_name[name]
+        help_text = _DESCRIPTIONS.get(name, (kind, name))[1]
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series):
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(value['buckets'], value['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(float(bound))),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return '\n'.join(lines) + '\n'
@@ -1,68 +1,53 @@
-import random
-import librosa
-import os
-from jiwer import wer
-from groq import Groq
-from gtts import gTTS  # Text-to-speech
 from dotenv import load_dotenv
+from audio_io import open_audio
+from admission import Overloaded
+from transcription import transcribe
+from catalog import catalog
+from scoring import align, error_summary
+from tts_store import TTSStore
+import metrics
 
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-
-sentences = [
-    "The sun rises in the east and sets in the west.",
-    "Python is a powerful programming language used worldwide.",
-    "Artificial intelligence is transforming the future of technology.",
-    "Reading books expands knowledge and sharpens the mind.",
-    "A balanced diet is essential for a healthy lifestyle.",
-    "The quick brown fox jumps over the lazy dog.",
-    "Water is the most essential resource for all living beings.",
-    "Cloud computing allows data to be stored and accessed online.",
-    "The earth revolves around the sun in an elliptical orbit.",
-    "Machine learning enables computers to learn from data.",
-    "Listening to music can reduce stress and improve mood.",
-    "Teamwork is the key to achieving great success.",
-    "Renewable energy sources are vital for a sustainable future.",
-    "The internet has revolutionized communication and information sharing."
-]
-
-def generate_audio_for_sentence(sentence_id, output_folder='static/audio'):
-    """Generate TTS audio for a sentence
+
+# Practice sentences, loaded from the content catalog (ids are positions)
+sentences = catalog['moduleB'].items
+
+# Rendered sentence audio, keyed by a hash of (text, voice, speed)
+tts_store = TTSStore()
+
+def generate_audio_for_sentence(sentence_id):
+    """Render TTS audio for a sentence unless it is already in the store
 
     Args:
         sentence_id: Index of the sentence
-        output_folder: Folder to save audio files
 
     Returns:
-        Path to the generated audio file (relative to static folder)
+        TTS store key of the audio, or None if rendering failed
     """
     try:
-        # Create output folder if it doesn't exist
-        os.makedirs(output_folder, exist_ok=True)
-
-        sentence = sentences[sentence_id]
-        filename = f"sentence_{sentence_id}.mp3"
-        filepath = os.path.join(output_folder, filename)
+        key, _ = tts_store.ensure(sentences[sentence_id])
+        return key
+    except Exception as e:
+        print(f"Error generating audio: {str(e)}")
+        return None
 
-        # Check if audio already exists
-        if os.path.exists(filepath):
-            return f"/static/audio/{filename}"
 
-        # Generate TTS audio
-        tts = gTTS(text=sentence, lang='en', slow=False)
-        tts.save(filepath)
+def sentence_audio_key(sentence_id):
+    """TTS store key of a sentence's audio, or None if it is not rendered yet"""
+    return tts_store.key_if_ready(sentences[sentence_id])
 
-        return f"/static/audio/{filename}"
 
-    except Exception as e:
-        print(f"Error generating audio: {str(e)}")
-        return None
+def warm_sentence_audio(workers=4, background=False):
+    """Pre-render the audio of every sentence that is not in the store yet"""
+    if background:
+        return tts_store.warm_in_background(sentences, workers=workers)
+    return tts_store.warm(sentences, workers=workers)
 
 def run_moduleB(audio_path, sentence_id):
     """Process audio for Module B - Listen & Repeat
 
     Args:
-        audio_path: Path to the audio file
+        audio_path: Path to the audio file, or an audio_io.AudioBuffer
         sentence_id: Index of the sentence to compare against
 
     Returns:
@@ -78,19 +63,14 @@ def run_moduleB(audio_path, sentence_id):
 
         expected_sentence = sentences[sentence_id]
 
-        # Transcribe the audio using Groq Whisper
-        with open(audio_path, "rb") as audio_file:
-            transcription_response = client.audio.transcriptions.create(
-                file=(audio_path, audio_file.read()),
-                model="whisper-large-v3",
-                response_format="text"
-            )
-
-        user_text = transcription_response.strip()
+        # Transcribe the audio with the configured ASR backend (Groq Whisper by default)
+        with open_audio(audio_path) as audio, metrics.stage('moduleB', 'transcribe'):
+            user_text = transcribe(audio, model="whisper-large-v3", hint=expected_sentence)
 
-        # Calculate Word Error Rate
-        error_rate = wer(expected_sentence.lower(), user_text.lower())
-        accuracy = max(0, (1 - error_rate) * 100)
+        # Calculate Word Error Rate, keeping the per-word alignment for feedback
+        with metrics.stage('moduleB', 'wer'):
+            alignment = align(expected_sentence, user_text)
+        accuracy = max(0, (1 - alignment['wer']) * 100)
 
         # Generate feedback
         if accuracy >= 90:
@@ -108,9 +88,13 @@ def run_moduleB(audio_path, sentence_id):
             "expected": expected_sentence,
             "transcription": user_text,
             "feedback": feedback,
+            "word_errors": error_summary(alignment),
+            "alignment": alignment,
             "sentence_id": sentence_id
         }
 
+    except Overloaded:
+        raise  # answered with a 503, not scored
     except Exception as e:
         return {
             "error": str(e),
@@ -2,52 +2,45 @@ import random
 import os
 import json
 import re
-from groq import Groq
-from google import genai
+import hashlib
 from dotenv import load_dotenv
+from audio_io import open_audio
+from transcription import transcribe
+from catalog import catalog
+from cache import LRUCache, SQLiteCache, TieredCache
+from backends import get_evaluator
+from admission import Overloaded, admit
+import metrics
 
 load_dotenv()
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-gemini_client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
-
-topics = [
-    "The importance of renewable energy in today's world",
-    "How technology is revolutionizing modern education",
-    "The role of artificial intelligence in healthcare",
-    "Your favorite hobby and why it brings you joy",
-    "The impact of social media on modern society",
-    "How to maintain a healthy lifestyle in busy times",
-    "The importance of effective time management",
-    "The benefits of reading books in the digital age",
-    "Climate change and its global effects",
-    "Your dream vacation destination and why"
-]
-
-def run_moduleC(audio_path):
-    """Process audio for Module C - Topic Speaking
 
-    Args:
-        audio_path: Path to the audio file
+# Speaking topics, loaded from the content catalog (ids are positions)
+topics = catalog['moduleC'].items
 
-    Returns:
-        Dictionary with score, transcription, feedback, and analysis
-    """
-    try:
-        # Get random topic
-        topic = random.choice(topics)
+EVALUATION_MODEL = 'gemini-2.0-flash-exp'
+# Bump whenever the prompt below changes so cached evaluations are not reused
+PROMPT_VERSION = 'v1'
+# Answers shorter than this are scored locally without calling Gemini
+MIN_EVALUATION_WORDS = int(os.getenv("MIN_EVALUATION_WORDS", 5))
+
+EVALUATION_CACHE_TTL = int(os.getenv("EVALUATION_CACHE_TTL", 7 * 24 * 3600))
+EVALUATION_CACHE_DB = os.getenv("EVALUATION_CACHE_DB")
+
+evaluation_cache = TieredCache(
+    LRUCache(int(os.getenv("EVALUATION_CACHE_SIZE", 512)), ttl_seconds=EVALUATION_CACHE_TTL),
+    SQLiteCache(EVALUATION_CACHE_DB, 'evaluation_cache',
+                ttl_seconds=EVALUATION_CACHE_TTL) if EVALUATION_CACHE_DB else None,
+    name='evaluation'
+)
 
-        # Transcribe the audio using Groq Whisper
-        with open(audio_path, "rb") as audio_file:
-            transcription_response = groq_client.audio.transcriptions.create(
-                file=(audio_path, audio_file.read()),
-                model="whisper-large-v3",
-                response_format="text"
-            )
 
-        user_text = transcription_response.strip()
+def normalize_transcript(text):
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return ' '.join(re.sub(r"[^\w\s']", ' ', text.lower()).split())
 
-        # Use Gemini to evaluate the response
-        prompt = f"""You are an English language evaluator. Evaluate the following spoken response on the topic: "{topic}"
+
+def build_prompt(topic, user_text):
+    return f"""You are an English language evaluator. Evaluate the following spoken response on the topic: "{topic}"
 
 User's transcribed response: "{user_text}"
 
@@ -71,20 +64,114 @@ Provide your evaluation in the following JSON format:
 
 Only respond with valid JSON, no additional text."""
 
-        response = gemini_client.models.generate_content(
-            model='gemini-2.0-flash-exp',
-            contents=prompt
-        )
 
-        # Parse the JSON response
-        response_text = response.text.strip()
+def local_evaluation(word_count):
+    """Score a silent or very short answer without an LLM call
 
-        # Remove markdown code blocks if present
-        response_text = re.sub(r'^```json\s*|\s*```$', '', response_text, flags=re.MULTILINE)
+    Each category gets one point per word spoken, so anything below
+    MIN_EVALUATION_WORDS scores well under any real attempt.
+    """
+    if word_count == 0:
+        feedback = "No speech was detected. Please speak clearly into the microphone about the topic."
+    else:
+        feedback = ("Your response was too short to evaluate. Try to speak for at least "
+                    "a few sentences about the topic.")
+    return {
+        "relevance_score": word_count,
+        "grammar_score": word_count,
+        "vocabulary_score": word_count,
+        "coherence_score": word_count,
+        "total_score": word_count * 4,
+        "feedback": feedback,
+        "strengths": [],
+        "improvements": ["Speak for longer and develop your ideas about the topic"]
+    }
+
+
+def evaluate_response(topic, user_text):
+    """Evaluate a transcribed answer, reusing cached evaluations
+
+    Raises:
+        json.JSONDecodeError: If Gemini does not return valid JSON
+        admission.Overloaded: If no LLM slot is free
+    """
+    normalized = normalize_transcript(user_text)
+    word_count = len(normalized.split())
+    if word_count < MIN_EVALUATION_WORDS:
+        return local_evaluation(word_count)
+
+    evaluator = get_evaluator()
+    key_source = f"{PROMPT_VERSION}|{evaluator.name}|{EVALUATION_MODEL}|{topic}|{normalized}"
+    key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+    evaluation = evaluation_cache.get(key)
+    if evaluation is not None:
+        return evaluation
+
+    with admit('llm'), metrics.stage('llm', evaluator.name):
+        response_text = evaluator.generate(build_prompt(topic, user_text), EVALUATION_MODEL)
+
+    # Parse the JSON response
+    response_text = response_text.strip()
+
+    # Remove markdown code blocks if present
+    response_text = re.sub(r'^```json\s*|\s*```$', '', response_text, flags=re.MULTILINE)
+
+    evaluation = json.loads(response_text)
+    evaluation_cache.set(key, evaluation)
+    return evaluation
+
+
+def run_moduleC(audio_path, topic_id=None):
+    """Process audio for Module C - Topic Speaking
+
+    Args:
+        audio_path: Path to the audio file, or an audio_io.AudioBuffer
+        topic_id: Index of the topic answered (random topic if omitted)
+
+    Returns:
+        Dictionary with score, transcription, feedback, and analysis
+    """
+    result = None
+    for _, result in run_moduleC_stages(audio_path, topic_id):
+        pass
+    return result
+
+
+def run_moduleC_stages(audio_path, topic_id=None):
+    """Run Module C step by step, yielding each stage as soon as it is done
+
+    Yields ``('transcript', {...})`` with the topic and transcription once
+    ASR finishes, then ``('result', {...})`` with the same dictionary
+    run_moduleC returns (success False and an error on failure). If
+    transcription fails only the result stage is yielded. admission.Overloaded
+    is raised rather than reported, so the caller can answer 503.
+
+    Args:
+        audio_path: Path to the audio file, or an audio_io.AudioBuffer
+        topic_id: Index of the topic answered (random topic if omitted)
+    """
+    try:
+        if topic_id is not None and 0 <= topic_id < len(topics):
+            topic = topics[topic_id]
+        else:
+            # Get random topic
+            topic = random.choice(topics)
+
+        # Transcribe the audio with the configured ASR backend (Groq Whisper by default)
+        with open_audio(audio_path) as audio, metrics.stage('moduleC', 'transcribe'):
+            user_text = transcribe(audio, model="whisper-large-v3", hint=topic)
+
+        yield 'transcript', {
+            "success": True,
+            "topic": topic,
+            "transcription": user_text
+        }
 
-        evaluation = json.loads(response_text)
+        # Use Gemini (or a cached/local evaluation) to evaluate the response
+        with metrics.stage('moduleC', 'evaluate'):
+            evaluation = evaluate_response(topic, user_text)
 
-        return {
+        yield 'result', {
             "success": True,
             "topic": topic,
             "transcription": user_text,
@@ -98,13 +185,15 @@ Only respond with valid JSON, no additional text."""
             "improvements": evaluation.get("improvements", [])
         }
 
+    except Overloaded:
+        raise
     except json.JSONDecodeError as e:
-        return {
+        yield 'result', {
             "error": f"Failed to parse evaluation: {str(e)}",
             "success": False
         }
     except Exception as e:
-        return {
+        yield 'result', {
             "error": str(e),
             "success": False
         }
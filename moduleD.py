@@ -1,61 +1,202 @@
+import hashlib
 import random
+from bisect import bisect
+from itertools import accumulate
 from typing import List, Dict, Optional, Union
 
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
 # Extended question bank
 questions_bank = [
-    {"sentence": "She ___ going to the market.", "answer": "is", "category": "be_verb"},
-    {"sentence": "They have been friends ___ childhood.", "answer": "since", "category": "preposition"},
-    {"sentence": "He runs faster ___ anyone else.", "answer": "than", "category": "comparison"},
-    {"sentence": "I have lived here ___ five years.", "answer": "for", "category": "preposition"},
-    {"sentence": "This is the ___ book I have ever read.", "answer": "best", "category": "superlative"},
-    {"sentence": "I am looking forward ___ meeting you.", "answer": "to", "category": "phrasal_verb"},
-    {"sentence": "Neither the teacher nor the students ___ ready.", "answer": "are", "category": "subject_verb"},
-    {"sentence": "She has been working here ___ last year.", "answer": "since", "category": "preposition"},
-    {"sentence": "We went to the park ___ it was raining.", "answer": "although", "category": "conjunction"},
-    {"sentence": "I don't like tea, and ___ do I.", "answer": "neither", "category": "negative"},
-    {"sentence": "By the time we arrived, the train ___.", "answer": "had left", "category": "past_perfect"},
-    {"sentence": "There ___ a lot of people at the party.", "answer": "were", "category": "be_verb"},
-    {"sentence": "She speaks English ___ than her brother.", "answer": "better", "category": "comparison"},
-    {"sentence": "If I ___ you, I would take the job.", "answer": "were", "category": "conditional"},
-    {"sentence": "He hasn't called me ___ last week.", "answer": "since", "category": "preposition"},
-    {"sentence": "We stayed at a hotel ___ had a beautiful view.", "answer": "that", "category": "relative_pronoun"},
-    {"sentence": "The book was so interesting that I couldn't ___ it down.", "answer": "put", "category": "phrasal_verb"},
-    {"sentence": "You should not judge a book ___ its cover.", "answer": "by", "category": "preposition"},
-    {"sentence": "I will call you when I ___ home.", "answer": "get", "category": "time_clause"},
-    {"sentence": "She prefers coffee ___ tea.", "answer": "to", "category": "preference"},
-    {"sentence": "The children ___ playing in the garden.", "answer": "are", "category": "present_continuous"},
-    {"sentence": "I wish I ___ speak French fluently.", "answer": "could", "category": "wish"},
-    {"sentence": "The meeting has been ___ until next week.", "answer": "postponed", "category": "passive"},
-    {"sentence": "Either you or your brother ___ to help.", "answer": "has", "category": "either_or"},
-    {"sentence": "She made me ___ for an hour.", "answer": "wait", "category": "causative"}
+    {"sentence": "She ___ going to the market.", "answer": "is", "category": "be_verb", "difficulty": "easy"},
+    {"sentence": "They have been friends ___ childhood.", "answer": "since", "category": "preposition", "difficulty": "medium"},
+    {"sentence": "He runs faster ___ anyone else.", "answer": "than", "category": "comparison", "difficulty": "easy"},
+    {"sentence": "I have lived here ___ five years.", "answer": "for", "category": "preposition", "difficulty": "easy"},
+    {"sentence": "This is the ___ book I have ever read.", "answer": "best", "category": "superlative", "difficulty": "easy"},
+    {"sentence": "I am looking forward ___ meeting you.", "answer": "to", "category": "phrasal_verb", "difficulty": "medium"},
+    {"sentence": "Neither the teacher nor the students ___ ready.", "answer": "are", "category": "subject_verb", "difficulty": "hard"},
+    {"sentence": "She has been working here ___ last year.", "answer": "since", "category": "preposition", "difficulty": "medium"},
+    {"sentence": "We went to the park ___ it was raining.", "answer": "although", "category": "conjunction", "difficulty": "medium"},
+    {"sentence": "I don't like tea, and ___ do I.", "answer": "neither", "category": "negative", "difficulty": "hard"},
+    {"sentence": "By the time we arrived, the train ___.", "answer": "had left", "category": "past_perfect", "difficulty": "hard"},
+    {"sentence": "There ___ a lot of people at the party.", "answer": "were", "category": "be_verb", "difficulty": "easy"},
+    {"sentence": "She speaks English ___ than her brother.", "answer": "better", "category": "comparison", "difficulty": "medium"},
+    {"sentence": "If I ___ you, I would take the job.", "answer": "were", "category": "conditional", "difficulty": "hard"},
+    {"sentence": "He hasn't called me ___ last week.", "answer": "since", "category": "preposition", "difficulty": "medium"},
+    {"sentence": "We stayed at a hotel ___ had a beautiful view.", "answer": "that", "category": "relative_pronoun", "difficulty": "medium"},
+    {"sentence": "The book was so interesting that I couldn't ___ it down.", "answer": "put", "category": "phrasal_verb", "difficulty": "medium"},
+    {"sentence": "You should not judge a book ___ its cover.", "answer": "by", "category": "preposition", "difficulty": "medium"},
+    {"sentence": "I will call you when I ___ home.", "answer": "get", "category": "time_clause", "difficulty": "easy"},
+    {"sentence": "She prefers coffee ___ tea.", "answer": "to", "category": "preference", "difficulty": "medium"},
+    {"sentence": "The children ___ playing in the garden.", "answer": "are", "category": "present_continuous", "difficulty": "easy"},
+    {"sentence": "I wish I ___ speak French fluently.", "answer": "could", "category": "wish", "difficulty": "medium"},
+    {"sentence": "The meeting has been ___ until next week.", "answer": "postponed", "category": "passive", "difficulty": "hard"},
+    {"sentence": "Either you or your brother ___ to help.", "answer": "has", "category": "either_or", "difficulty": "hard"},
+    {"sentence": "She made me ___ for an hour.", "answer": "wait", "category": "causative", "difficulty": "hard"}
 ]
 
-# Store current quiz globally
-current_quiz: List[Dict] = []
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+class QuestionIndex:
+    """Question bank ids grouped by difficulty and category
+
+    Built once, so drawing a quiz costs time proportional to the quiz size
+    and the number of categories, not to the size of the bank.
+    """
+
+    def __init__(self, bank: List[Dict]):
+        self.size = len(bank)
+        # difficulty ("mixed" = all) -> category -> question ids
+        self.groups: Dict[str, Dict[str, List[int]]] = {"mixed": {}}
+        for question_id, question in enumerate(bank):
+            category = question["category"]
+            difficulty = question.get("difficulty", "medium")
+            self.groups["mixed"].setdefault(category, []).append(question_id)
+            self.groups.setdefault(difficulty, {}).setdefault(category, []).append(question_id)
+
+    def sample(self, num_questions: int, difficulty: str = "mixed",
+               miss_rates: Optional[Dict[str, float]] = None, rng=random) -> List[int]:
+        """Draw distinct question ids, favouring categories the user misses
+
+        Each pick chooses a category with probability proportional to its
+        weight (the user's miss rate, or 0.5 for categories without
+        history), then a random unused question from it.
+
+        Args:
+            num_questions: Quiz size (capped at the questions available)
+            difficulty: "easy", "medium", "hard" or "mixed"
+            miss_rates: Category -> miss rate in [0, 1] for this user
+            rng: Random source
+
+        Returns:
+            List of question bank indices
+        """
+        groups = self.groups.get(difficulty) or self.groups["mixed"]
+        miss_rates = miss_rates or {}
+        categories = list(groups)
+        # A floor keeps mastered categories in rotation
+        weights = [max(miss_rates.get(category, 0.5), 0.05) for category in categories]
+        remaining = {category: len(groups[category]) for category in categories}
+        chosen: List[int] = []
+        seen = set()
+        num_questions = min(num_questions, sum(remaining.values()))
+
+        cumulative = list(accumulate(weights))
+        while len(chosen) < num_questions:
+            slot = min(bisect(cumulative, rng.random() * cumulative[-1]), len(categories) - 1)
+            category = categories[slot]
+            ids = groups[category]
+            # Rejection sampling is cheap while few ids of the category are used
+            if remaining[category] * 2 > len(ids):
+                question_id = rng.choice(ids)
+                while question_id in seen:
+                    question_id = rng.choice(ids)
+            else:
+                question_id = rng.choice([i for i in ids if i not in seen])
+            seen.add(question_id)
+            chosen.append(question_id)
+            remaining[category] -= 1
+            if remaining[category] == 0:
+                weights[slot] = 0
+                cumulative = list(accumulate(weights))
+        return chosen
+
+
+question_index = QuestionIndex(questions_bank)
+
+
+def miss_rates_from_stats(stats: Dict[str, tuple]) -> Dict[str, float]:
+    """Smoothed per-category miss rates from (attempts, misses) counts
+
+    Uses a Beta(1, 1) prior so one wrong answer does not dominate.
+    """
+    return {category: (misses + 1) / (attempts + 2) for category, (attempts, misses) in stats.items()}
+
+
+QUIZ_TOKEN_SALT = "moduleD-quiz"
+QUIZ_TOKEN_MAX_AGE = 6 * 3600  # seconds a quiz can be answered after it was issued
+
 
-def get_quiz(num_questions: int = 5, difficulty: str = "mixed") -> Dict:
-    """Generate a new quiz with specified number of questions"""
-    global current_quiz
+class QuizTokenError(Exception):
+    """Raised when a quiz token is missing, tampered with, expired or not the user's"""
 
+
+def _serializer(secret_key: str) -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(secret_key, salt=QUIZ_TOKEN_SALT)
+
+
+def make_quiz_token(question_ids: List[int], secret_key: str, user_id: Optional[int] = None) -> str:
+    """Sign the question bank indices of a quiz (and its owner) into a token"""
+    return _serializer(secret_key).dumps({"q": question_ids, "u": user_id})
+
+
+def load_quiz_token(token: str, secret_key: str, user_id: Optional[int] = None,
+                    max_age: int = QUIZ_TOKEN_MAX_AGE) -> List[int]:
+    """Verify a quiz token and return its question bank indices
+
+    Raises:
+        QuizTokenError: If the token is invalid, expired or issued to another user
+    """
+    if not token:
+        raise QuizTokenError("No active quiz found. Please start a new quiz.")
     try:
-        available_questions = questions_bank.copy()
-        num_questions = min(num_questions, len(available_questions))
-        current_quiz = random.sample(available_questions, num_questions)
+        payload = _serializer(secret_key).loads(token, max_age=max_age)
+    except SignatureExpired:
+        raise QuizTokenError("This quiz has expired. Please start a new quiz.")
+    except BadSignature:
+        raise QuizTokenError("Invalid quiz token. Please start a new quiz.")
+    if payload.get("u") != user_id:
+        raise QuizTokenError("This quiz belongs to another user. Please start a new quiz.")
+    question_ids = payload.get("q") or []
+    if not all(isinstance(i, int) and 0 <= i < len(questions_bank) for i in question_ids):
+        raise QuizTokenError("Invalid quiz token. Please start a new quiz.")
+    return question_ids
+
+
+def get_quiz(secret_key: str, num_questions: int = 5, difficulty: str = "mixed",
+             user_id: Optional[int] = None, miss_rates: Optional[Dict[str, float]] = None) -> Dict:
+    """Generate a new quiz with specified number of questions
+
+    The chosen questions travel with the quiz as a signed ``quiz_token``
+    that must be sent back with the answers, so no quiz state is kept in
+    the process and any worker can grade the submission.
+
+    Args:
+        secret_key: Key used to sign the quiz token
+        num_questions: Number of questions
+        difficulty: "easy", "medium", "hard" or "mixed"
+        user_id: User the quiz is issued to
+        miss_rates: Category -> miss rate for this user (see miss_rates_from_stats);
+            categories the user gets wrong more often are drawn more often
+    """
+    try:
+        if difficulty != "mixed" and difficulty not in DIFFICULTIES:
+            return {
+                "success": False,
+                "error": f"Unknown difficulty: {difficulty}"
+            }
+        question_ids = question_index.sample(num_questions, difficulty, miss_rates)
+        num_questions = len(question_ids)
 
         quiz_questions = []
-        for i, question in enumerate(current_quiz):
+        for i, question_id in enumerate(question_ids):
+            question = questions_bank[question_id]
             quiz_questions.append({
                 "id": i,
                 "sentence": question["sentence"],
                 "category": question["category"],
+                "difficulty": question.get("difficulty", "medium"),
                 "number": i + 1
             })
 
+        token = make_quiz_token(question_ids, secret_key, user_id)
         return {
             "success": True,
             "questions": quiz_questions,
             "total_questions": num_questions,
-            "quiz_id": f"quiz_{random.randint(1000, 9999)}"
+            "quiz_id": f"quiz_{hashlib.sha256(token.encode('utf-8')).hexdigest()[:12]}",
+            "quiz_token": token
         }
 
     except Exception as e:
@@ -64,23 +205,27 @@ def get_quiz(num_questions: int = 5, difficulty: str = "mixed") -> Dict:
             "error": f"Failed to generate quiz: {str(e)}"
         }
 
-def submit_answers(answers: Union[List[str], Dict[str, str]]) -> Dict:
+def submit_answers(answers: Union[List[str], Dict[str, str]], quiz_token: str, secret_key: str,
+                   user_id: Optional[int] = None) -> Dict:
     """
     Evaluate submitted quiz answers
 
     Args:
         answers: List or Dictionary of user answers
+        quiz_token: Token returned by get_quiz for this quiz
+        secret_key: Key the token was signed with
+        user_id: User submitting the answers (must match the token)
 
     Returns:
         Dictionary containing score and detailed results
     """
-    global current_quiz
-
     try:
-        if not current_quiz:
+        try:
+            quiz = [questions_bank[i] for i in load_quiz_token(quiz_token, secret_key, user_id)]
+        except QuizTokenError as e:
             return {
                 "success": False,
-                "error": "No active quiz found. Please start a new quiz."
+                "error": str(e)
             }
 
         # Convert list to dict if needed
@@ -92,7 +237,7 @@ def submit_answers(answers: Union[List[str], Dict[str, str]]) -> Dict:
         score = 0
         results = []
 
-        for idx, question in enumerate(current_quiz):
+        for idx, question in enumerate(quiz):
             user_answer = answers_dict.get(str(idx), "").strip().lower()
             correct_answer = question["answer"].lower()
             is_correct = (user_answer == correct_answer)
@@ -105,10 +250,11 @@ def submit_answers(answers: Union[List[str], Dict[str, str]]) -> Dict:
                 "sentence": question["sentence"],
                 "user_answer": user_answer or "(no answer)",
                 "correct_answer": question["answer"],
+                "category": question["category"],
                 "correct": is_correct
             })
 
-        total_questions = len(current_quiz)
+        total_questions = len(quiz)
         percentage = (score / total_questions) * 100 if total_questions > 0 else 0
 
         return {
@@ -0,0 +1,164 @@
+"""Password hashing on a bounded process pool
+
+Password KDFs are deliberately expensive. Running them inline on request
+threads lets a login storm starve the audio routes of CPU and threads,
+so hashing and verification go to a small dedicated process pool
+instead. At most ``max_pending`` operations may be queued or running;
+beyond that callers get PasswordPoolBusy immediately (mapped to a 503)
+instead of piling up behind the KDF.
+
+    PASSWORD_METHOD=scrypt:32768:8:1   werkzeug hash method for new hashes
+    PASSWORD_WORKERS=2                 KDF processes per app worker (0 = hash inline)
+    PASSWORD_QUEUE_SIZE=16             queued plus running operations
+    PASSWORD_TIMEOUT=10                seconds to wait for a result
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import metrics
+
+PASSWORD_METHOD = os.getenv("PASSWORD_METHOD", "scrypt:32768:8:1")
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", 2))
+PASSWORD_QUEUE_SIZE = int(os.getenv("PASSWORD_QUEUE_SIZE", 16))
+PASSWORD_TIMEOUT = float(os.getenv("PASSWORD_TIMEOUT", 10))
+
+metrics.describe('password_queue_depth', 'gauge', 'Queued plus running password hash operations')
+metrics.describe('password_rejections_total', 'counter', 'Password operations rejected because the pool was full')
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password pool has no room for another operation"""
+
+
+class PasswordHasher:
+    """Hash and verify passwords on a bounded process pool
+
+    Processes are spawned rather than forked, because forking a
+    multi-threaded web worker is unsafe. A spawned process re-runs the
+    parent's ``__main__`` script, which under ``python app.py`` is the
+    whole app (database, job queue, janitor thread). So the pool only
+    runs in a process that called ``start()`` from a safe entry point;
+    gunicorn.conf.py does so in post_worker_init, where ``__main__`` is
+    gunicorn's guarded launcher. Anywhere else (the dev server, flask
+    commands, a preloading master) the KDF runs inline.
+
+    Args:
+        method: werkzeug method string for new hashes (also the rehash target)
+        workers: Pool processes; 0 runs the KDF inline on the calling thread
+        max_pending: Maximum queued plus running operations
+        timeout: Seconds to wait for a result before giving up
+    """
+
+    def __init__(self, method=PASSWORD_METHOD, workers=PASSWORD_WORKERS,
+                 max_pending=PASSWORD_QUEUE_SIZE, timeout=PASSWORD_TIMEOUT):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pool = None
+        self._pid = None
+        self._started = False
+        self._canonical_method = None
+
+    def start(self):
+        """Start the pool processes in this process; until then the KDF runs inline"""
+        if self.workers > 0:
+            self._check_pid()
+            self._started = True
+            self._get_pool().submit(int).result()
+
+    def _check_pid(self):
+        # After a fork the inherited pool and slot count belong to the parent
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = None
+                    self._pending = 0
+                    self._started = False
+                    self._pid = os.getpid()
+
+    def _get_pool(self):
+        self._check_pid()
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _discard_pool(self, pool):
+        # A pool process died (e.g. OOM-killed); the executor is unusable,
+        # so drop it and let the next call start a fresh one
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+            depth = self._pending
+        metrics.set_gauge('password_queue_depth', depth)
+
+    def _run(self, operation, func, *args):
+        self._check_pid()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                rejected = True
+            else:
+                rejected = False
+                self._pending += 1
+                depth = self._pending
+        if rejected:
+            metrics.inc('password_rejections_total', {'operation': operation})
+            raise PasswordPoolBusy("Too many sign-ins in progress, please try again in a moment")
+        metrics.set_gauge('password_queue_depth', depth)
+
+        with metrics.stage('auth', operation):
+            if self.workers <= 0 or not self._started:
+                try:
+                    return func(*args)
+                finally:
+                    self._release()
+            pool = self._get_pool()
+            try:
+                future = pool.submit(func, *args)
+            except BrokenProcessPool:
+                self._release()
+                self._discard_pool(pool)
+                raise PasswordPoolBusy("Password service restarting, please try again")
+            except Exception:
+                self._release()
+                raise
+            # The slot is freed when the KDF actually finishes, even if we stop waiting
+            future.add_done_callback(self._release)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                raise PasswordPoolBusy("Password check timed out, please try again")
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                raise PasswordPoolBusy("Password service restarting, please try again")
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run('hash', generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """True if password matches password_hash"""
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if password_hash was made with a different method or parameters"""
+        if self._canonical_method is None:
+            # werkzeug expands defaults ("scrypt" -> "scrypt:32768:8:1"), so
+            # compare against the prefix it actually writes
+            self._canonical_method = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._canonical_method
@@ -0,0 +1,181 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+
+class PerformanceWriter:
+    """Write-behind buffer for performance rows
+
+    Rows are queued in memory and written in one transaction by a
+    background thread once ``max_rows`` are pending or the oldest row has
+    waited ``max_delay_ms``. ``flush()`` blocks until everything queued so
+    far is committed, and it is registered with ``atexit`` so a graceful
+    worker shutdown does not lose buffered rows. Rows are checked with
+    ``validate`` when they are queued, so a bad row fails its own request
+    instead of the batch.
+
+    A batch that fails with one of ``drop_errors`` (a constraint or
+    validation error) is retried row by row, and only the rows that fail
+    that way on their own are dropped and logged, so one bad row cannot
+    wedge the buffer. Any other error (e.g. ``database is locked``) is
+    treated as transient: the rows go back to the front of the queue and
+    the background thread tries again after ``retry_delay_ms``. A forked
+    child starts with an empty buffer and its own flush thread.
+
+    Args:
+        write_rows: Callable that persists a list of rows in one transaction
+        max_rows: Flush as soon as this many rows are pending
+        max_delay_ms: Flush rows that have waited this long
+        validate: Optional callable raising ValueError for a row that cannot be written
+        retry_delay_ms: Wait this long before retrying after a transient error
+        drop_errors: Exception types meaning a row can never be written
+    """
+
+    def __init__(self, write_rows, max_rows=50, max_delay_ms=200, validate=None,
+                 retry_delay_ms=1000, drop_errors=(sqlite3.IntegrityError, ValueError)):
+        self._write_rows = write_rows
+        self._validate = validate
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self.retry_delay = retry_delay_ms / 1000
+        self.drop_errors = tuple(drop_errors)
+        self._pending = []
+        self._oldest = None
+        self._retry_at = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self.dropped = 0
+        self._start_thread()
+        atexit.register(self.close)
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _start_thread(self):
+        self._thread = threading.Thread(target=self._loop, name='perf-writer', daemon=True)
+        self._thread.start()
+
+    def _reset_after_fork(self):
+        # Rows still pending belong to the parent, which flushes them itself
+        self._pending = []
+        self._oldest = None
+        self._retry_at = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        if not self._closed:
+            self._start_thread()
+
+    def add(self, row):
+        """Queue one row"""
+        self.add_many([row])
+
+    def add_many(self, rows):
+        """Queue several rows
+
+        Raises:
+            ValueError: If ``validate`` rejects any of the rows; none are queued then
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        if self._validate is not None:
+            for row in rows:
+                self._validate(row)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("PerformanceWriter is closed")
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.extend(rows)
+            if first or len(self._pending) >= self.max_rows:
+                # Wake the flush thread to start the delay timer or flush now
+                self._cond.notify()
+
+    def pending(self):
+        """Number of rows not yet handed to the database"""
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self):
+        """Write all queued rows now and wait until they are committed
+
+        Rows hit by a transient error stay queued for a later attempt
+        instead (see ``pending()``).
+
+        Returns:
+            Number of rows dropped because they could not be written
+        """
+        with self._flush_lock:
+            with self._cond:
+                rows, self._pending = self._pending, []
+                oldest, self._oldest = self._oldest, None
+            if not rows:
+                return 0
+            try:
+                self._write_rows(rows)
+                self._retry_at = None
+                return 0
+            except self.drop_errors as e:
+                print(f"Error writing {len(rows)} performance rows, retrying one by one: {str(e)}")
+            except Exception as e:
+                print(f"Error writing {len(rows)} performance rows, will retry: {str(e)}")
+                self._requeue(rows, oldest)
+                return 0
+
+            # Find the rows that fail on their own and keep the rest
+            dropped = 0
+            for index, row in enumerate(rows):
+                try:
+                    self._write_rows([row])
+                except self.drop_errors as e:
+                    dropped += 1
+                    print(f"Dropping performance row {row!r}: {str(e)}")
+                except Exception as e:
+                    print(f"Error writing performance rows, will retry {len(rows) - index}: {str(e)}")
+                    self._requeue(rows[index:], oldest)
+                    break
+            self.dropped += dropped
+            return dropped
+
+    def _requeue(self, rows, oldest):
+        # Put rows back ahead of anything queued since, and hold off the
+        # flush thread so a locked database is not hammered
+        with self._cond:
+            self._pending[:0] = rows
+            self._oldest = oldest if self._oldest is None else min(oldest, self._oldest)
+            self._retry_at = time.monotonic() + self.retry_delay
+
+    def close(self):
+        """Stop the background thread and flush whatever is left"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+        if self._pending:
+            print(f"Lost {len(self._pending)} performance rows at shutdown")
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending:
+                        now = time.monotonic()
+                        if self._retry_at is not None and now < self._retry_at:
+                            wait = self._retry_at - now
+                        elif len(self._pending) >= self.max_rows:
+                            break
+                        else:
+                            wait = self._oldest + self.max_delay - now
+                            if wait <= 0:
+                                break
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+            self.flush()
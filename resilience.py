@@ -0,0 +1,337 @@
+"""Tail-latency control for backend calls
+
+``ResilientCaller.call`` runs one logical backend call as a series of
+attempts:
+
+- the whole call has a deadline, and each attempt a timeout within it
+- failed attempts the backend calls retryable are repeated, after a
+  "full jitter" backoff (uniform between 0 and a doubling ceiling), so
+  retries from many workers do not arrive in lockstep
+- a circuit breaker watches the outcome of recent attempts; when too many
+  fail it opens and calls fail fast with CircuitOpen (a 503, like
+  admission.Overloaded) until a trial call after the cooldown succeeds
+- optionally, an attempt still running after the recent p95 latency is
+  hedged: a duplicate request is sent and the first answer wins. The
+  duplicate needs its own admission slot (see admission.py) and is
+  skipped when none is free, so hedging never exceeds the backend's
+  concurrency limit
+
+State is per worker process. The ASR caller is configured with:
+
+    ASR_DEADLINE=30              seconds for the whole call, across retries and hedges
+    ASR_ATTEMPT_TIMEOUT=15       seconds for one attempt
+    ASR_MAX_ATTEMPTS=3           1 disables retries
+    ASR_RETRY_BASE_DELAY=0.2     backoff ceiling of the first retry, doubled for each later one
+    ASR_RETRY_MAX_DELAY=2
+    ASR_BREAKER_WINDOW=20        recent attempts the breaker looks at
+    ASR_BREAKER_MIN_CALLS=10     attempts needed in the window before it can open
+    ASR_BREAKER_ERROR_RATE=0.5   failure share that opens it
+    ASR_BREAKER_COOLDOWN=10      seconds open before a trial call is let through
+    ASR_HEDGE=0                  1 = hedge attempts slower than the recent p95
+    ASR_HEDGE_MIN_DELAY=0.5      never hedge sooner than this
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import admission
+import metrics
+from backends import BackendTimeout
+
+HEDGE_MIN_SAMPLES = 20  # latencies needed before the p95 is trusted
+
+metrics.describe('backend_attempts_total', 'counter', 'Backend call attempts by backend and outcome')
+metrics.describe('backend_retries_total', 'counter', 'Backend attempts that were retried after a failure')
+metrics.describe('backend_hedges_total', 'counter', 'Hedged attempts by backend and winner (skipped: no free slot)')
+metrics.describe('circuit_state', 'gauge', 'Circuit breaker state: 0 closed, 1 half-open, 2 open (worst worker)',
+                 merge='max')
+metrics.describe('circuit_rejections_total', 'counter', 'Calls failed fast by an open circuit breaker')
+
+
+class CircuitOpen(admission.Overloaded):
+    """Raised instead of calling a backend whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over the last ``window`` attempts
+
+    Args:
+        name: Backend label used in metrics and errors
+        window: Number of recent attempt outcomes considered
+        min_calls: Outcomes needed before the breaker may open
+        error_rate: Failure share (0-1) that opens the breaker
+        cooldown: Seconds to stay open before letting one trial call through
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, name, window=20, min_calls=10, error_rate=0.5, cooldown=10.0):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    @property
+    def state(self):
+        return self._state
+
+    def _set_state(self, state):
+        self._state = state
+        metrics.set_gauge('circuit_state', state, {'backend': self.name})
+
+    def before_call(self):
+        """Let a call through, or raise CircuitOpen
+
+        While half-open, only one trial call is let through at a time.
+        """
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self.cooldown - time.monotonic()
+                if remaining > 0:
+                    self._reject(remaining)
+                self._set_state(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._trial_running:
+                    self._reject(self.cooldown)
+                self._trial_running = True
+
+    def _reject(self, retry_after):
+        metrics.inc('circuit_rejections_total', {'backend': self.name})
+        raise CircuitOpen(f"The {self.name.upper()} service is failing, please try again shortly",
+                          self.name, retry_after=max(1, round(retry_after)))
+
+    def record(self, success):
+        """Record the outcome of an attempt that was let through"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_running = False
+                if success:
+                    self._outcomes.clear()
+                    self._set_state(self.CLOSED)
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self._state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.error_rate):
+                self._open()
+
+    def release(self):
+        """End a trial call without an outcome (e.g. a non-retryable client error)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_running = False
+
+    def _open(self):
+        print(f"Circuit breaker for {self.name} opened")
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._set_state(self.OPEN)
+
+
+class LatencyTracker:
+    """Recent successful attempt latencies, for the hedging delay"""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct):
+        """Nearest-rank percentile, or None with fewer than HEDGE_MIN_SAMPLES samples"""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class ResilientCaller:
+    """Deadlines, jittered retries, a circuit breaker and optional hedging around a backend
+
+    Args:
+        name: Backend label used in metrics and errors
+        deadline: Seconds for a whole call, across retries and hedges
+        attempt_timeout: Seconds for a single attempt
+        max_attempts: Attempts per call (1 = no retries)
+        base_delay: Backoff ceiling of the first retry, doubled per later retry
+        max_delay: Largest backoff ceiling
+        breaker: CircuitBreaker, or None for no breaker
+        hedge: Send a duplicate request when an attempt outlives the recent p95
+        hedge_min_delay: Never hedge sooner than this many seconds
+        limiter: Name of the admission limiter a hedge must get a slot from,
+            or None to hedge without one
+    """
+
+    def __init__(self, name, deadline=30.0, attempt_timeout=15.0, max_attempts=3, base_delay=0.2,
+                 max_delay=2.0, breaker=None, hedge=False, hedge_min_delay=0.5, limiter=None):
+        self.name = name
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.limiter = limiter
+        self.latencies = LatencyTracker()
+        self._rng = random.Random()
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, prefix, name):
+        """Build a caller from ``<prefix>_*`` environment variables (see the module docstring)"""
+        def env(key, default):
+            return os.getenv(f"{prefix}_{key}", default)
+
+        breaker = CircuitBreaker(name,
+                                 window=int(env('BREAKER_WINDOW', 20)),
+                                 min_calls=int(env('BREAKER_MIN_CALLS', 10)),
+                                 error_rate=float(env('BREAKER_ERROR_RATE', 0.5)),
+                                 cooldown=float(env('BREAKER_COOLDOWN', 10)))
+        return cls(name,
+                   deadline=float(env('DEADLINE', 30)),
+                   attempt_timeout=float(env('ATTEMPT_TIMEOUT', 15)),
+                   max_attempts=int(env('MAX_ATTEMPTS', 3)),
+                   base_delay=float(env('RETRY_BASE_DELAY', 0.2)),
+                   max_delay=float(env('RETRY_MAX_DELAY', 2)),
+                   breaker=breaker,
+                   hedge=env('HEDGE', '0') == '1',
+                   hedge_min_delay=float(env('HEDGE_MIN_DELAY', 0.5)),
+                   limiter=name)
+
+    def call(self, attempt, retryable=lambda error: True):
+        """Run ``attempt(timeout)`` until it succeeds, fails for good or the deadline passes
+
+        Args:
+            attempt: Callable doing one backend request within ``timeout`` seconds;
+                it may be called several times, also concurrently when hedging
+            retryable: Callable telling whether an exception is worth retrying
+
+        Returns:
+            The first successful attempt's result
+
+        Raises:
+            CircuitOpen: If the breaker is open
+            BackendTimeout: If the deadline passed without a result
+            Exception: The last attempt's error once retries are exhausted,
+                or the first non-retryable one
+        """
+        deadline = time.monotonic() + self.deadline
+        last_error = None
+        for number in range(1, self.max_attempts + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self.breaker is not None:
+                self.breaker.before_call()
+
+            start = time.monotonic()
+            try:
+                result = self._attempt(attempt, min(self.attempt_timeout, remaining))
+            except Exception as e:
+                if not retryable(e):
+                    metrics.inc('backend_attempts_total', {'backend': self.name, 'outcome': 'rejected'})
+                    if self.breaker is not None:
+                        self.breaker.release()
+                    raise
+                metrics.inc('backend_attempts_total', {'backend': self.name, 'outcome': 'failed'})
+                if self.breaker is not None:
+                    self.breaker.record(False)
+                last_error = e
+            else:
+                metrics.inc('backend_attempts_total', {'backend': self.name, 'outcome': 'ok'})
+                self.latencies.add(time.monotonic() - start)
+                if self.breaker is not None:
+                    self.breaker.record(True)
+                return result
+
+            if number == self.max_attempts:
+                break
+            ceiling = min(self.max_delay, self.base_delay * 2 ** (number - 1))
+            delay = self._rng.uniform(0, ceiling)
+            if time.monotonic() + delay >= deadline:
+                break
+            metrics.inc('backend_retries_total', {'backend': self.name})
+            print(f"{self.name} attempt {number} failed ({str(last_error)}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+
+        if last_error is None:
+            raise BackendTimeout(f"{self.name} call ran out of time ({self.deadline:g}s deadline)")
+        raise last_error
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix=f'{self.name}-hedge')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _attempt(self, attempt, timeout):
+        hedge_delay = self.latencies.percentile(95) if self.hedge else None
+        if hedge_delay is not None:
+            hedge_delay = max(self.hedge_min_delay, hedge_delay)
+        if hedge_delay is None or hedge_delay >= timeout:
+            return attempt(timeout)
+
+        # Run the primary request off-thread so a hedge can race it
+        executor = self._get_executor()
+        primary = executor.submit(attempt, timeout)
+        done, _ = wait([primary], timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        # The primary holds the caller's admission slot; the hedge needs its own
+        limiter = admission.limiters.get(self.limiter) if self.limiter else None
+        if limiter is not None and not limiter.try_acquire():
+            metrics.inc('backend_hedges_total', {'backend': self.name, 'winner': 'skipped'})
+            hedge = None
+            pending = {primary}
+        else:
+            hedge = executor.submit(self._hedged, attempt, timeout - hedge_delay, limiter)
+            pending = {primary, hedge}
+        first_error = None
+        end = time.monotonic() + timeout - hedge_delay
+        while pending:
+            done, pending = wait(pending, timeout=max(0, end - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if hedge is not None:
+                        winner = 'hedge' if future is hedge else 'primary'
+                        metrics.inc('backend_hedges_total', {'backend': self.name, 'winner': winner})
+                    return future.result()
+                first_error = first_error or future.exception()
+        if hedge is not None:
+            metrics.inc('backend_hedges_total', {'backend': self.name, 'winner': 'none'})
+        if first_error is not None and not pending:
+            raise first_error
+        raise BackendTimeout(f"{self.name} attempt timed out after {timeout:.1f}s")
+
+    @staticmethod
+    def _hedged(attempt, timeout, limiter):
+        try:
+            return attempt(timeout)
+        finally:
+            if limiter is not None:
+                limiter.release()
+
+
+asr_caller = ResilientCaller.from_env('ASR', 'asr')
@@ -0,0 +1,211 @@
+"""Word-level alignment scoring for read-aloud and repeat-after-me answers
+
+Target sentences are normalized and tokenized once (``prepare`` is
+memoized). For each alignment the words of both sides are mapped to
+small integers, so the edit distance DP only compares ints. Besides the
+word error rate, ``align`` reports which words were substituted,
+inserted or deleted so the modules can give word-level feedback.
+
+Normalization lowercases, drops punctuation (apostrophes inside words are
+kept), splits hyphenated words and spells out numbers, so "21" and
+"twenty-one" match.
+"""
+import re
+from functools import lru_cache
+
+_ONES = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+         'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen', 'nineteen']
+_TENS = ['', '', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety']
+_SCALES = [(10 ** 9, 'billion'), (10 ** 6, 'million'), (1000, 'thousand'), (100, 'hundred')]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+# Edit operations, as stored in the backtrace table
+OK, SUB, INS, DEL = 0, 1, 2, 3
+OP_NAMES = {OK: 'ok', SUB: 'sub', INS: 'ins', DEL: 'del'}
+
+
+def number_to_words(n):
+    """Spell out a non-negative integer ("105" -> ["one", "hundred", "five"])"""
+    if n < 20:
+        return [_ONES[n]]
+    if n < 100:
+        return [_TENS[n // 10]] + ([_ONES[n % 10]] if n % 10 else [])
+    for value, name in _SCALES:
+        if n >= value:
+            words = number_to_words(n // value) + [name]
+            return words + (number_to_words(n % value) if n % value else [])
+    return [str(n)]
+
+
+def tokenize(text):
+    """Normalize text into a list of words"""
+    words = []
+    for token in _TOKEN_RE.findall((text or '').lower().replace('-', ' ')):
+        if token.isdigit() and len(token) <= 12:
+            words.extend(number_to_words(int(token)))
+        else:
+            words.append(token)
+    return words
+
+
+# ===== WORD IDS =====
+
+def word_ids(ref_words, hyp_words):
+    """Map the words of one alignment to integer ids
+
+    The vocabulary only lives for the call, so transcripts full of unseen
+    words do not grow any shared state.
+
+    Returns:
+        (ref_ids, hyp_ids)
+    """
+    vocab = {}
+    ref_ids = [vocab.setdefault(word, len(vocab)) for word in ref_words]
+    hyp_ids = [vocab.setdefault(word, len(vocab)) for word in hyp_words]
+    return ref_ids, hyp_ids
+
+
+class Prepared:
+    """A tokenized text"""
+
+    __slots__ = ('text', 'words')
+
+    def __init__(self, text):
+        self.text = text
+        self.words = tokenize(text)
+
+
+@lru_cache(maxsize=4096)
+def prepare(text):
+    """Tokenize a target sentence once; repeated targets reuse the result"""
+    return Prepared(text)
+
+
+# ===== ALIGNMENT =====
+
+def _edit_table(ref, hyp):
+    """Levenshtein DP over id lists; returns the backtrace table"""
+    n, m = len(ref), len(hyp)
+    back = [bytearray(m + 1) for _ in range(n + 1)]
+    prev = list(range(m + 1))
+    for j in range(1, m + 1):
+        back[0][j] = INS
+    for i in range(1, n + 1):
+        ref_id = ref[i - 1]
+        row = back[i]
+        row[0] = DEL
+        cur = [i] + [0] * m
+        for j in range(1, m + 1):
+            if hyp[j - 1] == ref_id:
+                best, op = prev[j - 1], OK
+            else:
+                best, op = prev[j - 1] + 1, SUB
+            # On ties prefer a deletion or insertion over a substitution so
+            # that one missing word does not shift every later word
+            if prev[j] + 1 < best or (op == SUB and prev[j] + 1 == best):
+                best, op = prev[j] + 1, DEL
+            if cur[j - 1] + 1 < best or (op == SUB and cur[j - 1] + 1 == best):
+                best, op = cur[j - 1] + 1, INS
+            cur[j] = best
+            row[j] = op
+        prev = cur
+    return back
+
+
+def align(target, transcript):
+    """Align a transcript against a target sentence word by word
+
+    Args:
+        target: Target sentence (str or Prepared)
+        transcript: Transcribed text (str or Prepared)
+
+    Returns:
+        Dictionary with wer, hits, substitutions, deletions, insertions
+        and ``words``: a list of {"op", "ref", "hyp"} in sentence order,
+        where op is "ok", "sub", "del" (target word missing) or "ins"
+        (extra word spoken)
+    """
+    ref = target if isinstance(target, Prepared) else prepare(target)
+    hyp = transcript if isinstance(transcript, Prepared) else Prepared(transcript)
+    ref_ids, hyp_ids = word_ids(ref.words, hyp.words)
+
+    # Matching words at either end are always hits; only the middle needs the DP
+    start = 0
+    limit = min(len(ref_ids), len(hyp_ids))
+    while start < limit and ref_ids[start] == hyp_ids[start]:
+        start += 1
+    end = 0
+    while end < limit - start and ref_ids[-1 - end] == hyp_ids[-1 - end]:
+        end += 1
+
+    counts = {OK: start + end, SUB: 0, INS: 0, DEL: 0}
+    # Built back to front, then reversed
+    words = [{'op': 'ok', 'ref': word, 'hyp': word} for word in reversed(ref.words[len(ref_ids) - end:])]
+    back = _edit_table(ref_ids[start:len(ref_ids) - end], hyp_ids[start:len(hyp_ids) - end])
+    i, j = len(ref_ids) - end - start, len(hyp_ids) - end - start
+    while i > 0 or j > 0:
+        op = back[i][j]
+        counts[op] += 1
+        if op == INS:
+            j -= 1
+            words.append({'op': 'ins', 'ref': None, 'hyp': hyp.words[start + j]})
+        elif op == DEL:
+            i -= 1
+            words.append({'op': 'del', 'ref': ref.words[start + i], 'hyp': None})
+        else:
+            i -= 1
+            j -= 1
+            words.append({'op': OP_NAMES[op], 'ref': ref.words[start + i], 'hyp': hyp.words[start + j]})
+    words.extend({'op': 'ok', 'ref': word, 'hyp': word} for word in reversed(ref.words[:start]))
+    words.reverse()
+
+    errors = counts[SUB] + counts[DEL] + counts[INS]
+    if ref_ids:
+        error_rate = errors / len(ref_ids)
+    else:
+        error_rate = 0.0 if not hyp_ids else 1.0
+    return {
+        'wer': error_rate,
+        'hits': counts[OK],
+        'substitutions': counts[SUB],
+        'deletions': counts[DEL],
+        'insertions': counts[INS],
+        'words': words,
+    }
+
+
+def word_error_rate(target, transcript):
+    """WER only; same normalization as align()"""
+    return align(target, transcript)['wer']
+
+
+def align_batch(targets, transcripts):
+    """Align many transcripts against their targets in one call
+
+    Args:
+        targets: Target sentences (str or Prepared), one per transcript;
+            repeated targets are only tokenized once
+        transcripts: Transcribed texts
+
+    Returns:
+        List of align() results in input order
+    """
+    if len(targets) != len(transcripts):
+        raise ValueError("targets and transcripts must have the same length")
+    return [align(target, transcript) for target, transcript in zip(targets, transcripts)]
+
+
+def error_summary(alignment, limit=5):
+    """Short human-readable list of word errors for feedback text"""
+    parts = []
+    for word in alignment['words']:
+        if word['op'] == 'sub':
+            parts.append(f"'{word['ref']}' heard as '{word['hyp']}'")
+        elif word['op'] == 'del':
+            parts.append(f"missed '{word['ref']}'")
+        elif word['op'] == 'ins':
+            parts.append(f"extra '{word['hyp']}'")
+    if len(parts) > limit:
+        parts = parts[:limit] + [f"and {len(parts) - limit} more"]
+    return ', '.join(parts)
@@ -11,6 +11,7 @@ let audioChunks = [];
 let isRecording = false;
 let audioStream = null;
 let hasPlayedAudio = false;
+let sentenceAudio = null;
 let countdownTimer = null;
 let recordingTimer = null;
 let recordingStartTime = null;
@@ -37,6 +38,61 @@ async function checkMicrophonePermission() {
     }
 }
 
+// Items are prefetched in batches so moving to the next one needs no request
+const PREFETCH_COUNT = MAX_QUESTIONS;
+let itemQueue = [];
+let usedItemIds = [];
+let prefetching = null;
+
+async function fetchBatch() {
+    // Queue a batch of items the user has not seen yet; false if redirected to login
+    let params = new URLSearchParams({ count: PREFETCH_COUNT, exclude: usedItemIds.join(',') });
+    let response = await fetch(`/api/moduleB/sentences?${params}`, { credentials: 'same-origin' });
+    if (response.status === 401) {
+        window.location.href = '/login';
+        return false;
+    }
+    let data = await response.json();
+    if (data.success && data.items.length === 0 && usedItemIds.length > 0) {
+        // Everything has been seen: start over
+        usedItemIds = [];
+        params = new URLSearchParams({ count: PREFETCH_COUNT });
+        response = await fetch(`/api/moduleB/sentences?${params}`, { credentials: 'same-origin' });
+        data = await response.json();
+    }
+    if (!data.success) {
+        throw new Error(data.error || 'Unknown error');
+    }
+    const queued = new Set(itemQueue.map(item => item.sentence_id));
+    for (const item of data.items) {
+        if (!queued.has(item.sentence_id)) {
+            itemQueue.push({ ...item, success: true });
+        }
+    }
+    return true;
+}
+
+async function nextItem() {
+    // Next prefetched item (null if redirected to login); refills the queue in the background
+    if (itemQueue.length === 0) {
+        if (!(await (prefetching || fetchBatch()))) return null;
+    }
+    const item = itemQueue.shift();
+    if (!item) {
+        return { success: false, error: 'No content available' };
+    }
+    usedItemIds.push(item.sentence_id);
+    if (itemQueue.length < 2 && !prefetching) {
+        prefetching = fetchBatch()
+            .catch(error => {
+                console.error('Prefetch error:', error);
+                return true;
+            })
+            .finally(() => { prefetching = null; });
+    }
+    return item;
+}
+
 async function loadSentence() {
     if (questionCount >= MAX_QUESTIONS) {
         goToNextModule();
@@ -45,22 +101,20 @@ async function loadSentence() {
 
     try {
         showLoading(true);
-        const response = await fetch('/api/moduleB/sentence', {
-            method: 'GET',
-            credentials: 'same-origin'
-        });
-
-        if (response.status === 401) {
-            window.location.href = '/login';
-            return;
-        }
-
-        const data = await response.json();
+        const data = await nextItem();
+        if (!data) return; // redirected to login
 
         if (data.success) {
             currentSentenceId = data.sentence_id;
             currentSentence = data.sentence;
             hasPlayedAudio = false;
+
+            // Pre-rendered audio (cached by the browser); null until the server has rendered it
+            sentenceAudio = null;
+            if (data.audio_url) {
+                sentenceAudio = new Audio(data.audio_url);
+                sentenceAudio.preload = 'auto';
+            }
             
             questionCount++;
             updateProgressUI();
@@ -86,6 +140,28 @@ async function playAudio() {
         btn.disabled = true;
         text.textContent = 'Playing...';
 
+        const onPlayed = () => {
+            hasPlayedAudio = true;
+            text.textContent = 'Play Again';
+            btn.disabled = false;
+
+            // Show record section after audio finishes
+            document.getElementById('recordButtonWrapper').style.display = 'flex';
+            document.getElementById('tipText').style.display = 'none';
+        };
+
+        if (sentenceAudio) {
+            sentenceAudio.currentTime = 0;
+            sentenceAudio.onended = onPlayed;
+            try {
+                await sentenceAudio.play();
+                return;
+            } catch (error) {
+                console.error('Audio file playback failed, using speech synthesis:', error);
+                sentenceAudio = null;
+            }
+        }
+
         if ('speechSynthesis' in window) {
             window.speechSynthesis.cancel(); // Clear any previous speech
             
@@ -95,15 +171,7 @@ async function playAudio() {
             utterance.volume = 1;
             utterance.lang = 'en-US';
 
-            utterance.onend = () => {
-                hasPlayedAudio = true;
-                text.textContent = 'Play Again';
-                btn.disabled = false;
-                
-                // Show record section after audio finishes
-                document.getElementById('recordButtonWrapper').style.display = 'flex';
-                document.getElementById('tipText').style.display = 'none';
-            };
+            utterance.onend = onPlayed;
 
             utterance.onerror = (event) => {
                 console.error('Speech synthesis error:', event);
@@ -254,13 +322,38 @@ async function stopRecording() {
     }
 }
 
+const JOB_POLL_INTERVAL = 500; // ms between /api/jobs polls
+const JOB_POLL_TIMEOUT = 120000;
+
+async function waitForJob(job) {
+    // Poll an async scoring job until it finishes and return its result
+    const deadline = Date.now() + JOB_POLL_TIMEOUT;
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+        const response = await fetch(job.poll_url, { credentials: 'same-origin' });
+        if (response.status === 401) {
+            window.location.href = '/login';
+            return null;
+        }
+        const status = await response.json();
+        if (status.status === 'done') {
+            return status.result;
+        }
+        if (status.status === 'failed' || !status.success) {
+            return { success: false, error: status.error || 'Scoring failed' };
+        }
+    }
+    return { success: false, error: 'Timed out waiting for results' };
+}
+
 async function submitAudio(audioBlob) {
     const formData = new FormData();
-    formData.append('audio', audioBlob, 'recording.wav');
+    // Fields first: the server checks them before it reads the recording
     formData.append('sentence_id', currentSentenceId);
+    formData.append('audio', audioBlob, 'recording.wav');
 
     try {
-        const response = await fetch('/api/moduleB', {
+        const response = await fetch('/api/moduleB?mode=async', {
             method: 'POST',
             body: formData,
             credentials: 'same-origin'
@@ -271,7 +364,11 @@ async function submitAudio(audioBlob) {
             return;
         }
 
-        const result = await response.json();
+        let result = await response.json();
+        if (response.status === 202 && result.job_id) {
+            result = await waitForJob(result);
+            if (!result) return;
+        }
 
         if (result.success) {
             displayResults(result);
@@ -294,7 +391,10 @@ function displayResults(result) {
     const transcription = result.transcription || result.transcribed_text || 'No transcription';
     document.getElementById('transcription').textContent = transcription;
 
-    const feedback = result.feedback || 'No feedback available';
+    let feedback = result.feedback || 'No feedback available';
+    if (result.word_errors) {
+        feedback += ` (${result.word_errors})`;
+    }
     document.getElementById('feedback').textContent = feedback;
 
     document.getElementById('results').style.display = 'flex';
@@ -35,6 +35,61 @@ async function checkMicrophonePermission() {
     }
 }
 
+// Items are prefetched in batches so moving to the next one needs no request
+const PREFETCH_COUNT = MAX_QUESTIONS;
+let itemQueue = [];
+let usedItemIds = [];
+let prefetching = null;
+
+async function fetchBatch() {
+    // Queue a batch of items the user has not seen yet; false if redirected to login
+    let params = new URLSearchParams({ count: PREFETCH_COUNT, exclude: usedItemIds.join(',') });
+    let response = await fetch(`/api/moduleC/topics?${params}`, { credentials: 'same-origin' });
+    if (response.status === 401) {
+        window.location.href = '/login';
+        return false;
+    }
+    let data = await response.json();
+    if (data.success && data.items.length === 0 && usedItemIds.length > 0) {
+        // Everything has been seen: start over
+        usedItemIds = [];
+        params = new URLSearchParams({ count: PREFETCH_COUNT });
+        response = await fetch(`/api/moduleC/topics?${params}`, { credentials: 'same-origin' });
+        data = await response.json();
+    }
+    if (!data.success) {
+        throw new Error(data.error || 'Unknown error');
+    }
+    const queued = new Set(itemQueue.map(item => item.topic_id));
+    for (const item of data.items) {
+        if (!queued.has(item.topic_id)) {
+            itemQueue.push({ ...item, success: true });
+        }
+    }
+    return true;
+}
+
+async function nextItem() {
+    // Next prefetched item (null if redirected to login); refills the queue in the background
+    if (itemQueue.length === 0) {
+        if (!(await (prefetching || fetchBatch()))) return null;
+    }
+    const item = itemQueue.shift();
+    if (!item) {
+        return { success: false, error: 'No content available' };
+    }
+    usedItemIds.push(item.topic_id);
+    if (itemQueue.length < 2 && !prefetching) {
+        prefetching = fetchBatch()
+            .catch(error => {
+                console.error('Prefetch error:', error);
+                return true;
+            })
+            .finally(() => { prefetching = null; });
+    }
+    return item;
+}
+
 async function loadTopic() {
     // Check if completed 5 topics
     if (questionCount >= MAX_QUESTIONS) {
@@ -44,17 +99,8 @@ async function loadTopic() {
 
     try {
         showLoading(true);
-        const response = await fetch('/api/moduleC/topic', {
-            method: 'GET',
-            credentials: 'same-origin'
-        });
-
-        if (response.status === 401) {
-            window.location.href = '/login';
-            return;
-        }
-
-        const data = await response.json();
+        const data = await nextItem();
+        if (!data) return; // redirected to login
 
         if (data.success) {
             currentTopicId = data.topic_id;
@@ -210,15 +256,71 @@ function updateTimerDisplay() {
     document.getElementById('timeRemaining').textContent = display;
 }
 
+const JOB_POLL_INTERVAL = 500; // ms between /api/jobs polls
+const JOB_POLL_TIMEOUT = 120000;
+
+async function waitForJob(job) {
+    // Poll an async scoring job until it finishes and return its result
+    const deadline = Date.now() + JOB_POLL_TIMEOUT;
+    while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+        const response = await fetch(job.poll_url, { credentials: 'same-origin' });
+        if (response.status === 401) {
+            window.location.href = '/login';
+            return null;
+        }
+        const status = await response.json();
+        if (status.status === 'done') {
+            return status.result;
+        }
+        if (status.status === 'failed' || !status.success) {
+            return { success: false, error: status.error || 'Scoring failed' };
+        }
+    }
+    return { success: false, error: 'Timed out waiting for results' };
+}
+
+async function readStages(response, onStage) {
+    // Read a newline-delimited JSON response, calling onStage for each line;
+    // returns the last line (the final result)
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    let last = null;
+    while (true) {
+        const { done, value } = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffered.split('\n');
+        buffered = done ? '' : lines.pop();
+        for (const line of lines) {
+            if (line.trim()) {
+                last = JSON.parse(line);
+                onStage(last);
+            }
+        }
+        if (done) return last;
+    }
+}
+
+function displayTranscript(stage) {
+    // Show the transcript while the evaluation is still running
+    document.getElementById('score').textContent = '...';
+    document.getElementById('transcription').textContent = stage.transcription || 'No transcription available';
+    document.getElementById('analysis').textContent = 'Evaluating your answer...';
+    document.getElementById('feedback').textContent = 'Evaluating your answer...';
+    document.getElementById('results').style.display = 'flex';
+}
+
 async function submitAudio(audioBlob) {
     const formData = new FormData();
-    formData.append('audio', audioBlob, 'recording.wav');
+    // Fields first: the server checks them before it reads the recording
     formData.append('topic_id', currentTopicId);
+    formData.append('audio', audioBlob, 'recording.wav');
 
     try {
         console.log('Submitting audio, topic_id:', currentTopicId);
         
-        const response = await fetch('/api/moduleC', {
+        const response = await fetch('/api/moduleC?mode=stream', {
             method: 'POST',
             body: formData,
             credentials: 'same-origin'
@@ -229,7 +331,19 @@ async function submitAudio(audioBlob) {
             return;
         }
 
-        const result = await response.json();
+        let result;
+        if ((response.headers.get('Content-Type') || '').includes('ndjson')) {
+            result = await readStages(response, stage => {
+                if (stage.stage === 'transcript') displayTranscript(stage);
+            });
+            result = result || { success: false, error: 'No response from server' };
+        } else {
+            result = await response.json();
+            if (response.status === 202 && result.job_id) {
+                result = await waitForJob(result);
+                if (!result) return;
+            }
+        }
         console.log('Backend response:', result);
 
         if (result.success) {
@@ -172,7 +172,8 @@ async function submitQuiz() {
             },
             credentials: 'same-origin',
             body: JSON.stringify({
-                answers: answersArray
+                answers: answersArray,
+                quiz_token: quizData.quiz_token
             })
         });
 
@@ -0,0 +1,48 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app is a set of top-level modules; make them importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline, fast settings; they must be in place before any app module is imported
+_TEST_DIR = tempfile.mkdtemp(prefix='app-tests-')
+os.environ.update({
+    'USER_DB': os.path.join(_TEST_DIR, 'users.db'),
+    'TTS_DIR': os.path.join(_TEST_DIR, 'tts'),
+    'ASR_BACKEND': 'fake',
+    'LLM_BACKEND': 'fake',
+    'FAKE_ASR_LATENCY': 'fixed:0',
+    'FAKE_LLM_LATENCY': 'fixed:0',
+    'TTS_WARM_ON_START': '0',
+    'TTS_WARM_ON_MISS': '0',
+    'PASSWORD_WORKERS': '0',
+    'PASSWORD_METHOD': 'pbkdf2:sha256:1000',
+})
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """The app module, imported once against a throwaway database"""
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def signup(app_module):
+    """Create a user and return a logged-in test client for them"""
+    created = []
+
+    def make(email=None, password='test-password'):
+        email = email or f'user{len(created)}-{os.urandom(4).hex()}@example.com'
+        client = app_module.app.test_client()
+        client.post('/signup', json={'email': email, 'username': 'tester', 'password': password})
+        client.post('/login', json={'email': email, 'password': password})
+        client.get('/')  # starts the report session
+        created.append(email)
+        return client
+
+    return make
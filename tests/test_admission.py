@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from admission import Limiter, Overloaded
+
+
+def test_slots_up_to_the_limit_are_granted():
+    limiter = Limiter('t', max_concurrency=2, max_waiting=0, queue_timeout=0)
+    with limiter.slot(), limiter.slot():
+        assert limiter._active == 2
+    assert limiter._active == 0
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    limiter = Limiter('t', max_concurrency=1, max_waiting=0, queue_timeout=1, retry_after=7)
+    with limiter.slot():
+        with pytest.raises(Overloaded) as raised:
+            with limiter.slot():
+                pass
+        assert raised.value.backend == 't'
+        assert raised.value.retry_after == 7
+        with pytest.raises(Overloaded):
+            limiter.check()
+    limiter.check()
+
+
+def test_waiting_caller_times_out():
+    limiter = Limiter('t', max_concurrency=1, max_waiting=1, queue_timeout=0.05)
+    with limiter.slot():
+        limiter.check()  # a waiting place is still free
+        start = time.monotonic()
+        with pytest.raises(Overloaded, match='Timed out'):
+            with limiter.slot():
+                pass
+        assert time.monotonic() - start >= 0.05
+    assert limiter._waiting == 0
+
+
+def test_waiting_caller_gets_the_released_slot():
+    limiter = Limiter('t', max_concurrency=1, max_waiting=1, queue_timeout=2)
+    held = limiter.slot()
+    held.__enter__()
+    got = []
+
+    def waiter():
+        with limiter.slot():
+            got.append(True)
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.05)
+    assert limiter._waiting == 1
+    held.__exit__(None, None, None)
+    thread.join(timeout=2)
+    assert got == [True]
+
+
+def test_try_acquire_never_waits_or_jumps_the_queue():
+    limiter = Limiter('t', max_concurrency=2, max_waiting=4, queue_timeout=1)
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    limiter._waiting = 1  # someone is queued for the free slot
+    assert not limiter.try_acquire()
+    limiter._waiting = 0
+    assert limiter.try_acquire()
+
+
+def test_zero_concurrency_disables_the_limit():
+    limiter = Limiter('t', max_concurrency=0, max_waiting=0, queue_timeout=0)
+    with limiter.slot(), limiter.slot(), limiter.slot():
+        limiter.check()
+
+
+def test_module_check_covers_every_named_backend(monkeypatch):
+    monkeypatch.setitem(admission.limiters, 'asr', Limiter('asr', 1, 0, 0))
+    monkeypatch.setitem(admission.limiters, 'llm', Limiter('llm', 1, 0, 0))
+    with admission.admit('llm'):
+        admission.check('asr')
+        with pytest.raises(Overloaded) as raised:
+            admission.check('asr', 'llm')
+        assert raised.value.backend == 'llm'
@@ -0,0 +1,23 @@
+import os
+import time
+
+from audio_io import SPOOL_PREFIX, clean_spool_dir
+
+
+def touch(path, age):
+    with open(path, 'wb') as f:
+        f.write(b'x')
+    at = time.time() - age
+    os.utime(path, (at, at))
+
+
+def test_clean_spool_dir_only_removes_old_spool_files(tmp_path):
+    touch(tmp_path / f'{SPOOL_PREFIX}old.wav', 7200)
+    touch(tmp_path / f'{SPOOL_PREFIX}new.wav', 10)
+    touch(tmp_path / 'notes.txt', 7200)
+    assert clean_spool_dir(str(tmp_path), max_age_seconds=3600) == 1
+    assert sorted(os.listdir(tmp_path)) == ['notes.txt', f'{SPOOL_PREFIX}new.wav']
+
+
+def test_clean_spool_dir_tolerates_a_missing_directory(tmp_path):
+    assert clean_spool_dir(str(tmp_path / 'missing')) == 0
@@ -0,0 +1,151 @@
+import io
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import wave
+
+import pytest
+
+from audio_probe import probe, probe_duration
+
+
+def make_wav(seconds, rate=16000, channels=1):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b'\x00\x00' * channels * int(rate * seconds))
+    return buf.getvalue()
+
+
+# ----- WAV -----
+
+def test_wav():
+    info = probe(io.BytesIO(make_wav(1.5, rate=16000, channels=2)))
+    assert info['container'] == 'wav'
+    assert info['codec'] == 'pcm'
+    assert (info['sample_rate'], info['channels']) == (16000, 2)
+    assert info['duration'] == pytest.approx(1.5)
+    assert info['declared_duration'] == pytest.approx(1.5)
+
+
+# ----- FLAC -----
+
+def make_flac_header(rate, channels, total_samples):
+    packed = (rate << 44) | ((channels - 1) << 41) | (15 << 36) | total_samples
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + packed.to_bytes(8, 'big') + b'\x00' * 16
+    return b'fLaC' + bytes([0x80]) + len(streaminfo).to_bytes(3, 'big') + streaminfo
+
+
+def test_flac():
+    info = probe(io.BytesIO(make_flac_header(44100, 2, 44100 * 3)))
+    assert (info['container'], info['codec']) == ('flac', 'flac')
+    assert (info['sample_rate'], info['channels']) == (44100, 2)
+    assert info['duration'] == pytest.approx(3.0)
+    assert info['declared_duration'] == pytest.approx(3.0)
+
+
+# ----- WebM -----
+
+def ebml_id(element_id):
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+
+
+def element(element_id, payload, unknown_size=False):
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else bytes([0x80 | len(payload)])
+    return ebml_id(element_id) + size + payload
+
+
+def make_webm(duration_ms=None, block_timecodes=()):
+    info = element(0x2AD7B1, (1000000).to_bytes(3, 'big'))
+    if duration_ms is not None:
+        info += element(0x4489, struct.pack('>d', duration_ms))
+    audio = element(0xB5, struct.pack('>d', 48000.0)) + element(0x9F, b'\x01')
+    track = element(0xAE, element(0x86, b'A_OPUS') + element(0xE1, audio))
+    body = element(0x1549A966, info) + element(0x1654AE6B, track)
+    if block_timecodes:
+        blocks = element(0xE7, b'\x00')
+        for timecode in block_timecodes:
+            blocks += element(0xA3, b'\x81' + struct.pack('>h', timecode) + b'\x80' + b'\x00' * 4)
+        body += element(0x1F43B675, blocks, unknown_size=True)
+    header = element(0x1A45DFA3, element(0x4282, b'webm'))
+    return header + element(0x18538067, body, unknown_size=True)
+
+
+def test_webm_with_duration():
+    info = probe(io.BytesIO(make_webm(duration_ms=2500.0)))
+    assert (info['container'], info['codec']) == ('webm', 'A_OPUS')
+    assert (info['sample_rate'], info['channels']) == (48000, 1)
+    assert info['duration'] == pytest.approx(2.5)
+    assert info['declared_duration'] == pytest.approx(2.5)
+
+
+def test_media_recorder_webm_without_duration_uses_the_last_block():
+    info = probe(io.BytesIO(make_webm(block_timecodes=(0, 20, 1980))))
+    assert info['duration'] == pytest.approx(1.98)
+    assert info['declared_duration'] is None
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='needs ffmpeg')
+def test_ffmpeg_webm(tmp_path):
+    wav, webm = tmp_path / 'in.wav', tmp_path / 'out.webm'
+    wav.write_bytes(make_wav(2.0, rate=48000))
+    subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', str(wav), '-c:a', 'libopus', str(webm)], check=True)
+    with open(webm, 'rb') as f:
+        info = probe(f)
+    assert (info['container'], info['codec']) == ('webm', 'A_OPUS')
+    assert info['duration'] == pytest.approx(2.0, abs=0.05)
+
+
+def test_bench_webm_clip_without_duration():
+    # The hand-built clip bench_duration.py times when ffmpeg is missing
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+    from bench_duration import make_media_recorder_webm
+    info = probe(io.BytesIO(make_media_recorder_webm(12.0)))
+    assert info['container'] == 'webm'
+    assert info['declared_duration'] is None
+    assert info['duration'] == pytest.approx(12.0, abs=0.02)
+
+
+# ----- Ogg -----
+
+def ogg_page(packet, granule, sequence):
+    segments = [255] * (len(packet) // 255) + [len(packet) % 255]
+    header = b'OggS' + struct.pack('<BBqIIIB', 0, 0, granule, 1, sequence, 0, len(segments))
+    return header + bytes(segments) + packet
+
+
+def test_ogg_opus_subtracts_pre_skip():
+    head = b'OpusHead' + struct.pack('<BBHIhB', 1, 2, 312, 16000, 0, 0)
+    data = ogg_page(head, 0, 0) + ogg_page(b'OpusTags', 0, 1) + ogg_page(b'\x00' * 100, 48000 * 2 + 312, 2)
+    info = probe(io.BytesIO(data))
+    assert (info['container'], info['codec']) == ('ogg', 'opus')
+    assert (info['sample_rate'], info['channels']) == (16000, 2)
+    assert info['duration'] == pytest.approx(2.0)
+
+
+def test_ogg_vorbis():
+    head = b'\x01vorbis' + struct.pack('<IBIiiiBB', 0, 1, 22050, 0, 0, 0, 0xB8, 1)
+    data = ogg_page(head, 0, 0) + ogg_page(b'\x00' * 100, 22050 * 3, 1)
+    info = probe(io.BytesIO(data))
+    assert (info['codec'], info['sample_rate'], info['channels']) == ('vorbis', 22050, 1)
+    assert info['duration'] == pytest.approx(3.0)
+
+
+# ----- Unknown and malformed -----
+
+def test_unknown_container():
+    info = probe(io.BytesIO(b'ID3\x04' + b'\x00' * 100))
+    assert info['container'] is None
+    assert probe_duration(io.BytesIO(b'ID3\x04')) is None
+
+
+def test_truncated_header_does_not_raise_and_rewinds():
+    fileobj = io.BytesIO(make_wav(1.0)[:20])
+    info = probe(fileobj)
+    assert info['container'] == 'wav'
+    assert info['duration'] is None
+    assert fileobj.tell() == 0
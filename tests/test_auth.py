@@ -0,0 +1,54 @@
+import sqlite3
+
+from werkzeug.security import generate_password_hash
+
+
+def write_lock_free(path):
+    """True if another connection can take the database write lock right now"""
+    conn = sqlite3.connect(path, timeout=0, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ROLLBACK")
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def test_rehash_on_login_does_not_hold_the_write_lock(app_module, monkeypatch):
+    email = 'rehash@example.com'
+    old_hash = generate_password_hash('secret', 'pbkdf2:sha256:500')
+    with app_module.db.transaction() as conn:
+        conn.execute("INSERT INTO users (email, username, password_hash) VALUES (?, ?, ?)",
+                     (email, 'rehash', old_hash))
+
+    hasher = app_module.password_hasher
+    original_hash = hasher.hash
+    lock_free_while_hashing = []
+
+    def hash_and_check(password):
+        lock_free_while_hashing.append(write_lock_free(app_module.app.config['USER_DB']))
+        return original_hash(password)
+
+    monkeypatch.setattr(hasher, 'hash', hash_and_check)
+    ok, user = app_module.verify_user(email, 'secret')
+
+    assert ok
+    assert lock_free_while_hashing == [True]
+    new_hash = app_module.get_db().execute("SELECT password_hash FROM users WHERE email = ?",
+                                           (email,)).fetchone()[0]
+    assert new_hash != old_hash
+    assert not hasher.needs_rehash(new_hash)
+    assert app_module.verify_user(email, 'secret')[0]
+
+
+def test_wrong_password_is_not_rehashed(app_module, monkeypatch):
+    email = 'norehash@example.com'
+    with app_module.db.transaction() as conn:
+        conn.execute("INSERT INTO users (email, username, password_hash) VALUES (?, ?, ?)",
+                     (email, 'norehash', generate_password_hash('secret', 'pbkdf2:sha256:500')))
+    calls = []
+    monkeypatch.setattr(app_module.password_hasher, 'hash', lambda password: calls.append(password))
+    assert app_module.verify_user(email, 'wrong') == (False, "Invalid credentials")
+    assert calls == []
@@ -0,0 +1,98 @@
+import io
+import os
+import time
+import wave
+
+
+def make_wav(seconds=1.0, rate=16000):
+    """Noise WAV; every call gives different bytes so the transcription cache misses"""
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(os.urandom(2 * int(rate * seconds)))
+    return buf.getvalue()
+
+
+def post_batch(client, items, module='moduleA'):
+    """items: (sentence_id, filename) pairs, sent in order"""
+    data = {'sentence_id': [str(sentence_id) for sentence_id, _ in items],
+            'audio': [(io.BytesIO(make_wav()), filename) for _, filename in items]}
+    return client.post(f'/api/{module}/batch', data=data, content_type='multipart/form-data')
+
+
+def saved_rows(app_module, client):
+    with client.session_transaction() as sess:
+        user_id = sess['user_id']
+    return [row[0] for row in app_module.get_db().execute(
+        "SELECT question_number FROM user_performance WHERE user_id = ? ORDER BY id", (user_id,))]
+
+
+def test_mixed_batch_reports_each_item_in_request_order(app_module, signup):
+    client = signup()
+    response = post_batch(client, [(0, 'a.wav'), ('abc', 'b.wav'), (9999, 'c.wav'), (1, ''), (2, 'e.wav')])
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['success'], body['count'], body['failed']) == (True, 5, 3)
+    results = body['results']
+    assert [item['index'] for item in results] == [0, 1, 2, 3, 4]
+    assert [item['success'] for item in results] == [True, False, False, False, True]
+    assert [item['sentence_id'] for item in results] == [0, 'abc', '9999', 1, 2]
+    assert results[1]['error'] == results[2]['error'] == 'Invalid sentence_id'
+    assert results[3]['error'] == 'No file selected'
+    assert 'score' in results[0] and 'score' in results[4]
+    # Only the scored items count as attempts
+    assert saved_rows(app_module, client) == [0, 2]
+
+
+def test_scoring_error_fails_only_its_item(app_module, signup, monkeypatch):
+    run_moduleA = app_module.run_moduleA
+
+    def flaky(audio, sentence_id):
+        if sentence_id == 1:
+            raise RuntimeError('ASR exploded')
+        return run_moduleA(audio, sentence_id)
+
+    monkeypatch.setattr(app_module, 'run_moduleA', flaky)
+    client = signup()
+    body = post_batch(client, [(0, 'a.wav'), (1, 'b.wav'), (2, 'c.wav')]).get_json()
+    assert body['failed'] == 1
+    assert [item['success'] for item in body['results']] == [True, False, True]
+    assert body['results'][1] == {'error': 'ASR exploded', 'success': False, 'sentence_id': 1, 'index': 1}
+    assert saved_rows(app_module, client) == [0, 2]
+
+
+def test_results_follow_request_order_not_completion_order(app_module, signup, monkeypatch):
+    def score(module, audio, sentence_id):
+        audio.close()
+        time.sleep(0.05 * (3 - sentence_id))  # the first item finishes last
+        return {'success': True, 'sentence_id': sentence_id, 'score': 50, 'finished_at': time.monotonic()}
+
+    monkeypatch.setattr(app_module, 'score_batch_item', score)
+    client = signup()
+    results = post_batch(client, [(0, 'a.wav'), (1, 'b.wav'), (2, 'c.wav')]).get_json()['results']
+    assert [item['sentence_id'] for item in results] == [0, 1, 2]
+    assert results[0]['finished_at'] > results[2]['finished_at']
+
+
+def test_batch_over_the_size_limit_is_refused_before_scoring(app_module, signup, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'score_batch_item', lambda *args: calls.append(args))
+    monkeypatch.setitem(app_module.app.config, 'BATCH_MAX_ITEMS', 2)
+    client = signup()
+    response = post_batch(client, [(0, 'a.wav'), (1, 'b.wav'), (2, 'c.wav')])
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'At most 2 recordings per batch', 'success': False}
+    assert calls == []
+    assert saved_rows(app_module, client) == []
+
+
+def test_malformed_batches(signup):
+    client = signup()
+    mismatched = client.post('/api/moduleA/batch', data={'sentence_id': ['0', '1'],
+                                                         'audio': [(io.BytesIO(make_wav()), 'a.wav')]},
+                             content_type='multipart/form-data')
+    assert mismatched.status_code == 400
+    assert client.post('/api/moduleA/batch', data={}, content_type='multipart/form-data').status_code == 400
+    assert post_batch(client, [(0, 'a.wav')], module='moduleC').status_code == 404
@@ -0,0 +1,105 @@
+import io
+import time
+
+import pytest
+
+import backends
+import transcription
+from audio_io import AudioBuffer
+from backends import FakeTranscriber
+from cache import LRUCache, SQLiteCache, TieredCache
+
+
+# ----- Tiers -----
+
+def test_lru_evicts_the_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # b is now the oldest
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+
+def test_lru_ttl(monkeypatch):
+    cache = LRUCache(ttl_seconds=10)
+    cache.set('a', 1)
+    later = time.time() + 11
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_sqlite_tier_persists_and_trims(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = SQLiteCache(path, 'asr', max_entries=2, evict_every=1000)
+    for key in 'abc':
+        cache.set(key, {'text': key})
+    assert SQLiteCache(path, 'asr').get('a') == {'text': 'a'}  # visible to another instance
+    cache.evict()
+    remaining = [key for key in 'abc' if cache.get(key) is not None]
+    assert len(remaining) == 2
+
+
+def test_sqlite_tier_ttl(tmp_path, monkeypatch):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), 'asr', ttl_seconds=10)
+    cache.set('a', 'text')
+    later = time.time() + 11
+    monkeypatch.setattr(time, 'time', lambda: later)
+    assert cache.get('a') is None
+
+
+def test_tiered_cache_promotes_disk_hits_and_counts(tmp_path):
+    disk = SQLiteCache(str(tmp_path / 'cache.db'), 'asr')
+    disk.set('a', 'text')
+    cache = TieredCache(LRUCache(), disk, name='test')
+    assert cache.get('a') == 'text'  # disk hit, copied to memory
+    assert cache.get('a') == 'text'  # memory hit
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 1, 1)
+    assert stats['hit_ratio'] == pytest.approx(2 / 3, abs=1e-4)
+
+
+# ----- Transcription cache -----
+
+class CountingTranscriber(FakeTranscriber):
+    def __init__(self):
+        super().__init__(latency='fixed:0', failure_rate=0, word_error_rate=0)
+        self.calls = 0
+
+    def transcribe(self, upload, model, hint=None, timeout=None):
+        self.calls += 1
+        return super().transcribe(upload, model, hint, timeout)
+
+
+@pytest.fixture
+def transcriber(monkeypatch):
+    counting = CountingTranscriber()
+    monkeypatch.setattr(backends, '_transcriber', counting)
+    monkeypatch.setattr(transcription, 'transcription_cache', TieredCache(LRUCache(), name='test'))
+    return counting
+
+
+def recording(data=b'RIFF-same-bytes'):
+    return AudioBuffer(io.BytesIO(data))
+
+
+def test_identical_audio_is_transcribed_once(transcriber):
+    first = transcription.transcribe(recording(), hint='the cat sat')
+    second = transcription.transcribe(recording(), hint='the cat sat')
+    assert first == second == 'the cat sat'
+    assert transcriber.calls == 1
+
+
+def test_the_hint_is_part_of_the_key(transcriber):
+    assert transcription.transcribe(recording(), hint='the cat sat') == 'the cat sat'
+    assert transcription.transcribe(recording(), hint='python is fun') == 'python is fun'
+    assert transcriber.calls == 2
+
+
+def test_different_audio_misses(transcriber):
+    transcription.transcribe(recording(b'one'), hint='x')
+    transcription.transcribe(recording(b'two'), hint='x')
+    assert transcriber.calls == 2
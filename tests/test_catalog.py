@@ -0,0 +1,50 @@
+import json
+import random
+
+import pytest
+
+from catalog import Catalog, catalog
+
+
+@pytest.fixture
+def small_catalog(tmp_path):
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps({'version': 3, 'collections': {'moduleA': [f's{i}' for i in range(10)]}}))
+    return Catalog(str(path))
+
+
+def test_items_are_looked_up_by_position(small_catalog):
+    sentences = small_catalog['moduleA']
+    assert len(sentences) == 10
+    assert sentences[4] == 's4'
+    with pytest.raises(IndexError):
+        sentences[10]
+
+
+def test_version_changes_with_the_content(tmp_path, small_catalog):
+    assert small_catalog.version.startswith('3-')
+    path = tmp_path / 'catalog.json'
+    path.write_text(json.dumps({'version': 3, 'collections': {'moduleA': ['edited']}}))
+    assert Catalog(str(path)).version != small_catalog.version
+
+
+@pytest.mark.parametrize('count, exclude', [(3, ()), (3, (0, 1, 2)), (5, range(4)), (20, (1,))])
+def test_sample_returns_distinct_ids_outside_the_exclusions(small_catalog, count, exclude):
+    ids = small_catalog['moduleA'].sample(count, exclude=exclude, rng=random.Random(1))
+    assert len(ids) == min(count, 10 - len(set(exclude)))
+    assert len(set(ids)) == len(ids)
+    assert not set(ids) & set(exclude)
+    assert all(0 <= i < 10 for i in ids)
+
+
+def test_sample_ignores_unknown_exclusions_and_never_goes_negative(small_catalog):
+    sentences = small_catalog['moduleA']
+    assert len(sentences.sample(3, exclude=(-1, 99))) == 3
+    assert sentences.sample(3, exclude=range(10)) == []
+    assert sentences.sample(-1) == []
+
+
+def test_shipped_catalog_has_every_collection():
+    for name in ('moduleA', 'moduleB', 'moduleC'):
+        assert len(catalog[name]) > 0
+        assert all(isinstance(item, str) and item for item in catalog[name].items)
@@ -0,0 +1,63 @@
+import time
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def job(app_module, signup, monkeypatch):
+    """A logged-in client and a job of theirs that stays queued"""
+    monkeypatch.setitem(app_module.app.config, 'JOB_EVENTS_TIMEOUT', 0.3)
+    monkeypatch.setitem(app_module.app.config, 'JOB_EVENTS_POLL_INTERVAL', 0.05)
+    client = signup()
+    with client.session_transaction() as sess:
+        user_id = sess['user_id']
+    job_id = uuid.uuid4().hex
+    with app_module.db.transaction() as conn:
+        conn.execute("INSERT INTO scoring_jobs (id, user_id, kind, status, created_at, updated_at) "
+                     "VALUES (?, ?, 'moduleA', 'queued', ?, ?)", (job_id, user_id, time.time(), time.time()))
+    return client, job_id
+
+
+def stream(client, job_id):
+    """Read a whole event stream; returns the event names and the raw body"""
+    with client.get(f'/api/jobs/{job_id}/events') as response:
+        body = response.get_data(as_text=True)
+    return [block.split('\n')[0].split(': ', 1)[1] for block in body.strip().split('\n\n')], body
+
+
+def test_stream_ends_with_a_terminal_timeout_event(job):
+    client, job_id = job
+    names, body = stream(client, job_id)
+    assert names == ['queued', 'timeout']
+    assert f'"job_id": "{job_id}"' in body.split('event: timeout')[1]
+
+
+def test_stream_reports_a_job_whose_worker_died(job, app_module):
+    client, job_id = job
+    with app_module.db.transaction() as conn:
+        conn.execute("UPDATE scoring_jobs SET updated_at = 0 WHERE id = ?", (job_id,))
+    assert stream(client, job_id)[0] == ['failed']
+
+
+def test_open_streams_are_capped_per_worker(job, app_module):
+    client, job_id = job
+    limiter = app_module.job_event_streams
+    held = 0
+    while limiter.try_acquire():
+        held += 1
+    assert held == app_module.app.config['JOB_EVENTS_MAX_STREAMS']
+    try:
+        response = client.get(f'/api/jobs/{job_id}/events')
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+        assert f'/api/jobs/{job_id}' in response.get_json()['error']
+    finally:
+        for _ in range(held):
+            limiter.release()
+
+    # A finished stream gives its slot back
+    for _ in range(held + 1):
+        assert stream(client, job_id)[0] == ['queued', 'timeout']
+    assert limiter.try_acquire()
+    limiter.release()
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from db import Database
+from jobs import JobQueue
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'jobs.db'))
+
+
+def insert_job(db, job_id, status, age):
+    at = time.time() - age
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO scoring_jobs (id, user_id, kind, status, created_at, updated_at) "
+                     "VALUES (?, 1, 'moduleA', ?, ?, ?)", (job_id, status, at, at))
+
+
+def test_init_db_fails_jobs_left_behind_by_a_dead_worker(db):
+    JobQueue(db, stale_seconds=60).init_db()
+    insert_job(db, 'old', 'running', 120)
+    insert_job(db, 'fresh', 'queued', 1)
+
+    queue = JobQueue(db, stale_seconds=60)
+    queue.init_db()
+    assert queue.get('old')['status'] == 'failed'
+    assert queue.get('old')['error'] == JobQueue.STALE_ERROR
+    assert queue.get('fresh')['status'] == 'queued'
+
+
+def test_polling_a_stale_job_reports_it_failed(db):
+    queue = JobQueue(db, stale_seconds=60)
+    queue.init_db()
+    insert_job(db, 'old', 'queued', 120)
+    assert queue.get('old')['status'] == 'failed'
+    assert queue.get('old')['status'] == 'failed'  # persisted, not just reported
+
+
+def test_prune_removes_finished_and_stale_jobs(db):
+    queue = JobQueue(db, max_workers=1, retention_seconds=0, stale_seconds=60)
+    queue.init_db()
+    insert_job(db, 'old', 'running', 120)
+    job_id = queue.submit(1, 'moduleA', lambda: {'score': 90})
+    deadline = time.monotonic() + 2
+    while queue.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # retention 0: both the finished job and the failed stale one are pruned
+    assert queue.get(job_id) is None
+    assert queue.get('old') is None
+
+
+def test_heartbeat_keeps_a_long_running_job_alive(db):
+    queue = JobQueue(db, max_workers=1, stale_seconds=60)
+    queue.init_db()
+    release = threading.Event()
+    job_id = queue.submit(1, 'moduleA', lambda: release.wait(5) and {'score': 90})
+    with db.transaction() as conn:  # running for longer than stale_seconds already
+        conn.execute("UPDATE scoring_jobs SET updated_at = ? WHERE id = ?", (time.time() - 120, job_id))
+    queue.heartbeat()
+    other = JobQueue(db, stale_seconds=60)  # e.g. another worker answering a poll
+    assert other.get(job_id)['status'] in ('queued', 'running')
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while queue.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert other.get(job_id)['status'] == 'done'
+
+
+def test_heartbeat_does_not_revive_jobs_of_other_processes(db):
+    queue = JobQueue(db, stale_seconds=60)
+    queue.init_db()
+    insert_job(db, 'orphan', 'running', 120)
+    queue.heartbeat()
+    assert queue.get('orphan')['status'] == 'failed'
@@ -0,0 +1,145 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    """Fresh registry writing snapshots to a temp METRICS_DIR, without the flush thread"""
+    monkeypatch.setattr(metrics, 'METRICS_DIR', str(tmp_path))
+    monkeypatch.setattr(metrics, '_counters', {})
+    monkeypatch.setattr(metrics, '_gauges', {})
+    monkeypatch.setattr(metrics, '_histograms', {})
+    monkeypatch.setattr(metrics, '_DESCRIPTIONS', dict(metrics._DESCRIPTIONS))
+    monkeypatch.setattr(metrics, '_flusher_pid', os.getpid())
+    return tmp_path
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def write_snapshot(directory, pid, counters=(), gauges=(), histograms=(), started=None, written=None):
+    instance = uuid.uuid4().hex[:12]
+    now = time.time()
+    with open(os.path.join(directory, f'{pid}-{instance}.json'), 'w') as f:
+        json.dump({'pid': pid, 'instance': instance, 'started': now - 60 if started is None else started,
+                   'time': now if written is None else written, 'counters': list(counters),
+                   'gauges': list(gauges), 'histograms': list(histograms)}, f)
+
+
+def sample(text, series):
+    for line in text.splitlines():
+        if line.startswith(series + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+
+def test_counters_from_live_and_exited_workers_are_summed(registry):
+    metrics.inc('jobs_total', {'kind': 'a'}, 2)
+    write_snapshot(registry, os.getppid(), counters=[['jobs_total', [['kind', 'a']], 3]])
+    write_snapshot(registry, dead_pid(), counters=[['jobs_total', [['kind', 'a']], 5]])
+    assert sample(metrics.render(), 'jobs_total{kind="a"}') == 10
+
+
+def test_gauges_only_count_live_workers(registry):
+    metrics.set_gauge('queue_depth', 1)
+    write_snapshot(registry, os.getppid(), gauges=[['queue_depth', [], 2]])
+    write_snapshot(registry, dead_pid(), gauges=[['queue_depth', [], 40]])
+    assert sample(metrics.render(), 'queue_depth') == 3
+
+
+def test_state_gauges_take_the_worst_worker(registry):
+    metrics.describe('breaker_state', 'gauge', 'Breaker state', merge='max')
+    metrics.set_gauge('breaker_state', 2, {'backend': 'asr'})
+    write_snapshot(registry, os.getppid(), gauges=[['breaker_state', [['backend', 'asr']], 2]])
+    write_snapshot(registry, os.getppid(), gauges=[['breaker_state', [['backend', 'asr']], 0]], started=0)
+    assert sample(metrics.render(), 'breaker_state{backend="asr"}') == 2
+
+
+def test_unknown_gauge_merge_is_rejected(registry):
+    with pytest.raises(ValueError):
+        metrics.describe('breaker_state', 'gauge', 'Breaker state', merge='avg')
+
+
+def test_reused_pid_keeps_the_dead_workers_counters_but_not_its_gauges(registry):
+    # Two snapshots of one running pid: the older one belonged to a worker that exited
+    pid = os.getppid()
+    write_snapshot(registry, pid, counters=[['jobs_total', [], 4]], gauges=[['queue_depth', [], 30]], started=100)
+    write_snapshot(registry, pid, counters=[['jobs_total', [], 1]], gauges=[['queue_depth', [], 2]], started=200)
+    text = metrics.render()
+    assert sample(text, 'jobs_total') == 5
+    assert sample(text, 'queue_depth') == 2
+
+
+def test_own_pid_from_an_earlier_process_is_not_live(registry):
+    metrics.set_gauge('queue_depth', 1)
+    write_snapshot(registry, os.getpid(), counters=[['jobs_total', [], 3]], gauges=[['queue_depth', [], 7]])
+    text = metrics.render()
+    assert sample(text, 'jobs_total') == 3
+    assert sample(text, 'queue_depth') == 1
+
+
+def test_stale_snapshot_gauges_are_ignored(registry):
+    write_snapshot(registry, os.getppid(), gauges=[['queue_depth', [], 5]],
+                   written=time.time() - metrics.METRICS_STALE_SECONDS - 1)
+    assert sample(metrics.render(), 'queue_depth') is None
+
+
+def test_snapshot_files_are_per_instance(registry):
+    metrics.inc('jobs_total')
+    metrics.flush()
+    assert os.listdir(registry) == [f'{os.getpid()}-{metrics._instance}.json']
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(write, metrics._instance.encode())
+        os._exit(0)
+    os.waitpid(pid, 0)
+    child_instance = os.read(read, 64).decode()
+    os.close(read)
+    os.close(write)
+    assert child_instance != metrics._instance
+
+
+def test_histograms_are_merged_bucket_by_bucket(registry):
+    metrics.observe('latency_seconds', 0.2, buckets=(0.1, 1.0))
+    metrics.observe('latency_seconds', 5.0, buckets=(0.1, 1.0))  # above every bucket
+    other = {'buckets': [0.1, 1.0], 'counts': [1, 1], 'sum': 0.6, 'count': 2}
+    write_snapshot(registry, dead_pid(), histograms=[['latency_seconds', [], other]])
+    text = metrics.render()
+    assert sample(text, 'latency_seconds_bucket{le="0.1"}') == 1
+    assert sample(text, 'latency_seconds_bucket{le="1.0"}') == 3
+    assert sample(text, 'latency_seconds_bucket{le="+Inf"}') == 4
+    assert sample(text, 'latency_seconds_count') == 4
+    assert sample(text, 'latency_seconds_sum') == pytest.approx(5.8)
+
+
+def test_own_snapshot_file_is_not_counted_twice(registry):
+    metrics.inc('jobs_total')
+    metrics.flush()
+    assert sample(metrics.render(), 'jobs_total') == 1
+
+
+def test_unreadable_snapshots_are_skipped(registry):
+    metrics.inc('jobs_total')
+    (registry / '123.json').write_text('{not json')
+    assert sample(metrics.render(), 'jobs_total') == 1
+
+
+def test_help_type_and_label_escaping(registry):
+    metrics.describe('jobs_total', 'counter', 'Jobs by kind')
+    metrics.inc('jobs_total', {'kind': 'say "hi"\n'})
+    text = metrics.render()
+    assert '# HELP jobs_total Jobs by kind' in text
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{kind="say \\"hi\\"\\n"} 1' in text
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+import admission
+import backends
+import moduleC
+import transcription
+from audio_io import AudioBuffer
+from backends import FakeEvaluator, FakeTranscriber
+from cache import LRUCache, TieredCache
+
+TOPIC_ID = 0
+
+
+class ScriptedEvaluator(FakeEvaluator):
+    """Fake LLM that returns a fixed reply and counts calls"""
+
+    def __init__(self, reply=None):
+        super().__init__(latency='fixed:0', failure_rate=0)
+        self.reply = reply
+        self.calls = 0
+
+    def generate(self, prompt, model):
+        self.calls += 1
+        return self.reply if self.reply is not None else super().generate(prompt, model)
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    scripted = ScriptedEvaluator()
+    monkeypatch.setattr(backends, '_transcriber', FakeTranscriber(latency='fixed:0', failure_rate=0,
+                                                                   word_error_rate=0))
+    monkeypatch.setattr(backends, '_evaluator', scripted)
+    monkeypatch.setattr(transcription, 'transcription_cache', TieredCache(LRUCache(), name='test'))
+    monkeypatch.setattr(moduleC, 'evaluation_cache', TieredCache(LRUCache(), name='test'))
+    return scripted
+
+
+def recording():
+    return AudioBuffer(io.BytesIO(b'RIFF-test-recording'))
+
+
+def test_transcript_is_yielded_before_the_evaluation(evaluator):
+    stages = list(moduleC.run_moduleC_stages(recording(), TOPIC_ID))
+    assert [name for name, _ in stages] == ['transcript', 'result']
+    transcript, result = stages[0][1], stages[1][1]
+    assert transcript['topic'] == moduleC.topics[TOPIC_ID]
+    assert transcript['transcription'] == result['transcription']
+    assert result['success']
+    assert result['score'] == sum(result[name] for name in
+                                  ('relevance_score', 'grammar_score', 'vocabulary_score', 'coherence_score'))
+
+
+def test_run_moduleC_returns_the_last_stage(evaluator):
+    assert moduleC.run_moduleC(recording(), TOPIC_ID) == list(moduleC.run_moduleC_stages(recording(), TOPIC_ID))[-1][1]
+
+
+def test_bad_evaluation_json_fails_only_the_result_stage(evaluator):
+    evaluator.reply = 'not json'
+    stages = list(moduleC.run_moduleC_stages(recording(), TOPIC_ID))
+    assert stages[0][1]['success']
+    assert not stages[1][1]['success']
+    assert 'Failed to parse evaluation' in stages[1][1]['error']
+
+
+def test_markdown_fenced_json_is_accepted_and_cached(evaluator):
+    evaluator.reply = '```json\n{"total_score": 80, "feedback": "ok"}\n```'
+    text = 'I like to travel because it shows me new places and people'
+    assert moduleC.evaluate_response('Travel', text)['total_score'] == 80
+    assert moduleC.evaluate_response('Travel', text.upper() + '!')['total_score'] == 80
+    assert evaluator.calls == 1
+
+
+def test_short_answers_are_scored_locally(evaluator):
+    evaluation = moduleC.evaluate_response('Travel', 'I like it')
+    assert evaluation['total_score'] == 12
+    assert moduleC.evaluate_response('Travel', '')['total_score'] == 0
+    assert evaluator.calls == 0
+
+
+def test_overload_is_raised_for_a_503(evaluator, monkeypatch):
+    monkeypatch.setitem(admission.limiters, 'llm', admission.Limiter('llm', 1, 0, 0))
+    with admission.admit('llm'):
+        stages = moduleC.run_moduleC_stages(recording(), TOPIC_ID)
+        assert next(stages)[0] == 'transcript'
+        with pytest.raises(admission.Overloaded):
+            next(stages)
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from moduleD import (QUIZ_TOKEN_MAX_AGE, QuizTokenError, get_quiz, load_quiz_token, make_quiz_token,
+                     questions_bank, submit_answers)
+
+SECRET = 'test-secret'
+
+
+# ----- Quiz tokens -----
+
+def test_token_round_trip():
+    token = make_quiz_token([3, 1, 4], SECRET, user_id=7)
+    assert load_quiz_token(token, SECRET, user_id=7) == [3, 1, 4]
+
+
+def test_tampered_token_is_rejected():
+    token = make_quiz_token([3, 1, 4], SECRET, user_id=7)
+    tampered = token[:-2] + ('AA' if token[-2:] != 'AA' else 'BB')
+    with pytest.raises(QuizTokenError, match='Invalid'):
+        load_quiz_token(tampered, SECRET, user_id=7)
+    with pytest.raises(QuizTokenError, match='Invalid'):
+        load_quiz_token(token, 'another-secret', user_id=7)
+
+
+def test_token_is_bound_to_its_user():
+    token = make_quiz_token([3, 1, 4], SECRET, user_id=7)
+    with pytest.raises(QuizTokenError, match='another user'):
+        load_quiz_token(token, SECRET, user_id=8)
+
+
+def test_expired_token_is_rejected(monkeypatch):
+    token = make_quiz_token([3, 1, 4], SECRET, user_id=7)
+    later = time.time() + QUIZ_TOKEN_MAX_AGE + 60
+    monkeypatch.setattr(time, 'time', lambda: later)
+    with pytest.raises(QuizTokenError, match='expired'):
+        load_quiz_token(token, SECRET, user_id=7)
+
+
+def test_signed_out_of_range_ids_are_rejected():
+    token = make_quiz_token([len(questions_bank)], SECRET, user_id=7)
+    with pytest.raises(QuizTokenError):
+        load_quiz_token(token, SECRET, user_id=7)
+
+
+def test_missing_token():
+    with pytest.raises(QuizTokenError, match='No active quiz'):
+        load_quiz_token(None, SECRET)
+
+
+# ----- Quizzes -----
+
+def test_quiz_is_graded_from_its_token():
+    quiz = get_quiz(SECRET, num_questions=3, user_id=7)
+    ids = load_quiz_token(quiz['quiz_token'], SECRET, user_id=7)
+    answers = [questions_bank[i]['answer'] for i in ids]
+    answers[0] = 'wrong'
+    result = submit_answers(answers, quiz['quiz_token'], SECRET, user_id=7)
+    assert (result['score'], result['total']) == (2, 3)
+    assert [item['correct'] for item in result['review']] == [False, True, True]
+    assert not submit_answers(answers, quiz['quiz_token'], SECRET, user_id=8)['success']
+
+
+def test_unknown_difficulty():
+    assert not get_quiz(SECRET, difficulty='impossible')['success']
@@ -0,0 +1,36 @@
+import pytest
+
+from passwords import PasswordHasher, PasswordPoolBusy
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+def test_hash_and_verify_run_inline_until_started():
+    hasher = PasswordHasher(method=FAST, workers=2)
+    password_hash = hasher.hash('secret')
+    assert hasher.verify(password_hash, 'secret')
+    assert not hasher.verify(password_hash, 'wrong')
+    assert hasher._pool is None
+
+
+def test_started_pool_hashes_in_worker_processes():
+    hasher = PasswordHasher(method=FAST, workers=1, timeout=60)
+    hasher.start()
+    try:
+        assert hasher._pool is not None
+        assert hasher.verify(hasher.hash('secret'), 'secret')
+        assert hasher._pending == 0
+    finally:
+        hasher._pool.shutdown()
+
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(method=FAST, workers=0, max_pending=0)
+    with pytest.raises(PasswordPoolBusy):
+        hasher.hash('secret')
+
+
+def test_needs_rehash_compares_the_method_prefix():
+    hasher = PasswordHasher(method=FAST, workers=0)
+    assert not hasher.needs_rehash(hasher.hash('secret'))
+    assert PasswordHasher(method='pbkdf2:sha256:2000', workers=0).needs_rehash(hasher.hash('secret'))
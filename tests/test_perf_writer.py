@@ -0,0 +1,160 @@
+import sqlite3
+import time
+
+import pytest
+
+from perf_writer import PerformanceWriter
+
+
+class FakeTable:
+    """Stands in for write_performance_rows; refuses rows without a session"""
+
+    def __init__(self):
+        self.rows = []
+        self.batches = 0
+
+    def write(self, rows):
+        self.batches += 1
+        if any(row[1] is None for row in rows):
+            raise sqlite3.IntegrityError("NOT NULL constraint failed: user_performance.session_id")
+        self.rows.extend(rows)
+
+
+def reject_missing_session(row):
+    if row[1] is None:
+        raise ValueError("missing session")
+
+
+@pytest.fixture
+def table():
+    return FakeTable()
+
+
+def test_flush_writes_queued_rows_in_one_batch(table):
+    writer = PerformanceWriter(table.write, max_rows=100, max_delay_ms=60000)
+    writer.add_many([(1, 's', 'A', n, 50, 100) for n in range(3)])
+    assert writer.flush() == 0
+    assert len(table.rows) == 3
+    assert table.batches == 1
+    writer.close()
+
+
+def test_validate_rejects_bad_rows_before_queueing(table):
+    writer = PerformanceWriter(table.write, max_rows=100, max_delay_ms=60000, validate=reject_missing_session)
+    with pytest.raises(ValueError):
+        writer.add_many([(1, 's', 'A', 1, 50, 100), (1, None, 'A', 2, 50, 100)])
+    assert writer.pending() == 0
+    writer.close()
+
+
+def test_failed_batch_drops_only_the_bad_row(table):
+    writer = PerformanceWriter(table.write, max_rows=100, max_delay_ms=60000)
+    writer.add_many([(1, 's', 'A', 1, 50, 100), (2, None, 'D', 1, 0, 100), (3, 's', 'B', 1, 80, 100)])
+    assert writer.flush() == 1
+    assert writer.pending() == 0
+    assert writer.dropped == 1
+    assert [row[0] for row in table.rows] == [1, 3]
+
+    # The buffer keeps working for everyone else
+    writer.add((4, 's', 'A', 2, 70, 100))
+    assert writer.flush() == 0
+    assert [row[0] for row in table.rows] == [1, 3, 4]
+    writer.close()
+
+
+def test_close_does_not_raise_on_a_bad_row(table):
+    writer = PerformanceWriter(table.write, max_rows=100, max_delay_ms=60000)
+    writer.add((1, None, 'A', 1, 50, 100))
+    writer.close()
+    assert writer.dropped == 1
+
+
+def locked_table(path):
+    """A real table, and a write_rows that gives up at once if the database is locked"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("CREATE TABLE perf (user_id, session_id NOT NULL, module, question, score, max_score)")
+    conn.close()
+
+    def write(rows):
+        conn = sqlite3.connect(path, timeout=0)
+        try:
+            with conn:
+                conn.executemany("INSERT INTO perf VALUES (?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+
+    return write
+
+
+def test_locked_database_keeps_the_rows(tmp_path):
+    path = str(tmp_path / 'perf.db')
+    writer = PerformanceWriter(locked_table(path), max_rows=100, max_delay_ms=60000, retry_delay_ms=60000)
+    writer.add_many([(1, 's', 'A', n, 50, 100) for n in range(3)])
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    assert writer.flush() == 0
+    assert writer.pending() == 3
+    assert writer.dropped == 0
+
+    holder.execute("ROLLBACK")
+    holder.close()
+    writer.add((1, 's', 'A', 3, 50, 100))
+    assert writer.flush() == 0
+    assert writer.pending() == 0
+    conn = sqlite3.connect(path)
+    assert [row[0] for row in conn.execute("SELECT question FROM perf ORDER BY rowid")] == [0, 1, 2, 3]
+    conn.close()
+    writer.close()
+
+
+def test_transient_error_during_row_retry_requeues_the_rest():
+    written = []
+    calls = []
+
+    def write(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise sqlite3.IntegrityError("NOT NULL constraint failed")
+        if len(calls) == 3:
+            raise sqlite3.OperationalError("database is locked")
+        written.extend(rows)
+
+    writer = PerformanceWriter(write, max_rows=100, max_delay_ms=60000, retry_delay_ms=60000)
+    writer.add_many([(n, 's', 'A', 1, 50, 100) for n in range(3)])
+    assert writer.flush() == 0
+    assert [row[0] for row in written] == [0]
+    assert writer.pending() == 2
+    assert writer.flush() == 0
+    assert [row[0] for row in written] == [0, 1, 2]
+    writer.close()
+
+
+def test_background_thread_backs_off_after_a_transient_error():
+    calls = []
+
+    def write(rows):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+
+    writer = PerformanceWriter(write, max_rows=100, max_delay_ms=10, retry_delay_ms=200)
+    writer.add((1, 's', 'A', 1, 50, 100))
+    deadline = time.monotonic() + 3
+    while writer.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.pending() == 0
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.2
+    writer.close()
+
+
+def test_background_thread_flushes_after_the_delay(table):
+    writer = PerformanceWriter(table.write, max_rows=100, max_delay_ms=20)
+    writer.add((1, 's', 'A', 1, 50, 100))
+    deadline = time.monotonic() + 2
+    while writer.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.pending() == 0
+    assert len(table.rows) == 1
+    writer.close()
@@ -0,0 +1,30 @@
+import random
+from collections import Counter
+
+from moduleD import QuestionIndex, miss_rates_from_stats, questions_bank
+
+
+def test_sample_draws_distinct_ids_of_the_difficulty():
+    index = QuestionIndex(questions_bank)
+    ids = index.sample(5, 'easy', rng=random.Random(1))
+    assert len(set(ids)) == 5
+    assert all(questions_bank[i]['difficulty'] == 'easy' for i in ids)
+
+
+def test_sample_is_capped_at_the_bank_size():
+    index = QuestionIndex(questions_bank)
+    assert sorted(index.sample(1000, rng=random.Random(1))) == list(range(len(questions_bank)))
+
+
+def test_missed_categories_are_drawn_more_often():
+    index = QuestionIndex(questions_bank)
+    rng = random.Random(1)
+    rates = {category: 0.05 for category in index.groups['mixed']}
+    rates['preposition'] = 0.9
+    counts = Counter(questions_bank[index.sample(1, miss_rates=rates, rng=rng)[0]]['category'] for _ in range(300))
+    # 0.9 against 0.05 for each of the other categories: about half the draws
+    assert counts['preposition'] > 100
+
+
+def test_miss_rates_are_smoothed():
+    assert miss_rates_from_stats({'a': (0, 0), 'b': (1, 1), 'c': (8, 0)}) == {'a': 0.5, 'b': 2 / 3, 'c': 0.1}
@@ -0,0 +1,154 @@
+import threading
+import time
+
+import pytest
+
+import admission
+from backends import BackendError
+from resilience import CircuitBreaker, CircuitOpen, ResilientCaller
+
+
+def trip(breaker, failures):
+    for _ in range(failures):
+        breaker.before_call()
+        breaker.record(False)
+
+
+def test_breaker_opens_at_the_error_rate():
+    breaker = CircuitBreaker('t', window=10, min_calls=4, error_rate=0.5, cooldown=30)
+    breaker.before_call()
+    breaker.record(True)
+    trip(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED  # 3 outcomes, below min_calls
+    trip(breaker, 1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen) as raised:
+        breaker.before_call()
+    assert raised.value.backend == 't'
+    assert raised.value.retry_after >= 1
+
+
+def test_breaker_half_open_lets_one_trial_through_and_closes_on_success():
+    breaker = CircuitBreaker('t', window=10, min_calls=2, error_rate=0.5, cooldown=0.05)
+    trip(breaker, 2)
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()  # a second trial must wait for the first
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_breaker_reopens_when_the_trial_fails():
+    breaker = CircuitBreaker('t', window=10, min_calls=2, error_rate=0.5, cooldown=0.05)
+    trip(breaker, 2)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+
+def test_breaker_release_frees_the_trial_slot():
+    breaker = CircuitBreaker('t', window=10, min_calls=2, error_rate=0.5, cooldown=0.05)
+    trip(breaker, 2)
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_retries_until_success():
+    calls = []
+
+    def attempt(timeout):
+        calls.append(timeout)
+        if len(calls) < 3:
+            raise BackendError("flaky")
+        return 'ok'
+
+    caller = ResilientCaller('t', deadline=5, attempt_timeout=1, max_attempts=3, base_delay=0.001)
+    assert caller.call(attempt) == 'ok'
+    assert len(calls) == 3
+    assert all(timeout <= 1 for timeout in calls)
+
+
+def test_non_retryable_errors_are_raised_at_once():
+    calls = []
+
+    def attempt(timeout):
+        calls.append(timeout)
+        raise ValueError("bad request")
+
+    caller = ResilientCaller('t', max_attempts=3, base_delay=0.001)
+    with pytest.raises(ValueError):
+        caller.call(attempt, retryable=lambda error: isinstance(error, BackendError))
+    assert len(calls) == 1
+
+
+def test_last_error_is_raised_when_attempts_run_out():
+    def attempt(timeout):
+        raise BackendError("down")
+
+    caller = ResilientCaller('t', max_attempts=2, base_delay=0.001)
+    with pytest.raises(BackendError):
+        caller.call(attempt)
+
+
+def test_open_breaker_fails_calls_fast():
+    breaker = CircuitBreaker('t', window=10, min_calls=2, error_rate=0.5, cooldown=30)
+    caller = ResilientCaller('t', max_attempts=3, base_delay=0.001, breaker=breaker)
+
+    def attempt(timeout):
+        raise BackendError("down")
+
+    with pytest.raises((BackendError, CircuitOpen)):
+        caller.call(attempt)
+    with pytest.raises(CircuitOpen):
+        caller.call(attempt)
+
+
+def hedging_caller(limiter=None):
+    caller = ResilientCaller('t', deadline=5, attempt_timeout=2, max_attempts=1, hedge=True,
+                             hedge_min_delay=0.02, limiter=limiter)
+    for _ in range(20):
+        caller.latencies.add(0.01)
+    return caller
+
+
+def slow_then_fast():
+    calls = []
+    lock = threading.Lock()
+
+    def attempt(timeout):
+        with lock:
+            calls.append(timeout)
+            first = len(calls) == 1
+        time.sleep(0.5 if first else 0.01)
+        return 'primary' if first else 'hedge'
+
+    return attempt, calls
+
+
+def test_slow_attempt_is_hedged_within_a_free_slot(monkeypatch):
+    limiter = admission.Limiter('t', max_concurrency=2, max_waiting=0, queue_timeout=0)
+    monkeypatch.setitem(admission.limiters, 't', limiter)
+    attempt, calls = slow_then_fast()
+    with limiter.slot():
+        assert hedging_caller('t').call(attempt) == 'hedge'
+        time.sleep(0.05)
+        assert limiter._active == 1  # the hedge gave its slot back
+    assert len(calls) == 2
+
+
+def test_hedge_is_skipped_without_a_free_slot(monkeypatch):
+    limiter = admission.Limiter('t', max_concurrency=1, max_waiting=0, queue_timeout=0)
+    monkeypatch.setitem(admission.limiters, 't', limiter)
+    attempt, calls = slow_then_fast()
+    with limiter.slot():  # the caller's own slot fills the limiter
+        assert hedging_caller('t').call(attempt) == 'primary'
+    assert len(calls) == 1
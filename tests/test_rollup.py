@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+from db import Database
+
+RAW_AGGREGATES = """
+    SELECT user_id, session_id, module, COALESCE(SUM(score), 0), COALESCE(SUM(max_score), 0),
+           COUNT(*), MAX(score)
+    FROM user_performance
+    GROUP BY user_id, session_id, module
+    ORDER BY user_id, session_id, module
+"""
+SUMMARY = """
+    SELECT user_id, session_id, module, score_sum, max_score_sum, attempts, best_score
+    FROM performance_summary
+    ORDER BY user_id, session_id, module
+"""
+
+ROWS = [
+    (1, 's1', 'Module A - Read & Speak', 1, 80, 100),
+    (1, 's1', 'Module A - Read & Speak', 2, 95.5, 100),
+    (1, 's1', 'Module D - Grammar Quiz', 1, 0, 100),
+    (1, 's2', 'Module A - Read & Speak', 1, 40, 100),
+    (2, 's1', 'Module B - Listen & Repeat', 3, None, 100),  # unscored attempt
+    (2, 's1', 'Module B - Listen & Repeat', 4, 70, 100),
+]
+
+
+@pytest.fixture
+def fresh_db(app_module, monkeypatch, tmp_path):
+    """Point the app at an empty database for the duration of a test"""
+    database = Database(str(tmp_path / 'perf.db'))
+    monkeypatch.setattr(app_module, 'db', database)
+    return database
+
+
+def rows_of(database, query):
+    return [tuple(row) for row in database.connection().execute(query)]
+
+
+def test_rollup_matches_the_raw_rows_after_inserts(app_module, fresh_db):
+    app_module.init_performance_db()
+    app_module.save_performance_many(ROWS[:3])
+    for row in ROWS[3:]:
+        app_module.save_performance(*row)
+    app_module.write_performance_rows([(1, 's1', 'Module A - Read & Speak', 3, 60, 100)])
+
+    summary = rows_of(fresh_db, SUMMARY)
+    assert summary == rows_of(fresh_db, RAW_AGGREGATES)
+    assert summary[0][3:] == (235.5, 300, 3, 95.5)
+
+
+def test_report_reads_the_rollup(app_module, fresh_db):
+    app_module.init_performance_db()
+    app_module.save_performance_many(ROWS)
+    report = app_module.get_session_report(1, 's1')
+    modules = {item['name']: item for item in report['modules']}
+    assert modules['Module A - Read & Speak']['average_score'] == 87.75
+    assert modules['Module A - Read & Speak']['questions_completed'] == 2
+    assert modules['Module A - Read & Speak']['best_score'] == 95.5
+    assert modules['Module D - Grammar Quiz']['percentage'] == 0
+    assert (report['total_questions'], report['overall_score']) == (3, 43.9)
+
+
+def test_existing_database_is_backfilled_when_the_rollup_is_added(app_module, fresh_db, tmp_path):
+    # A database from before the rollup: attempts only
+    conn = sqlite3.connect(str(tmp_path / 'perf.db'))
+    conn.execute("""
+        CREATE TABLE user_performance (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, session_id TEXT NOT NULL,
+            module TEXT NOT NULL, question_number INTEGER, score REAL, max_score REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+    """)
+    conn.executemany("INSERT INTO user_performance (user_id, session_id, module, question_number, score, max_score) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", ROWS)
+    conn.commit()
+    conn.close()
+
+    app_module.init_performance_db()
+    assert rows_of(fresh_db, SUMMARY) == rows_of(fresh_db, RAW_AGGREGATES)
+    assert len(rows_of(fresh_db, SUMMARY)) == 4
+
+    # Running init again does not add the rows a second time, and new inserts keep it in step
+    app_module.init_performance_db()
+    app_module.save_performance(2, 's1', 'Module B - Listen & Repeat', 5, 90, 100)
+    assert rows_of(fresh_db, SUMMARY) == rows_of(fresh_db, RAW_AGGREGATES)
+
+
+def test_backfill_rebuilds_a_drifted_rollup(app_module, fresh_db):
+    app_module.init_performance_db()
+    app_module.save_performance_many(ROWS)
+    with fresh_db.transaction() as conn:
+        conn.execute("UPDATE performance_summary SET attempts = 99")
+        conn.execute("DELETE FROM performance_summary WHERE user_id = 2")
+    assert app_module.backfill_performance_summary() == 4
+    assert rows_of(fresh_db, SUMMARY) == rows_of(fresh_db, RAW_AGGREGATES)
@@ -0,0 +1,75 @@
+import pytest
+
+from scoring import align, align_batch, error_summary, number_to_words, tokenize, word_error_rate
+
+
+@pytest.mark.parametrize('n, words', [
+    (0, 'zero'),
+    (7, 'seven'),
+    (21, 'twenty one'),
+    (40, 'forty'),
+    (105, 'one hundred five'),
+    (2024, 'two thousand twenty four'),
+    (1000000, 'one million'),
+])
+def test_number_to_words(n, words):
+    assert number_to_words(n) == words.split()
+
+
+def test_tokenize_normalizes_case_punctuation_hyphens_and_numbers():
+    assert tokenize("It's 21 - well, twenty-one!") == ["it's", 'twenty', 'one', 'well', 'twenty', 'one']
+    assert tokenize(None) == []
+
+
+def test_digits_match_spelled_out_numbers():
+    assert word_error_rate("I have 21 apples.", "i have twenty-one apples") == 0.0
+
+
+def test_perfect_match():
+    result = align("The cat sat on the mat", "the cat sat on the mat")
+    assert result['wer'] == 0.0
+    assert result['hits'] == 6
+    assert all(word['op'] == 'ok' for word in result['words'])
+
+
+def test_substitution_deletion_and_insertion():
+    result = align("the cat sat on the mat", "the dog sat on mat today")
+    assert (result['substitutions'], result['deletions'], result['insertions']) == (1, 1, 1)
+    assert result['hits'] == 4
+    assert result['wer'] == pytest.approx(3 / 6)
+    assert [(w['op'], w['ref'], w['hyp']) for w in result['words']] == [
+        ('ok', 'the', 'the'), ('sub', 'cat', 'dog'), ('ok', 'sat', 'sat'), ('ok', 'on', 'on'),
+        ('del', 'the', None), ('ok', 'mat', 'mat'), ('ins', None, 'today'),
+    ]
+
+
+def test_missing_word_does_not_shift_later_words():
+    result = align("one two three four five", "one three four five")
+    assert result['deletions'] == 1
+    assert result['substitutions'] == 0
+    assert [w['op'] for w in result['words']] == ['ok', 'del', 'ok', 'ok', 'ok']
+
+
+def test_empty_target_and_transcript():
+    assert align("", "")['wer'] == 0.0
+    assert align("", "hello")['wer'] == 1.0
+    assert align("hello world", "")['wer'] == 1.0
+
+
+def test_unseen_transcript_words_do_not_leak_between_calls():
+    first = align("the cat", "zebra quokka")
+    second = align("the cat", "the cat")
+    assert first['substitutions'] == 2
+    assert second['wer'] == 0.0
+
+
+def test_align_batch_keeps_order_and_checks_lengths():
+    results = align_batch(["a b", "a b"], ["a b", "a c"])
+    assert [r['wer'] for r in results] == [0.0, 0.5]
+    with pytest.raises(ValueError):
+        align_batch(["a"], [])
+
+
+def test_error_summary_is_limited():
+    result = align("a b c d e f g", "z y x w v u t")
+    assert error_summary(result, limit=2) == "'a' heard as 'z', 'b' heard as 'y', and 5 more"
@@ -0,0 +1,73 @@
+import gzip
+import os
+import re
+
+import pytest
+
+from assets import AssetManifest, build_assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+
+@pytest.fixture
+def built(app_module, monkeypatch, tmp_path):
+    """Build the real static/ into a temp dir and serve from that build"""
+    build_dir = str(tmp_path / 'build')
+    manifest = build_assets(STATIC_DIR, build_dir)
+    monkeypatch.setattr(app_module, 'asset_manifest', AssetManifest(build_dir))
+    return manifest
+
+
+def test_pages_link_fingerprinted_assets(app_module, built):
+    client = app_module.app.test_client()
+    page = client.get('/login').get_data(as_text=True)
+    assert f'/static/{built["base.css"]}' in page
+    assert re.fullmatch(r'base\.[0-9a-f]{12}\.css', built['base.css'])
+
+
+def test_fingerprinted_asset_is_cached_forever(app_module, built):
+    client = app_module.app.test_client()
+    response = client.get(f'/static/{built["moduleA.js"]}')
+    assert response.status_code == 200
+    cache_control = response.headers['Cache-Control']
+    assert 'immutable' in cache_control and 'public' in cache_control
+    assert f'max-age={app_module.app.config["ASSET_MAX_AGE"]}' in cache_control
+    assert 'Accept-Encoding' in response.headers['Vary']
+    with open(os.path.join(STATIC_DIR, 'moduleA.js'), 'rb') as f:
+        assert response.data == f.read()
+
+
+def test_precompressed_variant_is_served_when_accepted(app_module, built):
+    client = app_module.app.test_client()
+    plain = client.get(f'/static/{built["base.css"]}').data
+    response = client.get(f'/static/{built["base.css"]}', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(response.data) < len(plain)
+    assert gzip.decompress(response.data) == plain
+
+
+def test_css_urls_point_at_fingerprinted_files(app_module, built):
+    client = app_module.app.test_client()
+    css = client.get(f'/static/{built["base.css"]}').get_data(as_text=True)
+    assert "url('/static/img/waves.jpg')" not in css
+    assert f"url('/static/{built['img/waves.jpg']}')" in css
+    image = client.get(f'/static/{built["img/waves.jpg"]}')
+    assert image.status_code == 200
+    assert 'immutable' in image.headers['Cache-Control']
+
+
+def test_stale_or_unknown_fingerprints_are_not_found(app_module, built):
+    client = app_module.app.test_client()
+    assert client.get('/static/base.000000000000.css').status_code == 404
+    assert client.get('/static/missing.4f06abff7ea5.css').status_code == 404
+    assert client.get('/static/missing.css').status_code == 404
+
+
+def test_without_a_build_assets_come_from_static(app_module, monkeypatch, tmp_path):
+    monkeypatch.setattr(app_module, 'asset_manifest', AssetManifest(str(tmp_path / 'no-build')))
+    with app_module.app.test_request_context():
+        assert app_module.asset_url('base.css') == '/static/base.css'
+    response = app_module.app.test_client().get('/static/base.css')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers.get('Cache-Control', '')
+    response.close()
@@ -0,0 +1,45 @@
+import gtts
+
+import tts_store
+
+
+def test_render_gtts_passes_a_timeout(monkeypatch, tmp_path):
+    seen = {}
+
+    class FakeTTS:
+        def __init__(self, **kwargs):
+            seen.update(kwargs)
+
+        def save(self, path):
+            open(path, 'wb').close()
+
+    monkeypatch.setattr(gtts, 'gTTS', FakeTTS)
+    tts_store.render_gtts('hello', 'en:co.uk', 'slow', str(tmp_path / 'a.mp3'))
+    assert seen['timeout'] == tts_store.TTS_TIMEOUT
+    assert (seen['lang'], seen['tld'], seen['slow']) == ('en', 'co.uk', True)
+
+
+def test_cache_miss_does_not_render_when_disabled(app_module, signup, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'warm_sentence_audio', lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(app_module, 'sentence_audio_key', lambda sentence_id: None)
+    client = signup()
+
+    monkeypatch.setitem(app_module.app.config, 'TTS_WARM_ON_MISS', False)
+    assert client.get('/api/moduleB/sentence').get_json()['audio_url'] is None
+    assert client.get('/api/moduleB/sentences?count=2').status_code == 200
+    assert calls == []
+
+    monkeypatch.setitem(app_module.app.config, 'TTS_WARM_ON_MISS', True)
+    client.get('/api/moduleB/sentence')
+    assert calls == [{'workers': app_module.app.config['TTS_WARM_WORKERS'], 'background': True}]
+
+
+def test_warm_up_does_not_render(app_module, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, 'warm_sentence_audio', lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setitem(app_module.app.config, 'TTS_WARM_ON_START', True)
+    app_module.warm_up()
+    assert calls == []
+    app_module.start_background_warm()
+    assert calls == [{'workers': app_module.app.config['TTS_WARM_WORKERS'], 'background': True}]
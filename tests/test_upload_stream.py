@@ -0,0 +1,129 @@
+import io
+import struct
+import wave
+
+import pytest
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request
+
+from audio_probe import probe
+from upload_stream import UploadRejected, read_recording
+
+
+def make_wav(seconds, rate=16000):
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b'\x00\x00' * int(rate * seconds))
+    return buf.getvalue()
+
+
+class CountingStream(io.BytesIO):
+    """Request body that remembers how much of it was read"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def make_request(audio, filename='r.wav', **fields):
+    data = dict(fields)
+    data['audio'] = (io.BytesIO(audio), filename)
+    environ = EnvironBuilder(method='POST', data=data).get_environ()
+    body = CountingStream(environ['wsgi.input'].read())
+    environ['wsgi.input'] = body
+    return Request(environ), body
+
+
+# ----- Declared duration in the probe -----
+
+def test_truncated_wav_reports_what_arrived_and_what_was_declared():
+    data = make_wav(4.0)
+    info = probe(io.BytesIO(data[:44 + 32000]))  # header plus one second
+    assert info['duration'] == pytest.approx(1.0)
+    assert info['declared_duration'] == pytest.approx(4.0)
+
+
+def test_streaming_wav_with_unset_data_size():
+    data = bytearray(make_wav(2.0))
+    data[40:44] = struct.pack('<I', 0xFFFFFFFF)
+    info = probe(io.BytesIO(bytes(data)))
+    assert info['duration'] == pytest.approx(2.0)
+    assert info['declared_duration'] is None
+
+
+# ----- Reading the upload -----
+
+def test_reads_fields_and_recording():
+    audio = make_wav(1.0)
+    request, _ = make_request(audio, sentence_id='3')
+    fields, buffer = read_recording(request, required=('sentence_id',), max_bytes=1024 * 1024, max_seconds=5)
+    with buffer:
+        assert fields['sentence_id'] == '3'
+        assert buffer.filename == 'r.wav'
+        assert buffer.stream().read() == audio
+
+
+def test_too_many_bytes_is_rejected_before_the_body_is_read():
+    audio = make_wav(30.0)  # ~960 KB
+    request, body = make_request(audio, sentence_id='3')
+    with pytest.raises(UploadRejected) as raised:
+        read_recording(request, max_bytes=100 * 1024)
+    assert raised.value.status == 413
+    assert body.bytes_read == 0  # refused on Content-Length alone
+
+
+def test_too_many_bytes_in_a_chunked_body_stops_at_the_cap():
+    audio = make_wav(30.0)
+    request, body = make_request(audio, sentence_id='3')
+    del request.environ['CONTENT_LENGTH']
+    request.environ['wsgi.input_terminated'] = True  # chunked transfer encoding
+    with pytest.raises(UploadRejected) as raised:
+        read_recording(request, max_bytes=200 * 1024)
+    assert raised.value.status == 413
+    assert body.bytes_read < 400 * 1024
+
+
+def test_declared_duration_over_the_cap_is_rejected_early():
+    audio = make_wav(30.0)
+    request, body = make_request(audio, sentence_id='3')
+    with pytest.raises(UploadRejected) as raised:
+        read_recording(request, max_bytes=10 * 1024 * 1024, max_seconds=10)
+    assert raised.value.status == 413
+    assert 'too long' in str(raised.value)
+    assert body.bytes_read <= 128 * 1024
+
+
+def test_validate_runs_before_the_recording_is_read():
+    audio = make_wav(10.0)
+    request, body = make_request(audio, sentence_id='999')
+    with pytest.raises(UploadRejected) as raised:
+        read_recording(request, required=('sentence_id',),
+                       validate=lambda fields: 'Invalid sentence' if fields['sentence_id'] != '3' else None)
+    assert raised.value.status == 400
+    assert str(raised.value) == 'Invalid sentence'
+    assert body.bytes_read <= 128 * 1024
+
+
+def test_missing_recording_and_wrong_content_type():
+    environ = EnvironBuilder(method='POST', data={'sentence_id': '3'},
+                             content_type='multipart/form-data').get_environ()
+    with pytest.raises(UploadRejected, match='No audio file'):
+        read_recording(Request(environ))
+    environ = EnvironBuilder(method='POST', json={'sentence_id': '3'}).get_environ()
+    with pytest.raises(UploadRejected, match='multipart'):
+        read_recording(Request(environ))
+
+
+def test_unknown_containers_are_only_byte_capped():
+    request, _ = make_request(b'ID3\x04' + b'\x00' * 5000, filename='r.mp3')
+    fields, buffer = read_recording(request, max_bytes=1024 * 1024, max_seconds=1)
+    with buffer:
+        assert buffer.filename == 'r.mp3'
@@ -0,0 +1,77 @@
+import hashlib
+import io
+import os
+
+import admission
+from audio_preprocess import ASR_PREPROCESS, asr_upload
+from backends import get_transcriber
+from cache import LRUCache, SQLiteCache, TieredCache
+from resilience import asr_caller
+import metrics
+
+TRANSCRIPTION_CACHE_SIZE = int(os.getenv("TRANSCRIPTION_CACHE_SIZE", 512))
+TRANSCRIPTION_CACHE_TTL = int(os.getenv("TRANSCRIPTION_CACHE_TTL", 7 * 24 * 3600))
+# Set to a file path (e.g. asr_cache.db) to share cached transcripts across workers and restarts
+TRANSCRIPTION_CACHE_DB = os.getenv("TRANSCRIPTION_CACHE_DB")
+TRANSCRIPTION_CACHE_DB_SIZE = int(os.getenv("TRANSCRIPTION_CACHE_DB_SIZE", 100000))
+
+transcription_cache = TieredCache(
+    LRUCache(TRANSCRIPTION_CACHE_SIZE, ttl_seconds=TRANSCRIPTION_CACHE_TTL),
+    SQLiteCache(TRANSCRIPTION_CACHE_DB, 'transcription_cache',
+                max_entries=TRANSCRIPTION_CACHE_DB_SIZE,
+                ttl_seconds=TRANSCRIPTION_CACHE_TTL) if TRANSCRIPTION_CACHE_DB else None,
+    name='transcription'
+)
+
+
+def audio_digest(audio):
+    """SHA-256 of the recording bytes"""
+    digest = hashlib.sha256()
+    stream = audio.stream()
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def transcribe(audio, model="whisper-large-v3", hint=None):
+    """Transcribe a recording, reusing the result for byte-identical audio
+
+    Retries, double clicks and resubmits of the same recording are served
+    from the cache instead of calling the ASR backend again.
+
+    Args:
+        audio: AudioBuffer holding the recording
+        model: ASR model name (part of the cache key)
+        hint: Expected text, passed through to the backend (see backends.Transcriber);
+            part of the cache key, since backends may use it to shape the transcript
+
+    The backend call goes through resilience.asr_caller (deadline,
+    jittered retries, circuit breaker, optional hedging).
+
+    Returns:
+        Transcribed text, stripped
+
+    Raises:
+        admission.Overloaded: If no ASR slot is free (see admission.py), or
+            the ASR circuit breaker is open (resilience.CircuitOpen)
+    """
+    transcriber = get_transcriber()
+    hint_digest = hashlib.sha256(hint.encode('utf-8')).hexdigest()[:16] if hint else '-'
+    key = f"{transcriber.name}:{model}:{ASR_PREPROCESS}:{hint_digest}:{audio_digest(audio)}"
+    text = transcription_cache.get(key)
+    if text is not None:
+        return text
+
+    with metrics.stage('asr', 'preprocess'):
+        filename, fileobj = asr_upload(audio)
+        # Retries and hedges each need their own readable copy of the upload
+        data = fileobj.read()
+
+    def attempt(timeout):
+        return transcriber.transcribe((filename, io.BytesIO(data)), model, hint=hint, timeout=timeout)
+
+    with admission.admit('asr'), metrics.stage('asr', transcriber.name):
+        text = asr_caller.call(attempt, retryable=transcriber.is_retryable).strip()
+    transcription_cache.set(key, text)
+    return text
@@ -0,0 +1,145 @@
+"""Content-addressed store of rendered text-to-speech audio
+
+Files are keyed by a hash of (text, voice, speed), so editing a sentence
+produces a new file instead of serving stale audio, and a key can be
+cached by browsers forever. Rendering writes to a temporary file and
+renames it into place, so concurrent renders (threads or gunicorn
+workers) never expose a partial file.
+
+    TTS_DIR=tts_cache       where rendered files are kept
+    TTS_VOICE=en            gTTS language, optionally with a tld: "en:co.uk"
+    TTS_SPEED=normal        normal | slow
+    TTS_WARM_RETRY=300      seconds before a background warm-up that had
+                            failures (e.g. no network) may run again
+    TTS_TIMEOUT=10          seconds each gTTS request may take
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TTS_DIR = os.getenv("TTS_DIR", "tts_cache")
+TTS_VOICE = os.getenv("TTS_VOICE", "en")
+TTS_SPEED = os.getenv("TTS_SPEED", "normal")
+TTS_WARM_RETRY = float(os.getenv("TTS_WARM_RETRY", 300))
+TTS_TIMEOUT = float(os.getenv("TTS_TIMEOUT", 10))
+
+KEY_LENGTH = 64  # hex sha256
+
+
+def render_gtts(text, voice, speed, path):
+    """Render text to an MP3 file with gTTS"""
+    from gtts import gTTS
+    lang, _, tld = voice.partition(':')
+    gTTS(text=text, lang=lang, tld=tld or 'com', slow=(speed == 'slow'),
+         timeout=TTS_TIMEOUT).save(path)
+
+
+class TTSStore:
+    """Rendered TTS files addressed by the hash of their inputs
+
+    Args:
+        root: Directory holding the files (two-level fan-out by key prefix)
+        render: Function (text, voice, speed, path) that writes the audio
+    """
+
+    def __init__(self, root=TTS_DIR, render=render_gtts):
+        self.root = root
+        self.render = render
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._background = None
+        self._warm_failed_at = None
+
+    @staticmethod
+    def key_for(text, voice=TTS_VOICE, speed=TTS_SPEED):
+        """Content key for a rendering of text"""
+        return hashlib.sha256(f"{voice}\0{speed}\0{text}".encode('utf-8')).hexdigest()
+
+    def path_for_key(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.mp3")
+
+    def lookup(self, key):
+        """Path of a rendered file, or None if the key is unknown or not rendered yet"""
+        if len(key) != KEY_LENGTH or any(c not in '0123456789abcdef' for c in key):
+            return None
+        path = self.path_for_key(key)
+        return path if os.path.exists(path) else None
+
+    def _key_lock(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def ensure(self, text, voice=TTS_VOICE, speed=TTS_SPEED):
+        """Render text unless it is already in the store
+
+        Returns:
+            (key, rendered) where rendered is True if this call rendered the file
+        """
+        key = self.key_for(text, voice, speed)
+        path = self.path_for_key(key)
+        if os.path.exists(path):
+            return key, False
+        with self._key_lock(key):
+            if os.path.exists(path):
+                return key, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            os.close(fd)
+            try:
+                self.render(text, voice, speed, tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        with self._locks_lock:
+            self._locks.pop(key, None)
+        return key, True
+
+    def key_if_ready(self, text, voice=TTS_VOICE, speed=TTS_SPEED):
+        """Key of text if it is already rendered, else None (never renders)"""
+        key = self.key_for(text, voice, speed)
+        return key if os.path.exists(self.path_for_key(key)) else None
+
+    def warm(self, texts, voice=TTS_VOICE, speed=TTS_SPEED, workers=4):
+        """Render every text that is missing from the store, in parallel
+
+        Returns:
+            Dictionary with rendered, cached and failed counts
+        """
+        counts = {'rendered': 0, 'cached': 0, 'failed': 0}
+
+        def render_one(text):
+            try:
+                return 'rendered' if self.ensure(text, voice, speed)[1] else 'cached'
+            except Exception as e:
+                print(f"Error rendering TTS for {text!r}: {str(e)}")
+                return 'failed'
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='tts') as executor:
+            for outcome in executor.map(render_one, list(dict.fromkeys(texts))):
+                counts[outcome] += 1
+        return counts
+
+    def warm_in_background(self, texts, voice=TTS_VOICE, speed=TTS_SPEED, workers=4):
+        """Start warm() on a daemon thread
+
+        No-op if one is already running, or if the last one had failures
+        less than TTS_WARM_RETRY seconds ago, so cache misses while the
+        TTS service is unreachable do not start a new round each time.
+        """
+        if self._background is not None and self._background.is_alive():
+            return self._background
+        if self._warm_failed_at is not None and time.monotonic() - self._warm_failed_at < TTS_WARM_RETRY:
+            return self._background
+
+        def run():
+            counts = self.warm(texts, voice, speed, workers)
+            self._warm_failed_at = time.monotonic() if counts['failed'] else None
+            print(f"TTS warm-up finished: {counts}")
+
+        self._background = threading.Thread(target=run, name='tts-warm', daemon=True)
+        self._background.start()
+        return self._background
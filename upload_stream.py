@@ -0,0 +1,179 @@
+"""Streaming reader for recording uploads
+
+werkzeug's form parser receives the whole multipart body before the view
+runs, so a recording that is too big or too long is only rejected after
+every byte has arrived. ``read_recording`` parses the body as it comes
+in instead:
+
+- the form fields are validated as soon as the audio part starts (the
+  recorders send them first), before any audio is read
+- the container header is sniffed with audio_probe: a length declared
+  in the header is checked straight away, and the duration of what has
+  arrived so far is re-checked as the upload grows
+- reading stops as soon as the byte or duration cap is exceeded
+
+Containers audio_probe does not recognise (e.g. MP3 from API clients)
+are still accepted, subject to the byte cap only.
+"""
+import os
+import tempfile
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from audio_io import AudioBuffer, DEFAULT_SPOOL_THRESHOLD, SPOOL_PREFIX
+from audio_probe import probe
+import metrics
+
+CHUNK_SIZE = 64 * 1024
+MAX_FIELD_SIZE = 64 * 1024  # per text field, and the allowance for fields on top of max_bytes
+PROBE_MIN_BYTES = 4 * 1024  # enough for any supported container header
+PROBE_INTERVAL = 64 * 1024
+
+metrics.describe('upload_rejections_total', 'counter', 'Recording uploads refused by module and HTTP status')
+
+
+class UploadRejected(Exception):
+    """The upload was refused; ``status`` is the HTTP status to answer with (400 or 413)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class _RecordingSink:
+    """Spools one recording and enforces the byte and duration caps while it is written"""
+
+    def __init__(self, max_bytes, max_seconds, spool_threshold, spool_dir):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.buf = tempfile.SpooledTemporaryFile(max_size=spool_threshold, dir=spool_dir, prefix=SPOOL_PREFIX)
+        self.size = 0
+        self.container = None
+        self.sniffed = False
+        self.next_probe = PROBE_MIN_BYTES
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_bytes and self.size > self.max_bytes:
+            raise UploadRejected(f"Recording is too large (limit {self.max_bytes // (1024 * 1024)} MB)", 413)
+        self.buf.write(data)
+        if self.size >= self.next_probe:
+            # Re-probing walks the whole container, so back off geometrically
+            # to keep the total cost linear in the upload size
+            self.next_probe = self.size + max(PROBE_INTERVAL, self.size // 4)
+            self.check()
+
+    def check(self):
+        """Sniff the container and enforce max_seconds on the declared or received length"""
+        if self.sniffed and self.container is None:
+            return  # unknown container: byte cap only
+        info = probe(self.buf)
+        self.buf.seek(0, os.SEEK_END)
+        self.sniffed = True
+        self.container = info['container']
+        duration = max(info['duration'] or 0, info['declared_duration'] or 0)
+        if self.max_seconds and duration > self.max_seconds:
+            raise UploadRejected(f"Recording is too long (limit {self.max_seconds:g} seconds)", 413)
+
+    def close(self):
+        self.buf.close()
+
+
+def read_recording(request, field='audio', required=(), validate=None, max_bytes=None, max_seconds=None,
+                   spool_threshold=DEFAULT_SPOOL_THRESHOLD, spool_dir=None):
+    """Read a multipart upload holding one recording, rejecting it as early as possible
+
+    Args:
+        request: The current Flask request (its body must not have been read yet)
+        field: Name of the file field holding the recording
+        required: Form fields ``validate`` needs; it runs when the recording
+            starts if they have all arrived by then, otherwise at the end
+        validate: Callable taking the form fields and returning an error
+            message, or None if they are valid
+        max_bytes: Largest accepted recording in bytes (None = no cap)
+        max_seconds: Longest accepted recording in seconds (None = no cap)
+        spool_threshold: Recordings larger than this are spooled to disk
+        spool_dir: Directory for spooled recordings
+
+    Returns:
+        (fields, audio): MultiDict of the text fields and an AudioBuffer the caller must close
+
+    Raises:
+        UploadRejected: If the upload is malformed, invalid or over a cap
+    """
+    if request.mimetype != 'multipart/form-data' or not request.mimetype_params.get('boundary'):
+        raise UploadRejected('Expected a multipart/form-data upload')
+    if max_bytes and request.content_length and request.content_length > max_bytes + MAX_FIELD_SIZE:
+        raise UploadRejected(f"Recording is too large (limit {max_bytes // (1024 * 1024)} MB)", 413)
+
+    fields = MultiDict()
+    validated = False
+    sink = None
+    filename = None
+    writing = False  # inside the recording part
+    part = None  # current Field or File event
+    field_data = []
+    # Field sizes are limited below; the decoder's own limit would also count file data
+    decoder = MultipartDecoder(request.mimetype_params['boundary'].encode('latin-1'))
+
+    def run_validate():
+        error = validate(fields) if validate else None
+        if error:
+            raise UploadRejected(error)
+
+    try:
+        stream = request.stream
+        while True:
+            event = decoder.next_event()
+            if isinstance(event, NeedData):
+                if decoder.complete:
+                    raise UploadRejected('Upload ended unexpectedly')
+                decoder.receive_data(stream.read(CHUNK_SIZE) or None)
+            elif isinstance(event, Epilogue):
+                break
+            elif isinstance(event, Field):
+                part, field_data = event, []
+            elif isinstance(event, File):
+                part = event
+                # Only the first part named ``field`` is kept; other files are skipped
+                writing = event.name == field and sink is None
+                if writing:
+                    if not event.filename:
+                        raise UploadRejected('No file selected')
+                    if all(name in fields for name in required):
+                        run_validate()
+                        validated = True
+                    sink = _RecordingSink(max_bytes, max_seconds, spool_threshold, spool_dir)
+                    filename = event.filename
+            elif isinstance(event, Data):
+                if isinstance(part, Field):
+                    field_data.append(event.data)
+                    if sum(len(chunk) for chunk in field_data) > MAX_FIELD_SIZE:
+                        raise UploadRejected(f"Form field {part.name} is too large", 413)
+                    if not event.more_data:
+                        fields.add(part.name, b''.join(field_data).decode('utf-8', 'replace'))
+                elif writing:
+                    sink.write(event.data)
+                    writing = event.more_data
+
+        if sink is None:
+            raise UploadRejected('No audio file provided')
+        if not validated:
+            run_validate()
+        sink.check()
+    except Exception as e:
+        if sink is not None:
+            sink.close()
+        if isinstance(e, UploadRejected):
+            raise
+        if isinstance(e, RequestEntityTooLarge):
+            # Body larger than MAX_CONTENT_LENGTH
+            raise UploadRejected('Upload is too large', 413)
+        if isinstance(e, ValueError):
+            raise UploadRejected(f"Malformed upload: {str(e)}")
+        raise
+
+    sink.buf.seek(0)
+    return fields, AudioBuffer(sink.buf, os.path.basename(filename) or 'recording.wav', spool_dir)